@@ -173,7 +173,7 @@ def bxmToXmlFromFile(file: BufferedReader) -> ET.Element:
 	return xmlRootNode
 
 def bxmToXml(file: str) -> ET.Element:
-	with open(file, "rb") as f:
+	with open_binary(file) as f:
 		return bxmToXmlFromFile(f)
 
 def xmlToBxm(root: ET.Element, outFileName: str) -> None:
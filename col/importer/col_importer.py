@@ -5,6 +5,7 @@ import bpy
 
 from .col import Col, Batch
 from ...utils.util import centre_origins, setViewportColorTypeToObject
+from ...utils.ioUtils import open_binary, file_path
 from mathutils import Matrix
 
 
@@ -12,8 +13,8 @@ def main(colFilePath):
     # Setup Viewport
     setViewportColorTypeToObject()
 
-    with open(colFilePath, "rb") as colFile:
-        print("Parsing Col file...", colFilePath)
+    with open_binary(colFilePath) as colFile:
+        print("Parsing Col file...", file_path(colFilePath))
         col = Col(colFile)
 
     bpy.context.scene["exportColTree"] = len(col.colTreeNodes) > 0
@@ -1,6 +1,6 @@
 # Stolen and adapted from RaiderB https://github.com/ArthurHeitmann/NierDocs/blob/master/tools/datRepacker/datRepacker.py
 from typing import List
-from ...utils.ioUtils import write_uInt32, write_Int16
+import struct
 import zlib
 import os
 
@@ -23,24 +23,22 @@ class HashData:
         self.fileIndices = []
 
     def getStructSize(self):
-        return 4 + 2*len(self.bucketOffsets) + 4*len(self.hashes) + 4*len(self.fileIndices)
+        return 4*4 + 2*len(self.bucketOffsets) + 4*len(self.hashes) + 2*len(self.fileIndices)
 
-    def write(self, file):
+    def toBytes(self) -> bytes:
         bucketsOffset = 4*4
         hashesOffset = bucketsOffset + len(self.bucketOffsets)*2
         fileIndicesOffset = hashesOffset + len(self.hashes)*4
 
-        write_uInt32(file, self.preHashShift)
-        write_uInt32(file, bucketsOffset)
-        write_uInt32(file, hashesOffset)
-        write_uInt32(file, fileIndicesOffset)
+        return b"".join([
+            struct.pack("<4I", self.preHashShift, bucketsOffset, hashesOffset, fileIndicesOffset),
+            struct.pack(f"<{len(self.bucketOffsets)}h", *self.bucketOffsets),
+            struct.pack(f"<{len(self.hashes)}I", *self.hashes),
+            struct.pack(f"<{len(self.fileIndices)}h", *self.fileIndices),
+        ])
 
-        for bucketOffset in self.bucketOffsets:
-            write_Int16(file, bucketOffset)
-        for hash in self.hashes:
-            write_uInt32(file, hash)
-        for fileIndex in self.fileIndices:
-            write_Int16(file, fileIndex)
+    def write(self, file):
+        file.write(self.toBytes())
 
 def generateHashData(files) -> bytes:
     preHashShift = min(31, 32 - next_power_of_2_bits(len(files)))
@@ -58,7 +56,8 @@ def generateHashData(files) -> bytes:
         hashes[i] = otherHash
     # sort by first half byte (x & 0x70000000)
     # sort indices & hashes at the same time
-    hashes, fileIndices, fileNames = zip(*sorted(zip(hashes, fileIndices, fileNames), key=lambda x: x[0] & 0x70000000))
+    if len(files) > 0: # zip(*[]) has nothing to unpack
+        hashes, fileIndices, fileNames = zip(*sorted(zip(hashes, fileIndices, fileNames), key=lambda x: x[0] & 0x70000000))
     # generate bucket list
     for i in range(len(files)):
         bucketOffsetsIndex = hashes[i] >> preHashShift
@@ -62,6 +62,16 @@ class ExportAllSteps(bpy.types.PropertyGroup):
         name = "Delete Loose Geometry",
         default = True
     )
+    useWmbExportCache: bpy.props.BoolProperty(
+        name = "WMB Export Cache",
+        default = False,
+        description = "Reuse the vertex data of vertex groups whose meshes haven't changed since the last export. It is stored in a wmb_export_cache folder next to the WMB"
+    )
+    incrementalRepack: bpy.props.BoolProperty(
+        name = "Incremental DAT/DTT Repack",
+        default = False,
+        description = "Only copy files that changed since the last export, the rest is reused from the previous DAT/DTT. Tracked in a dat_manifest.json next to dat_info.json"
+    )
 
 class DAT_DTT_PT_Export(bpy.types.Panel):
     bl_label = "NieR:Automata Export"
@@ -174,6 +184,9 @@ class DAT_DTT_PT_Export(bpy.types.Panel):
         row.prop(context.scene.ExportAllSteps, "triangulateMeshes", text="Triangulate", icon="MOD_TRIANGULATE")
         row.prop(context.scene.ExportAllSteps, "centerOrigins", text="Center Origins", icon="OBJECT_ORIGIN")
         row.prop(context.scene.ExportAllSteps, "deleteLoose", text="Delete Loose", icon="SNAP_VERTEX")
+        row = box.row(align=True)
+        row.prop(context.scene.ExportAllSteps, "useWmbExportCache", text="WMB Cache", icon="FILE_CACHE")
+        row.prop(context.scene.ExportAllSteps, "incrementalRepack", text="Incremental Repack", icon="FILE_REFRESH")
 
         layout.separator()
 
@@ -274,7 +287,7 @@ class ExportAll(bpy.types.Operator):
                 centre_origins("WMB")
             if exportSteps.deleteLoose:
                 bpy.ops.b2n.deleteloosegeometryall()
-            wmb_exporter.main(wmbFilePath)
+            wmb_exporter.main(wmbFilePath, useCache=exportSteps.useWmbExportCache)
             exportedFilesCount += 1
         from ...wta_wtp.exporter import export_wta, export_wtp
         if exportSteps.useWtaStep:
@@ -326,7 +339,7 @@ class ExportAll(bpy.types.Operator):
             fileNames = [os.path.basename(file_path) for file_path in file_list]
             saveDatInfo(datInfoFilePath, fileNames, datFileName)
             # export dtt
-            export_dat.main(datFilePath, file_list)
+            export_dat.main(datFilePath, file_list, exportSteps.incrementalRepack)
             exportedFilesCount += 1
         if exportSteps.useDttStep:
             if len(context.scene.DttContents) == 0:
@@ -342,7 +355,7 @@ class ExportAll(bpy.types.Operator):
             fileNames = [os.path.basename(file_path) for file_path in file_list]
             saveDatInfo(datInfoFilePath, fileNames, dttFileName)
             # export dtt
-            export_dat.main(dttFilePath, file_list)
+            export_dat.main(dttFilePath, file_list, exportSteps.incrementalRepack)
             exportedFilesCount += 1
 
         tDiff = int(time.time() - t1)
@@ -1,13 +1,93 @@
+import hashlib
+import json
 import math
+import struct
 
-from ...utils.ioUtils import write_string, write_Int32, write_buffer, read_int32
-from ...utils.util import *
+import os
+from ..importer.datArchive import DatArchive
 
 
 def to_string(bs, encoding = 'utf8'):
 	return bs.split(b'\x00')[0].decode(encoding)
 
-def main(export_filepath, file_list):
+# bytes per read when os.copy_file_range isn't available
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+def copyFileData(srcFile, dstFile, size):
+    """Copies size bytes between two unbuffered files without holding the whole file in memory"""
+    remaining = size
+    if hasattr(os, "copy_file_range"):
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(srcFile.fileno(), dstFile.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError:
+            pass # e.g. not supported by the file system, continue with plain reads
+    buffer = bytearray(min(remaining, COPY_BUFFER_SIZE))
+    view = memoryview(buffer)
+    while remaining > 0:
+        readSize = srcFile.readinto(view[:min(remaining, len(buffer))])
+        if not readSize:
+            raise EOFError(f"{srcFile.name} is shorter than expected")
+        dstFile.write(view[:readSize])
+        remaining -= readSize
+
+# Saved next to dat_info.json by incremental exports, per file size, mtime and hash of the last export
+MANIFEST_FILENAME = "dat_manifest.json"
+
+def hashFile(filepath) -> str:
+    fileHash = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb', buffering=0) as f:
+        buffer = bytearray(1024 * 1024)
+        view = memoryview(buffer)
+        while readSize := f.readinto(buffer):
+            fileHash.update(view[:readSize])
+    return fileHash.hexdigest()
+
+def loadManifest(manifestPath, export_filepath):
+    """Files of the previous export, empty if the archive has changed since then"""
+    try:
+        with open(manifestPath, 'r') as f:
+            manifest = json.load(f)
+        archiveStat = os.stat(export_filepath)
+    except (OSError, ValueError):
+        return {}
+    archive = manifest.get("archive", {})
+    if archive.get("path") != os.path.abspath(export_filepath) or \
+        archive.get("size") != archiveStat.st_size or archive.get("mtime") != archiveStat.st_mtime_ns:
+        return {}
+    return manifest.get("files", {})
+
+def saveManifest(manifestPath, export_filepath, files):
+    archiveStat = os.stat(export_filepath)
+    with open(manifestPath, 'w') as f:
+        json.dump({
+            "version": 1,
+            "archive": {
+                "path": os.path.abspath(export_filepath),
+                "size": archiveStat.st_size,
+                "mtime": archiveStat.st_mtime_ns
+            },
+            "files": files
+        }, f, indent=4)
+
+def getFileState(filepath, previous):
+    """Returns (size, mtime and hash of the file, whether it's unchanged since the previous export)"""
+    fileStat = os.stat(filepath)
+    state = { "size": fileStat.st_size, "mtime": fileStat.st_mtime_ns }
+    if previous is not None and previous.get("size") == state["size"]:
+        if previous.get("mtime") == state["mtime"]:
+            state["hash"] = previous["hash"]
+            return state, True
+        # rewritten, e.g. by re-exporting the WTP, but maybe with the same content
+        state["hash"] = hashFile(filepath)
+        return state, state["hash"] == previous.get("hash")
+    state["hash"] = hashFile(filepath)
+    return state, False
+
+def main(export_filepath, file_list, incremental=False):
     files = file_list
     fileNumber = len(files)
     from .datHashGenerator import generateHashData
@@ -43,62 +123,102 @@ def main(export_filepath, file_list):
     fileSizesOffset = fileNamesOffset + (fileNumber * nameLength) + 4
     hashMapOffset = fileSizesOffset + (fileNumber * 4)
 
+    # fileSizes
+    fileSizes = []
+    for fp in files:
+        fileSizes.append(os.path.getsize(fp))
+
     #fileOffsets
     fileOffsets = []
     currentOffset = hashMapOffset + hashMapSize
-    for fp in files:
+    for fileSize in fileSizes:
         currentOffset = (math.ceil(currentOffset / 16)) * 16
         fileOffsets.append(currentOffset)
-        currentOffset += os.path.getsize(fp)
-
-    # fileSizes
-    fileSizes = []
-    for fp in files:
-        fileSizes.append(os.path.getsize(fp))
+        currentOffset += fileSize
 
-    # WRITE
-        # Header
-    dat_file = open(export_filepath, 'wb')
-    write_string(dat_file, fileID)
-    write_Int32(dat_file, fileNumber)
-    write_Int32(dat_file, fileOffsetsOffset)
-    write_Int32(dat_file, fileExtensionsOffset)
-    write_Int32(dat_file, fileNamesOffset)
-    write_Int32(dat_file, fileSizesOffset)
-    write_Int32(dat_file, hashMapOffset)
-    write_buffer(dat_file, 4)
+    # Header and all tables are built in memory and written at once
+    header = bytearray()
+    header += fileID.encode('utf-8') + b'\x00'
+    header += struct.pack('<6i', fileNumber, fileOffsetsOffset, fileExtensionsOffset, fileNamesOffset, fileSizesOffset, hashMapOffset)
+    header += bytes(4)
 
         # fileOffsets
-    for value in fileOffsets:
-        write_Int32(dat_file, value)
+    header += struct.pack(f'<{fileNumber}i', *fileOffsets)
 
         # fileExtensions
     for value in fileExtensions:
-        write_string(dat_file, value)
+        header += value.encode('utf-8') + b'\x00'
 
         # nameLength
-    write_Int32(dat_file, nameLength)
+    header += struct.pack('<i', nameLength)
 
         # fileNames
     for value in fileNames:
-        write_string(dat_file, value)
-        if len(value) < nameLength:
-            write_buffer(dat_file, nameLength - len(value) - 1)
+        header += value.encode('utf-8').ljust(nameLength, b'\x00')
 
         # fileSizes
-    for value in fileSizes:
-        write_Int32(dat_file, value)
+    header += struct.pack(f'<{fileNumber}i', *fileSizes)
 
         # hashMap
-    hashData.write(dat_file)
-
-        # Files
-    for i, fp in enumerate(files):
-        dat_file.seek(fileOffsets[i])
-        fileData = open(fp, 'rb')
-        fileContent = fileData.read()
-        dat_file.write(fileContent)
-        fileData.close()
-
-    dat_file.close()
-    print('DAT/DTT Export Complete. :>')
\ No newline at end of file
+    header += hashData.toBytes()
+
+    # (path, offset) to copy each file from, unchanged files come from the previous archive
+    sources = [(fp, 0) for fp in files]
+    # the manifest lives next to the files, an empty archive is simply written again
+    incremental = incremental and fileNumber > 0
+    if incremental:
+        manifestPath = os.path.join(os.path.dirname(files[0]), MANIFEST_FILENAME)
+        previousFiles = loadManifest(manifestPath, export_filepath)
+        oldArchive = None
+        if previousFiles:
+            try:
+                oldArchive = DatArchive(export_filepath)
+            except ValueError:
+                previousFiles = {}
+        fileStates = {}
+        reusedCount = 0
+        for i, fp in enumerate(files):
+            state, unchanged = getFileState(fp, previousFiles.get(fileNames[i]))
+            fileStates[fileNames[i]] = state
+            if unchanged and oldArchive is not None:
+                oldIndex = oldArchive.indexOf(fileNames[i])
+                if oldIndex != -1 and oldArchive.sizes[oldIndex] == state["size"]:
+                    sources[i] = (export_filepath, oldArchive.offsets[oldIndex])
+                    reusedCount += 1
+        if oldArchive is not None:
+            # same tables means the same offsets, so the archive would be written exactly as it is
+            isUnchanged = reusedCount == fileNumber and \
+                len(oldArchive.data) == fileOffsets[-1] + fileSizes[-1] and \
+                oldArchive.data[:len(header)] == header
+            oldArchive.close()
+            if isUnchanged:
+                saveManifest(manifestPath, export_filepath, fileStates)
+                print('DAT/DTT unchanged, skipped writing', export_filepath)
+                return
+        print(f'Reusing {reusedCount} of {fileNumber} files from the previous DAT/DTT')
+
+    # WRITE
+    # into a temporary file first, the previous archive stays intact (and readable) until it is replaced
+    tmpFilepath = export_filepath + '.tmp'
+    try:
+        with open(tmpFilepath, 'wb', buffering=0) as dat_file:
+            dat_file.write(header)
+            currentOffset = len(header)
+
+                # Files
+            for i, (sourcePath, sourceOffset) in enumerate(sources):
+                dat_file.write(bytes(fileOffsets[i] - currentOffset))
+                with open(sourcePath, 'rb', buffering=0) as fileData:
+                    fileData.seek(sourceOffset)
+                    copyFileData(fileData, dat_file, fileSizes[i])
+                currentOffset = fileOffsets[i] + fileSizes[i]
+        os.replace(tmpFilepath, export_filepath)
+    except BaseException:
+        if os.path.exists(tmpFilepath):
+            os.remove(tmpFilepath)
+        raise
+
+    if incremental:
+        saveManifest(manifestPath, export_filepath, fileStates)
+
+    print('DAT/DTT Export Complete. :>')
@@ -0,0 +1,115 @@
+# Headless bulk DAT/DTT extractor, doesn't import bpy so it can run from a plain Python install.
+# Archives are extracted in parallel by a process pool, already extracted archives are skipped.
+#
+# Usage:
+# python bulkExtract.py your_game_data_dir your_extract_dir [--workers N] [--force]
+from __future__ import annotations
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import time
+from typing import List, Tuple
+
+try:
+    from .datArchive import DatArchive, saveDatInfo
+except ImportError: # run as a script
+    from datArchive import DatArchive, saveDatInfo
+
+# same as consts.DAT_EXTENSIONS plus .dtt, consts isn't importable when run as a script
+ARCHIVE_EXTENSIONS = (".dat", ".dtt", ".evn", ".eff")
+# largest slice of the mapping written at once
+CHUNK_SIZE = 1024 * 1024
+
+def findArchives(rootDir: str) -> List[str]:
+    archives = []
+    for dirpath, dirnames, filenames in os.walk(rootDir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in ARCHIVE_EXTENSIONS:
+                archives.append(os.path.join(dirpath, filename))
+    return archives
+
+def isUpToDate(outPath: str, size: int, mtime: int) -> bool:
+    try:
+        stat = os.stat(outPath)
+    except OSError:
+        return False
+    return stat.st_size == size and stat.st_mtime_ns == mtime
+
+def writeChunked(outPath: str, data: memoryview):
+    with open(outPath, "wb") as outFile:
+        for start in range(0, len(data), CHUNK_SIZE):
+            outFile.write(data[start : start + CHUNK_SIZE])
+
+def extractArchive(archivePath: str, outDir: str, force: bool = False) -> Tuple[int, int, int]:
+    """
+    Extracts one archive to outDir. Extracted files get the archive's mtime, so that
+    files matching in size and mtime are known to be up to date and skipped.
+    Returns (extracted files, extracted bytes, skipped files).
+    """
+    archiveMtime = os.stat(archivePath).st_mtime_ns
+    extractedFiles = 0
+    extractedBytes = 0
+    skippedFiles = 0
+    with DatArchive(archivePath) as archive:
+        os.makedirs(outDir, exist_ok=True)
+        for index in range(archive.fileCount):
+            outPath = os.path.join(outDir, archive.names[index])
+            size = archive.sizes[index]
+            if not force and isUpToDate(outPath, size, archiveMtime):
+                skippedFiles += 1
+                continue
+            writeChunked(outPath, archive.getData(index))
+            os.utime(outPath, ns=(archiveMtime, archiveMtime))
+            extractedFiles += 1
+            extractedBytes += size
+        if extractedFiles > 0 or not os.path.exists(os.path.join(outDir, "dat_info.json")):
+            saveDatInfo(os.path.join(outDir, "dat_info.json"), archive.names, os.path.basename(archivePath))
+    return extractedFiles, extractedBytes, skippedFiles
+
+def main(rootDir: str, extractDir: str, workers: int = None, force: bool = False) -> bool:
+    archives = findArchives(rootDir)
+    print(f"[+] Found {len(archives)} archives in {rootDir}")
+
+    startTime = time()
+    totalFiles = 0
+    totalBytes = 0
+    skippedArchives = 0
+    failedArchives = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(extractArchive, archivePath, os.path.join(extractDir, os.path.relpath(archivePath, rootDir)), force): archivePath
+            for archivePath in archives
+        }
+        for doneCount, future in enumerate(as_completed(futures), 1):
+            archivePath = futures[future]
+            try:
+                extractedFiles, extractedBytes, skippedFiles = future.result()
+            except Exception as e:
+                failedArchives += 1
+                print(f"[-] {doneCount}/{len(archives)} Failed to extract {archivePath}: {e}")
+                continue
+            if extractedFiles == 0:
+                skippedArchives += 1
+                continue
+            totalFiles += extractedFiles
+            totalBytes += extractedBytes
+            print(f"[+] {doneCount}/{len(archives)} {extractedFiles} files extracted from {archivePath}")
+
+    duration = max(time() - startTime, 1e-6)
+    print(
+        f"[+] Extracted {totalFiles} files ({totalBytes / 1024**2:.1f} MB) in {duration:.1f}s, "
+        f"{totalBytes / 1024**2 / duration:.1f} MB/s, {totalFiles / duration:.1f} files/s"
+    )
+    print(f"[+] {skippedArchives} archives already up to date, {failedArchives} failed")
+    return failedArchives == 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extract all DAT/DTT archives in a folder")
+    parser.add_argument("dat_dir", help="folder that is searched recursively for archives")
+    parser.add_argument("extract_dir", help="output folder, mirrors the folder structure of dat_dir")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, defaults to the CPU count")
+    parser.add_argument("--force", action="store_true", help="re-extract files that are already up to date")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.dat_dir, args.extract_dir, args.workers, args.force) else 1)
@@ -0,0 +1,237 @@
+# Memory-mapped DAT/DTT reader, has no Blender dependency so it also works in plain Python
+import io
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, List, Optional, Union
+
+DAT_MAGIC = b'DAT\x00'
+
+def datNameHash(name: str) -> int:
+    """Hash the DAT hash map stores for a file name"""
+    # the game only uses ASCII names, others can't be in the hash map and are left to the name lookup
+    return zlib.crc32(name.lower().encode('ascii', errors='replace')) & 0x7FFFFFFF
+
+def getFileSortingKey(file: str):
+    base, ext = os.path.splitext(file)
+    return (base.lower(), ext.lower())
+
+def saveDatInfo(filepath: str, files: List[str], filename: str):
+    files = list(set(files))
+    files.sort(key=getFileSortingKey)
+    base, ext = os.path.splitext(filename)
+    with open(filepath, 'w') as f:
+        jsonFiles = {
+            "version": 1,
+            "files": files,
+            "basename": base,
+            "ext": ext[1:]
+        }
+        json.dump(jsonFiles, f, indent=4)
+
+class DatMemberFile(io.RawIOBase):
+    """
+    Read-only, seekable file object over one file of a DatArchive.
+    Parsers can use it like a file opened with open(path, "rb"),
+    name is the path the file would have when extracted.
+    """
+    def __init__(self, data: memoryview, name: str):
+        super().__init__()
+        self.data = data
+        self.name = name
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.pos
+        end = len(self.data) if size is None or size < 0 else min(start + size, len(self.data))
+        if end <= start:
+            return b''
+        self.pos = end
+        return bytes(self.data[start:end])
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy view of the whole file, like BytesIO.getbuffer()"""
+        return self.data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.data)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self.pos = offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self):
+        # the archive owns the mapping, only drop our view of it
+        super().close()
+        self.data = memoryview(b'')
+
+class DatArchive:
+    """
+    DAT/DTT container backed by an mmap. All tables are parsed once when
+    opening, file contents are served as zero-copy memoryview slices.
+    """
+    filepath: str
+    fileCount: int
+    offsets: List[int]
+    sizes: List[int]
+    extensions: List[str]
+    names: List[str]
+    # hash map, same layout as datHashGenerator.HashData
+    preHashShift: int
+    bucketOffsets: List[int]
+    hashes: List[int]
+    fileIndices: List[int]
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.file = open(filepath, 'rb')
+        self.buffer = b''
+        if os.fstat(self.file.fileno()).st_size > 0:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.buffer)
+        try:
+            self.parseTables()
+        except:
+            self.close()
+            raise
+
+    def parseTables(self):
+        buffer = self.buffer
+        if len(buffer) < 28 or buffer[:4] != DAT_MAGIC:
+            raise ValueError(f"{self.filepath} is not a DAT/DTT file (magic {bytes(buffer[:4])})")
+        self.fileCount, \
+        self.fileTableOffset, \
+        self.extensionTableOffset, \
+        self.nameTableOffset, \
+        self.sizeTableOffset, \
+        self.hashMapOffset = struct.unpack_from('<6i', buffer, 4)
+        count = self.fileCount
+
+        self.offsets = list(struct.unpack_from(f'<{count}I', buffer, self.fileTableOffset))
+        self.sizes = list(struct.unpack_from(f'<{count}I', buffer, self.sizeTableOffset))
+        extensions = buffer[self.extensionTableOffset : self.extensionTableOffset + count * 4]
+        self.extensions = [
+            extensions[i * 4 : i * 4 + 4].split(b'\x00')[0].decode('utf-8')
+            for i in range(count)
+        ]
+        self.nameLength = 0
+        self.names = []
+        if count > 0:
+            self.nameLength = struct.unpack_from('<i', buffer, self.nameTableOffset)[0]
+            namesStart = self.nameTableOffset + 4
+            names = buffer[namesStart : namesStart + count * self.nameLength]
+            self.names = [
+                names[i * self.nameLength : (i + 1) * self.nameLength].split(b'\x00')[0].decode('ascii')
+                for i in range(count)
+            ]
+
+        self.preHashShift = 0
+        self.bucketOffsets = []
+        self.hashes = []
+        self.fileIndices = []
+        self.hashLookup: Dict[int, List[int]] = {}
+        if self.hashMapOffset > 0 and count > 0:
+            self.preHashShift, bucketOffsetsOffset, hashesOffset, fileIndicesOffset = \
+                struct.unpack_from('<4I', buffer, self.hashMapOffset)
+            bucketCount = (hashesOffset - bucketOffsetsOffset) // 2
+            self.bucketOffsets = list(struct.unpack_from(f'<{bucketCount}h', buffer, self.hashMapOffset + bucketOffsetsOffset))
+            self.hashes = list(struct.unpack_from(f'<{count}I', buffer, self.hashMapOffset + hashesOffset))
+            self.fileIndices = list(struct.unpack_from(f'<{count}h', buffer, self.hashMapOffset + fileIndicesOffset))
+            for hash, fileIndex in zip(self.hashes, self.fileIndices):
+                self.hashLookup.setdefault(hash, []).append(fileIndex)
+        # archives without a usable hash map still get O(1) lookups
+        self.nameLookup: Dict[str, int] = {}
+        for index, name in enumerate(self.names):
+            self.nameLookup.setdefault(name.lower(), index)
+
+    def __len__(self) -> int:
+        return self.fileCount
+
+    def __contains__(self, name: str) -> bool:
+        return self.indexOf(name) != -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.data is not None:
+            self.data.release()
+            self.data = None
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass # getData() slices still alive, the mapping goes away with them
+        self.buffer = b''
+        self.file.close()
+
+    def indexOf(self, name: str) -> int:
+        """Index of a file by name (case insensitive), -1 if the archive doesn't contain it"""
+        lowerName = name.lower()
+        for fileIndex in self.hashLookup.get(datNameHash(name), ()):
+            if 0 <= fileIndex < self.fileCount and self.names[fileIndex].lower() == lowerName:
+                return fileIndex
+        return self.nameLookup.get(lowerName, -1)
+
+    def resolveIndex(self, nameOrIndex: Union[str, int]) -> int:
+        if isinstance(nameOrIndex, str):
+            index = self.indexOf(nameOrIndex)
+            if index == -1:
+                raise KeyError(f"{nameOrIndex} not in {self.filepath}")
+            return index
+        return nameOrIndex
+
+    def getData(self, nameOrIndex: Union[str, int]) -> memoryview:
+        """Contents of a file as a memoryview into the mapping, valid until close()"""
+        index = self.resolveIndex(nameOrIndex)
+        offset = self.offsets[index]
+        return self.data[offset : offset + self.sizes[index]]
+
+    def open(self, nameOrIndex: Union[str, int], extractDir: str = "") -> DatMemberFile:
+        """File object for a file in the archive, name is its path inside extractDir"""
+        index = self.resolveIndex(nameOrIndex)
+        return DatMemberFile(self.getData(index), os.path.join(extractDir, self.names[index]))
+
+    def find(self, extension: str) -> Optional[str]:
+        """Name of the first file with this extension"""
+        extension = extension.lstrip('.').lower()
+        for name, fileExtension in zip(self.names, self.extensions):
+            if fileExtension.lower() == extension:
+                return name
+        return None
+
+    def extractFile(self, nameOrIndex: Union[str, int], extractDir: str) -> str:
+        index = self.resolveIndex(nameOrIndex)
+        os.makedirs(extractDir, exist_ok=True)
+        outPath = os.path.join(extractDir, self.names[index])
+        with open(outPath, 'wb') as outFile:
+            outFile.write(self.getData(index))
+        return outPath
+
+    def extractAll(self, extractDir: str) -> List[str]:
+        return [self.extractFile(index, extractDir) for index in range(self.fileCount)]
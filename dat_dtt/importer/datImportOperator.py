@@ -1,4 +1,5 @@
 import os
+from contextlib import ExitStack
 
 import bpy
 from bpy.props import StringProperty
@@ -12,85 +13,119 @@ from ...col.exporter.col_ui_manager import enableCollisionTools
 from ...utils.visibilitySwitcher import enableVisibilitySelector
 from ...utils.util import setExportFieldsFromImportFile, ShowMessageBox
 
-def importDtt(only_extract, filepath):
+def openArchiveFile(archive, extract_dir, name):
+    """File object for a file in the archive, None if the archive doesn't contain it"""
+    if archive is None or name not in archive:
+        return None
+    return archive.open(name, extract_dir)
+
+def importDtt(only_extract, filepath, write_materials_json=True, extract_files=True, share_textures=False):
     head = os.path.split(filepath)[0]
     tail = os.path.split(filepath)[1]
     tailless_tail = tail[:-4]
     dat_filepath = os.path.join(head, tailless_tail + '.dat')
     extract_dir = os.path.join(head, 'nier2blender_extracted')
-    from . import dat_unpacker
-    if os.path.isfile(dat_filepath):
-        alt_filename = dat_unpacker.main(dat_filepath, os.path.join(extract_dir, tailless_tail + '.dat'), dat_filepath)   # dat
-    else:
-        print('DAT not found. Only extracting DTT. (No materials, collisions or layouts will automatically be imported)')
-    
-    last_filename = dat_unpacker.main(filepath, os.path.join(extract_dir, tailless_tail + '.dtt'), filepath)       # dtt
-    if last_filename == False: # empty dtt
-        last_filename = alt_filename[:10]
-        # cheating but this is already an error case
-        # (two chars prefix, four chars ID, four chars filetype/discard)
-    
-    # try a bunch of methods of finding the filepath
-    wmb_filepath = os.path.join(extract_dir, tailless_tail + '.dtt', last_filename[:-4] + '.wmb')
-    if not os.path.exists(wmb_filepath): # if not in dtt, then must be in dat
-        wmb_filepath = os.path.join(extract_dir, tailless_tail + '.dat', last_filename[:-4] + '.wmb')
-    if not os.path.exists(wmb_filepath): # try looking based on the dat name
-        wmb_filepath = os.path.join(extract_dir, tailless_tail + '.dat', tailless_tail + '.wmb')
-    # if not in dat, must be an scr
-    scr_mode = False
-    if not os.path.exists(wmb_filepath):
-        scr_mode = True
-        print("Could not find WMB at %s, switching to SCR" % wmb_filepath)
-        scr_filepath = os.path.join(extract_dir, tailless_tail + '.dat', last_filename[:-4].split("scr")[0] + '.scr')
-        if not os.path.exists(scr_filepath): # try based on the dat name
-            scr_filepath = os.path.join(extract_dir, tailless_tail + '.dat', tailless_tail + '.scr')
-        if not os.path.exists(scr_filepath):
-            print("Could not find model file in DAT! Please import WMB manually.")
-            ShowMessageBox("Could not find model file in DAT! Please import WMB manually.", "No Model Found", "ERROR")
-            only_extract = True
-
-    # WTA/WTP
-    wtaPath = os.path.join(extract_dir, tailless_tail + '.dat', tailless_tail + '.wta')
-    wtpPath = os.path.join(extract_dir, tailless_tail + '.dtt', tailless_tail + '.wtp')
-    if os.path.isfile(wtaPath) and os.path.isfile(wtpPath):
-        texturesExtractDir = os.path.join(extract_dir, tailless_tail + '.dtt', "textures")
-        from ...wta_wtp.importer import wtpImportOperator
-        wtpImportOperator.extractFromWta(wtaPath, wtpPath, texturesExtractDir)
-
+    dat_extract_dir = os.path.join(extract_dir, tailless_tail + '.dat')
+    dtt_extract_dir = os.path.join(extract_dir, tailless_tail + '.dtt')
     if only_extract:
-        return {'FINISHED'}
+        extract_files = True
+    from . import dat_unpacker
+    with ExitStack() as archives:
+        # files are parsed straight from the archive mappings, extracting them is optional
+        dat_archive = None
+        if os.path.isfile(dat_filepath):
+            dat_archive = dat_unpacker.openArchive(dat_filepath)
+            if dat_archive is not None:
+                archives.enter_context(dat_archive)
+        else:
+            print('DAT not found. Only extracting DTT. (No materials, collisions or layouts will automatically be imported)')
+        dtt_archive = dat_unpacker.openArchive(filepath)
+        if dtt_archive is not None:
+            archives.enter_context(dtt_archive)
+
+        if extract_files:
+            if dat_archive is not None:
+                dat_unpacker.unpack(dat_archive, dat_extract_dir, dat_filepath)   # dat
+            if dtt_archive is not None:
+                dat_unpacker.unpack(dtt_archive, dtt_extract_dir, filepath)       # dtt
+
+        if dtt_archive is not None and len(dtt_archive) > 0:
+            last_filename = dtt_archive.names[-1]
+        elif dat_archive is not None and len(dat_archive) > 0: # empty dtt
+            last_filename = dat_archive.names[-1][:10]
+            # cheating but this is already an error case
+            # (two chars prefix, four chars ID, four chars filetype/discard)
+        else:
+            last_filename = tail
+
+        # try a bunch of methods of finding the file
+        wmb_file = openArchiveFile(dtt_archive, dtt_extract_dir, last_filename[:-4] + '.wmb')
+        if wmb_file is None: # if not in dtt, then must be in dat
+            wmb_file = openArchiveFile(dat_archive, dat_extract_dir, last_filename[:-4] + '.wmb')
+        if wmb_file is None: # try looking based on the dat name
+            wmb_file = openArchiveFile(dat_archive, dat_extract_dir, tailless_tail + '.wmb')
+        # if not in dat, must be an scr
+        scr_mode = False
+        if wmb_file is None:
+            scr_mode = True
+            print("Could not find WMB for %s, switching to SCR" % last_filename)
+            scr_file = openArchiveFile(dat_archive, dat_extract_dir, last_filename[:-4].split("scr")[0] + '.scr')
+            if scr_file is None: # try based on the dat name
+                scr_file = openArchiveFile(dat_archive, dat_extract_dir, tailless_tail + '.scr')
+            if scr_file is None:
+                print("Could not find model file in DAT! Please import WMB manually.")
+                ShowMessageBox("Could not find model file in DAT! Please import WMB manually.", "No Model Found", "ERROR")
+                only_extract = True
+
+        # WTA/WTP
+        wta_file = openArchiveFile(dat_archive, dat_extract_dir, tailless_tail + '.wta')
+        wtp_file = openArchiveFile(dtt_archive, dtt_extract_dir, tailless_tail + '.wtp')
+        if wta_file is not None and wtp_file is not None:
+            texturesExtractDir = os.path.join(dtt_extract_dir, "textures")
+            from ...wta_wtp.importer import wtpImportOperator
+            from ...wta_wtp.importer.textureStore import TextureStore
+            store = TextureStore.forExtractDir(extract_dir) if share_textures else None
+            wtpImportOperator.extractFromWta(wta_file, wtp_file, texturesExtractDir, store)
+            if store is not None:
+                store.prune()
+            # read to the end, the WMB importer parses them again
+            wta_file.seek(0)
+            wtp_file.seek(0)
+
+        if only_extract:
+            return {'FINISHED'}
 
-    setExportFieldsFromImportFile(filepath, True)
-    enableVisibilitySelector()
-
-    # SCR
-    #def execute(self, context):
-    #    if self.filepath.lower().endswith('.scr'):
-    #        return scr_importer.main(self.filepath)
-    #    else:
-    #        return importDtt(self.only_extract, self.filepath)
-    
-    # SCR but new and improved
-    if scr_mode:
-        from ...scr.importer import scr_importer
-        scr_importer.ImportSCR.main(scr_filepath, False)
-    else:
-        # WMB
-        from ...wmb.importer import wmb_importer
-        wmb_importer.main(only_extract, wmb_filepath)
+        setExportFieldsFromImportFile(filepath, True)
+        enableVisibilitySelector()
+
+        # SCR
+        #def execute(self, context):
+        #    if self.filepath.lower().endswith('.scr'):
+        #        return scr_importer.main(self.filepath)
+        #    else:
+        #        return importDtt(self.only_extract, self.filepath)
+        
+        # SCR but new and improved
+        if scr_mode:
+            from ...scr.importer import scr_importer
+            scr_importer.ImportSCR.main(scr_file, False)
+        else:
+            # WMB
+            from ...wmb.importer import wmb_importer
+            wmb_importer.main(only_extract, wmb_file, write_materials_json=write_materials_json, wta_file=wta_file, wtp_file=wtp_file)
 
-    # COL
-    col_filepath = os.path.join(extract_dir, tailless_tail + '.dat', tailless_tail + '.col')
-    if os.path.isfile(col_filepath):
-        from ...col.importer import col_importer
-        col_importer.main(col_filepath)
-        enableCollisionTools()
+        # COL
+        col_file = openArchiveFile(dat_archive, dat_extract_dir, tailless_tail + '.col')
+        if col_file is not None:
+            from ...col.importer import col_importer
+            col_importer.main(col_file)
+            enableCollisionTools()
 
-    # LAY
-    lay_filepath = os.path.join(extract_dir, tailless_tail + '.dat', 'Layout.lay')
-    if os.path.isfile(lay_filepath):
-        from ...lay.importer import lay_importer
-        lay_importer.main(lay_filepath)
+        # LAY
+        lay_file = openArchiveFile(dat_archive, dat_extract_dir, 'Layout.lay')
+        if lay_file is not None:
+            from ...lay.importer import lay_importer
+            lay_importer.main(lay_file)
 
     return {'FINISHED'}
 
@@ -105,6 +140,9 @@ class ImportNierDtt(bpy.types.Operator, ImportHelper):
     reset_blend: bpy.props.BoolProperty(name="Reset Blender Scene on Import", default=True)
     bulk_import: bpy.props.BoolProperty(name="Bulk Import All DTT/DATs In Folder (Experimental)", default=False)
     only_extract: bpy.props.BoolProperty(name="Only Extract DTT/DAT Contents. (Experimental)", default=False)
+    write_materials_json: bpy.props.BoolProperty(name="Write materials.json", description="Save material info of imported WMBs to materials.json next to the extracted files", default=True)
+    extract_files: bpy.props.BoolProperty(name="Extract DTT/DAT Contents To Disk", description="Write the DTT/DAT contents to nier2blender_extracted (needed for repacking). When disabled, files are read directly from the archives", default=True)
+    share_textures: bpy.props.BoolProperty(name="Share Extracted Textures", description="Hardlink identical DDS files of all archives extracted to the same nier2blender_extracted folder to one copy in its texture_store. Saves disk space, but the extracted DDS files are read-only", default=False)
 
     def execute(self, context):
         print("Unpacking", self.filepath)
@@ -117,13 +155,13 @@ class ImportNierDtt(bpy.types.Operator, ImportHelper):
                 if filename[-4:] == '.dtt':
                     try:
                         filepath = os.path.join(folder, filename)
-                        importDtt(self.only_extract, filepath)
+                        importDtt(self.only_extract, filepath, self.write_materials_json, self.extract_files, self.share_textures)
                     except:
                         print('ERROR: FAILED TO IMPORT', filename)
             return {'FINISHED'}
 
         else:
-            return importDtt(self.only_extract, self.filepath)
+            return importDtt(self.only_extract, self.filepath, self.write_materials_json, self.extract_files, self.share_textures)
 
 class ImportNierDat(bpy.types.Operator, ImportHelper):
     '''Load a Nier:Automata DAT File.'''
@@ -136,6 +174,7 @@ class ImportNierDat(bpy.types.Operator, ImportHelper):
     reset_blend: bpy.props.BoolProperty(name="Reset Blender Scene on Import", default=True)
     bulk_import: bpy.props.BoolProperty(name="Bulk Import All DTT/DATs In Folder (Experimental)", default=False)
     only_extract: bpy.props.BoolProperty(name="Only Extract DTT/DAT Contents. (Experimental)", default=False)
+    extract_files: bpy.props.BoolProperty(name="Extract DAT Contents To Disk", description="Write the DAT contents to nier2blender_extracted (needed for repacking). When disabled, files are read directly from the archive", default=True)
 
     def doImport(self, onlyExtract, filepath):
         head = os.path.split(filepath)[0]
@@ -144,27 +183,34 @@ class ImportNierDat(bpy.types.Operator, ImportHelper):
         tailless_tail = tail[:-4]
         dat_filepath = os.path.join(head, tailless_tail + ext)
         extract_dir = os.path.join(head, 'nier2blender_extracted')
+        dat_extract_dir = os.path.join(extract_dir, tailless_tail + ext)
         from . import dat_unpacker
-        if os.path.isfile(dat_filepath):
-            dat_unpacker.main(dat_filepath, os.path.join(extract_dir, tailless_tail + ext), dat_filepath)   # dat
-
-        if onlyExtract:
+        if not os.path.isfile(dat_filepath):
             return {'FINISHED'}
-
-        setExportFieldsFromImportFile(filepath, True)
-
-        # COL
-        col_filepath = os.path.join(extract_dir, tailless_tail + '.dat', tailless_tail + '.col')
-        if os.path.isfile(col_filepath):
-            from ...col.importer import col_importer
-            col_importer.main(col_filepath)
-            enableCollisionTools()
-
-        # LAY
-        lay_filepath = os.path.join(extract_dir, tailless_tail + '.dat', 'Layout.lay')
-        if os.path.isfile(lay_filepath):
-            from ...lay.importer import lay_importer
-            lay_importer.main(lay_filepath)
+        dat_archive = dat_unpacker.openArchive(dat_filepath)
+        if dat_archive is None:
+            return {'FINISHED'}
+        with dat_archive:
+            if onlyExtract or self.extract_files:
+                dat_unpacker.unpack(dat_archive, dat_extract_dir, dat_filepath)   # dat
+
+            if onlyExtract:
+                return {'FINISHED'}
+
+            setExportFieldsFromImportFile(filepath, True)
+
+            # COL
+            col_file = openArchiveFile(dat_archive, dat_extract_dir, tailless_tail + '.col')
+            if col_file is not None:
+                from ...col.importer import col_importer
+                col_importer.main(col_file)
+                enableCollisionTools()
+
+            # LAY
+            lay_file = openArchiveFile(dat_archive, dat_extract_dir, 'Layout.lay')
+            if lay_file is not None:
+                from ...lay.importer import lay_importer
+                lay_importer.main(lay_file)
 
         return {'FINISHED'}
 
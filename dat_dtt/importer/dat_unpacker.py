@@ -2,156 +2,41 @@
 import os
 import sys
 
-from ...utils.util import saveDatInfo
-from ...utils.ioUtils import read_int32, read_uint32, read_uint16
+from .datArchive import DatArchive, saveDatInfo
 
 
 def create_dir(dirpath):
     if not os.path.exists(dirpath):
         os.makedirs(dirpath)
 
-def read_header(fp):
-    Magic = fp.read(4)
-    if list(Magic) == [68, 65, 84, 0]:
-        FileCount = read_int32(fp)
-        FileTableOffset = read_int32(fp)
-        ExtensionTableOffset = read_int32(fp)
-        NameTableOffset = read_int32(fp)
-        SizeTableOffset = read_int32(fp)
-        hashMapOffset = read_int32(fp)
-#         print(
-# '''FileCount: %08x
-# FileTableOffset: %08x
-# ExtensionTableOffset:%08x
-# NameTableOffset:%08x
-# SizeTableOffset:%08x
-# hashMapOffset:%08x
-# '''%
-#             (FileCount, FileTableOffset, ExtensionTableOffset,NameTableOffset,SizeTableOffset,hashMapOffset)
-#         )
-        return (FileCount, FileTableOffset, ExtensionTableOffset,NameTableOffset,SizeTableOffset,hashMapOffset)
-    else:
+def openArchive(filename):
+    try:
+        return DatArchive(filename)
+    except ValueError:
         print('[-] error magic number detected')
-        return False
-
-def get_fileinfo(fp, index, FileTableOffset, ExtensionTableOffset, NameTableOffset, SizeTableOffset):
-    fp.seek(FileTableOffset + index * 4)
-    FileOffset = read_int32(fp)
-    fp.seek(ExtensionTableOffset + index * 4)
-    Extension = fp.read(4).decode('utf-8')
-    fp.seek(SizeTableOffset + index * 4)
-    Size = read_int32(fp)
-    fp.seek(NameTableOffset)
-    FilenameAlignment = read_int32(fp)
-    i = 0
-    while i < index:
-        if list(fp.read(FilenameAlignment))[FilenameAlignment-1] == 0:
-            i += 1
-    Filename = fp.read(256).split(b'\x00')[0].decode('ascii')
-#     print(
-# '''
-# FileIndex: %d
-# Filename: %s
-# FileOffset: %08x
-# Size: %08x
-# Extension: %s'''%
-# (index,Filename,FileOffset,Size,Extension)
-#         )
-    return index,Filename,FileOffset,Size,Extension
-
-def extract_file(fp, filename, FileOffset, Size, extract_dir):
-    create_dir(extract_dir)
-    fp.seek(FileOffset)
-    FileContent = fp.read(Size)
-    with open(extract_dir + '/'+filename,'wb') as outfile:
-        # print("extracting file %s to %s/%s"%(filename,extract_dir,filename))
-        outfile.write(FileContent)
-    if filename.find('wtp') > -1 and False:  # Removed due to not needed anymore when using Blender DTT import.
-        wtp_fp = open(extract_dir + '/'+filename,"rb")
-        content = wtp_fp.read(Size)
-        dds_group = content.split(b'DDS ')
-        dds_group = dds_group[1:]
-        for i in range(len(dds_group)):
-            print("unpacking %s to %s/%s"%(filename,extract_dir ,filename.replace('.wtp','_%d.dds'%i)))
-            dds_fp = open(extract_dir + '/'+filename.replace('.wtp','_%d.dds'%i), "wb")
-            dds_fp.write(b'DDS ')
-            dds_fp.write(dds_group[i])
-            dds_fp.close()
-        wtp_fp.close()
-        #os.remove("%s/%s"%(extract_dir,filename))
-    # print("done")
+        return None
 
-def get_all_files(path):
-    pass
-
-def extract_hashes(fp, extract_dir, FileCount, hashMapOffset, fileNamesOffset, filename):
-    create_dir(extract_dir)
+def unpack(archive, extract_dir, ROOT_DIR):
+    filename = archive.filepath
+    if extract_dir != '':
+        extract_dir_sub = os.path.join(extract_dir, filename.replace(ROOT_DIR ,''))
+        archive.extractAll(extract_dir_sub)
+        print(f"[+] {archive.fileCount} files extracted from {filename}")
 
     # file_order.metadata
-    # Filename Size
-    fp.seek(fileNamesOffset)
-    fileNameSize = read_int32(fp)
-
-    # Filenames
-    fileNames = []
-    for i in range(FileCount):
-        fileNames.append(fp.read(fileNameSize))
-
-    # Write filenames to json
-    saveDatInfo(
-        extract_dir + '/dat_info.json',
-        [file.decode('utf-8').rstrip('\x00') for file in fileNames],
-        filename
-    )
-
-    # hash_data.metadata
-    # Header
-    fp.seek(hashMapOffset)
-    preHashShift = read_uint32(fp)
-    bucketOffsetsOffset = read_uint32(fp)
-    hashesOffset = read_uint32(fp)
-    fileIndicesOffset = read_uint32(fp)
-
-    # Bucket Offsets
-    fp.seek(hashMapOffset + bucketOffsetsOffset)
-    bucketOffsets = []
-    while fp.tell() < (hashMapOffset + hashesOffset):
-        bucketOffsets.append(read_uint16(fp))
-
-    # Hashes
-    fp.seek(hashMapOffset + hashesOffset)
-    hashes = []
-    for i in range(FileCount):
-        hashes.append(fp.read(4))
+    create_dir(extract_dir)
+    saveDatInfo(extract_dir + '/dat_info.json', archive.names, os.path.basename(filename))
 
-    # File Indices
-    fp.seek(hashMapOffset + fileIndicesOffset)
-    fileIndices = []
-    for i in range(FileCount):
-        fileIndices.append(read_uint16(fp))
+    if archive.fileCount:
+        return archive.names[-1]
+    return False
 
 def main(filename, extract_dir, ROOT_DIR):
-    with open(filename,"rb") as fp:
-        headers = read_header(fp)
-        if headers:
-            FileCount, FileTableOffset, ExtensionTableOffset,NameTableOffset,SizeTableOffset,hashMapOffset = headers
-
-            extractedFiles = 0
-            for i in range(FileCount):
-                extract_dir_sub = ''
-                index,Filename,FileOffset,Size,Extension = get_fileinfo(fp, i, FileTableOffset,ExtensionTableOffset, NameTableOffset,SizeTableOffset)
-                if extract_dir != '':
-                    extract_dir_sub = os.path.join(extract_dir, filename.replace(ROOT_DIR ,''))
-                    extract_file(fp, Filename, FileOffset, Size, extract_dir_sub)
-                    extractedFiles += 1
-            
-            extract_hashes(fp, extract_dir, FileCount, hashMapOffset, NameTableOffset, os.path.basename(filename))
-            print(f"[+] {extractedFiles} files extracted from {filename}")
-        else:
-            FileCount = 0
-    if (FileCount):
-        return Filename
-    return False
+    archive = openArchive(filename)
+    if archive is None:
+        return False
+    with archive:
+        return unpack(archive, extract_dir, ROOT_DIR)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+"""
+Blender independent parsers and writers of the supported file formats.
+
+Nothing here imports bpy, so it also works in plain Python (batch tools, tests, benchmarks).
+Importing this package is cheap: the format modules (and NumPy) are only loaded
+when one of the names below is first used.
+
+Object model:
+    Binary IO
+        BinaryReader(data, name)    cursor over bytes/memoryview/mmap, BinaryReader.open(path) memory maps a file,
+                                    BinaryReader.fromFile(file) wraps an open file. Typed reads: readUInt32(),
+                                    readArray(count, dtype), readString(), ...
+        BinaryWriter(name)          in-memory little endian writer with reserve()/patch() for forward offsets, save()
+    WMB (NieR:Automata WMB3, MGR:R WMB4)
+        WMBFile(file)               header read on open, everything else parsed on first access:
+                                    wmb_header, boneArray, boneSetArray, boneMap, firstLevel/secondLevel/thirdLevel,
+                                    materialArray, textureArray (WMB4), vertexGroupArray, meshArray,
+                                    meshGroupInfoArray, meshGroupArray (WMB3), batchArray, batchDataArray (WMB4),
+                                    colTreeNodes, unknownWorldDataArray (WMB3, only if present)
+        decodeWmb3Normals, decodeWmb4Normals, encodeWmb3Normals, encodeWmb4Normals
+                                    packed vertex normal codecs, vectorized over NumPy arrays
+    Textures
+        WTA(file)                   texture table: textureCount, wtaTextureOffset, wtaTextureSize, wtaTextureIdentifier,
+                                    getTextureByIndex(index, wtpFile) reads one DDS from the WTP
+        TextureBundle(wta, wtp)     identifier -> (offset, size, flags) over a memory mapped WTP,
+                                    getTexture(identifier) -> memoryview, extract(dir) writes DDS files in parallel
+        TexturePack(identifiers, ddsPaths, albedoIndexes)
+                                    validated DDS headers and WTA tables, writeWta(path), writeWtp(path)
+    Collision and layout
+        Col(file)                   header, nameGroups, meshes (with batches), boneMaps, boneMaps2, meshMaps, colTreeNodes
+        Lay(file)                   header, modelList, assets, instances
+    Archives
+        DatArchive(path)            mmap backed DAT/DTT: names, sizes, offsets, getData(name), open(name) -> DatMemberFile
+        exportDat(path, files)      writes a DAT/DTT from a list of files
+    BXM
+        bxmToXml(path), bxmToXmlFromFile(file) -> xml.etree.ElementTree.Element
+        xmlToBxm(element, path)
+    SCR
+        SCRFile(file)               models (BytesIO per WMB), models_metadata, textures; dump(path) writes it again
+        SCR2File(file)              Bayonetta 2 variant
+
+WMB, COL and LAY writers build their data from Blender scenes and are therefore not part of this package.
+"""
+
+from importlib import import_module
+
+# public name -> (module relative to the addon root, attribute)
+_EXPORTS = {
+    "BinaryReader": ("utils.ioUtils", "BinaryReader"),
+    "BinaryWriter": ("utils.ioUtils", "BinaryWriter"),
+    "WMBFile": ("wmb.importer.wmb", "WMBFile"),
+    "decodeWmb3Normals": ("wmb.normalCodec", "decodeWmb3Normals"),
+    "decodeWmb4Normals": ("wmb.normalCodec", "decodeWmb4Normals"),
+    "encodeWmb3Normals": ("wmb.normalCodec", "encodeWmb3Normals"),
+    "encodeWmb4Normals": ("wmb.normalCodec", "encodeWmb4Normals"),
+    "WTA": ("wta_wtp.importer.wta", "WTA"),
+    "TextureBundle": ("wta_wtp.importer.wta", "TextureBundle"),
+    "TexturePack": ("wta_wtp.exporter.texturePacking", "TexturePack"),
+    "Col": ("col.importer.col", "Col"),
+    "Lay": ("lay.importer.lay", "Lay"),
+    "DatArchive": ("dat_dtt.importer.datArchive", "DatArchive"),
+    "DatMemberFile": ("dat_dtt.importer.datArchive", "DatMemberFile"),
+    "exportDat": ("dat_dtt.exporter.export_dat", "main"),
+    "bxmToXml": ("bxm.common.bxm", "bxmToXml"),
+    "bxmToXmlFromFile": ("bxm.common.bxm", "bxmToXmlFromFile"),
+    "xmlToBxm": ("bxm.common.bxm", "xmlToBxm"),
+    "SCRFile": ("scr.importer.SCRFile", "SCRFile"),
+    "SCR2File": ("scr.importer.SCR2File", "SCR2File"),
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+    moduleName, attribute = _EXPORTS[name]
+    value = getattr(import_module(f"{__package__.rpartition('.')[0]}.{moduleName}"), attribute)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -2,7 +2,7 @@ from __future__ import annotations
 import math
 from time import time
 
-from ...utils.ioUtils import to_string, read_float, read_uint32
+from ...utils.ioUtils import to_string, read_float, read_uint32, open_binary, file_path
 from .lay import Lay
 from ...utils.util import *
 
@@ -10,8 +10,8 @@ from ...utils.util import *
 def main(layFilePath):
     t1 = time()
 
-    with open(layFilePath, "rb") as layFile:
-        print("Parsing Lay file...", layFilePath)
+    with open_binary(layFilePath) as layFile:
+        print("Parsing Lay file...", file_path(layFilePath))
         lay = Lay(layFile)
 
     # Create LAY Collection
@@ -5,12 +5,18 @@ from pathlib import Path
 import shutil
 # Replace the import statement below with the correct path to your WMB importer
 from ...wmb.importer import wmb_importer  # Assuming wmb_importer.py is in root/wmb/importer
+from ...wmb.importer.textureCache import TextureCache
+from ...utils import ioUtils
 
 class ImportSCR:
     def main(file_path, context):
         print('Beginning export')
-        head = os.path.split(file_path)[0]
-        with open(file_path, 'rb') as f:
+        head = os.path.split(ioUtils.file_path(file_path))[0]
+        # sub-models share most of their textures
+        textureCache = TextureCache()
+        with ioUtils.open_binary(file_path) as f:
+            scr_size = f.seek(0, os.SEEK_END)
+            f.seek(0)
             id = f.read(4)
             print('ID read')
             if id != b'SCR\x00':
@@ -36,7 +42,7 @@ class ImportSCR:
             for i in range(num_models):
                 f.seek(model_headers[i][0])
                 if i == num_models - 1:
-                    size = os.path.getsize(file_path) - model_headers[i][0]
+                    size = scr_size - model_headers[i][0]
                 else:
                     size = offsets_models[i+1] - model_headers[i][0]
                 if size > 0:
@@ -55,15 +61,16 @@ class ImportSCR:
                     print('SCR extract completed')
                     if not (context):
                         print('Beginning WMB import')                    
-                        ImportSCR.import_models(file_path, header)  
+                        ImportSCR.import_models(file_path, header, textureCache)  
                         
                 print('SCR extract completed')
                 
+            textureCache.loadInBackground()
             return {'FINISHED'}
 
     @staticmethod
-    def import_models(file_path, scr_header):
-            wmb_importer.main(False, file_path, scr_header)
+    def import_models(file_path, scr_header, textureCache=None):
+            wmb_importer.main(False, file_path, scr_header, texture_cache=textureCache)
 
 def reset_blend():
     #bpy.ops.object.mode_set(mode='OBJECT')
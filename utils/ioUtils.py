@@ -1,52 +1,46 @@
 from __future__ import annotations
+import mmap
+import os
 import struct
+from contextlib import nullcontext
 from typing import Any, List, Tuple
 
+import numpy as np
+
 # Little Endian
 
 def read_int8(file) -> int:
-    entry = file.read(1)
-    return struct.unpack('<b', entry)[0]
+    return read_struct(file, INT8)[0]
 
 def read_uint8(file) -> int:
-    entry = file.read(1)
-    return struct.unpack('B', entry)[0]
+    return read_struct(file, UINT8)[0]
 
 def read_uint8_x4(file) -> Tuple[int]:
-    entry = file.read(4)
-    return struct.unpack('BBBB', entry)
+    return read_struct(file, UINT8_X4)
 
 def read_int16(file) -> int:
-    entry = file.read(2)
-    return struct.unpack('<h', entry)[0]
+    return read_struct(file, INT16)[0]
 
 def read_uint16(file) -> int:
-    entry = file.read(2)
-    return struct.unpack('<H', entry)[0]
+    return read_struct(file, UINT16)[0]
 
 def read_int32(file) -> int:
-    entry = file.read(4)
-    return struct.unpack('<i', entry)[0]
+    return read_struct(file, INT32)[0]
 
 def read_uint32(file) -> int:
-    entry = file.read(4)
-    return struct.unpack('<I', entry)[0]
+    return read_struct(file, UINT32)[0]
 
 def read_int64(file) -> int:
-    entry = file.read(8)
-    return struct.unpack('<q', entry)[0]
+    return read_struct(file, INT64)[0]
 
 def read_uint64(file) -> int:
-    entry = file.read(8)
-    return struct.unpack('<Q', entry)[0]
+    return read_struct(file, UINT64)[0]
 
 def read_float16(file) -> float:
-    entry = file.read(2)
-    return struct.unpack('<e', entry)[0]
+    return read_struct(file, FLOAT16)[0]
 
 def read_float(file) -> float:
-    entry = file.read(4)
-    return struct.unpack('<f', entry)[0]
+    return read_struct(file, FLOAT)[0]
 
 class SmartIO:
     int8 = "b"
@@ -72,6 +66,8 @@ class SmartIO:
         return SmartIO("<" + "".join(formats))
     
     def read(self, file) -> Tuple[Any]:
+        if type(file) is BinaryReader:
+            return file.unpack(self.format, self.count)
         return struct.unpack(self.format, file.read(self.count))
 
     def write(self, file, values: Any):
@@ -80,60 +76,397 @@ class SmartIO:
 def to_uint(bs):
 	return int.from_bytes(bs, byteorder='little', signed=False)
 
+# precompiled, struct.pack would parse the format on every call
+INT8 = struct.Struct('<b')
+UINT8 = struct.Struct('<B')
+UINT8_X4 = struct.Struct('<4B')
+INT16 = struct.Struct('<h')
+UINT16 = struct.Struct('<H')
+INT32 = struct.Struct('<i')
+UINT32 = struct.Struct('<I')
+INT64 = struct.Struct('<q')
+UINT64 = struct.Struct('<Q')
+FLOAT16 = struct.Struct('<e')
+FLOAT = struct.Struct('<f')
+FLOAT_XYZ = struct.Struct('<3f')
+BE_INT32 = struct.Struct('>i')
+BE_INT16 = struct.Struct('>h')
+BE_CHAR = struct.Struct('>c')
+
+def encode_chars(text: str) -> bytes:
+    """One byte per character, multi byte characters are cut to their first byte like write_char does"""
+    if text.isascii():
+        return text.encode('ascii')
+    return b"".join(char.encode('utf-8')[:1] for char in text)
+
+class BinaryWriter(object):
+    """
+    Little endian writer into an in-memory buffer.
+    Has write, seek and tell like a binary file, so it can also be passed to the write_* functions.
+    Seeking past the end and writing fills the gap with zeros, like it does on files.
+    """
+    def __init__(self, name: str = ""):
+        self.buffer = bytearray()
+        self.position = 0
+        self.name = name
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += len(self.buffer)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def write(self, data) -> int:
+        """Writes any bytes like object, e.g. bytes, memoryview or a contiguous NumPy array"""
+        data = memoryview(data)
+        size = data.nbytes
+        if self.position == len(self.buffer):
+            self.buffer += data
+        else:
+            if self.position > len(self.buffer):
+                self.buffer += bytes(self.position - len(self.buffer))
+            self.buffer[self.position : self.position + size] = data
+        self.position += size
+        return size
+
+    def writeStruct(self, packer: struct.Struct, *values):
+        if self.position == len(self.buffer):
+            self.buffer += packer.pack(*values)
+            self.position += packer.size
+        else:
+            self.write(packer.pack(*values))
+
+    def writeInt8(self, value: int):
+        self.writeStruct(INT8, value)
+
+    def writeUInt8(self, value: int):
+        self.writeStruct(UINT8, value)
+
+    def writeInt16(self, value: int):
+        self.writeStruct(INT16, value)
+
+    def writeUInt16(self, value: int):
+        self.writeStruct(UINT16, value)
+
+    def writeInt32(self, value: int):
+        self.writeStruct(INT32, value)
+
+    def writeUInt32(self, value: int):
+        self.writeStruct(UINT32, value)
+
+    def writeInt64(self, value: int):
+        self.writeStruct(INT64, value)
+
+    def writeUInt64(self, value: int):
+        self.writeStruct(UINT64, value)
+
+    def writeFloat16(self, value: float):
+        self.writeStruct(FLOAT16, value)
+
+    def writeFloat(self, value: float):
+        self.writeStruct(FLOAT, value)
+
+    def writeXyz(self, xyz):
+        self.writeStruct(FLOAT_XYZ, *xyz)
+
+    def writeString(self, text: str):
+        """Null terminated, one byte per character"""
+        self.write(encode_chars(text) + b'\x00')
+
+    def writePadding(self, size: int):
+        if size > 0:
+            self.write(bytes(size))
+
+    def align(self, alignment: int, position: int = None):
+        """Pads with zeros until the position (default: current one) is a multiple of alignment"""
+        if position is not None:
+            self.seek(position)
+        self.writePadding(-self.position % alignment)
+
+    def writeArray(self, values, dtype=None):
+        """Writes all values at once, dtype should include the byte order, e.g. '<u4'"""
+        array = np.ascontiguousarray(values, dtype=dtype)
+        self.write(array.reshape(-1).view(np.uint8))
+
+    # forward offsets: reserve now, fill in once the target position is known
+    def reserve(self, packer: struct.Struct = UINT32) -> int:
+        """Writes zeros for a value that is patched later, returns its offset"""
+        offset = self.position
+        self.writePadding(packer.size)
+        return offset
+
+    def patch(self, offset: int, value, packer: struct.Struct = UINT32):
+        """Overwrites an already written value, the position stays where it is"""
+        packer.pack_into(self.buffer, offset, value)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def save(self, filepath: str = None):
+        with open(filepath or self.name, 'wb') as f:
+            f.write(self.buffer)
+
+class BinaryReader(object):
+    """
+    Little endian reader over bytes, a memoryview or an mmap.
+    Has read, seek and tell like a binary file, so it can also be passed to the read_* functions,
+    values are unpacked in place instead of being copied out with read() first.
+    """
+    def __init__(self, data, name: str = "", position: int = 0):
+        self.data = data
+        self.view = memoryview(data)
+        self.size = len(self.view)
+        self.position = position
+        self.name = name
+        self.mapping = None
+        self.file = None
+
+    @staticmethod
+    def open(filepath: str) -> BinaryReader:
+        """Memory maps the file, close() unmaps it again"""
+        file = open(filepath, "rb")
+        try:
+            mapping = None
+            data = b""
+            if os.fstat(file.fileno()).st_size > 0:
+                mapping = data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except:
+            file.close()
+            raise
+        reader = BinaryReader(data, os.fspath(filepath))
+        reader.mapping = mapping
+        reader.file = file
+        return reader
+
+    @staticmethod
+    def load(filepath: str) -> BinaryReader:
+        """Reads the whole file into memory, for readers that stay around after parsing"""
+        with open(filepath, "rb") as f:
+            return BinaryReader(f.read(), os.fspath(filepath))
+
+    @staticmethod
+    def fromFile(file) -> BinaryReader:
+        """
+        Reader over an already open file, starting at its current position.
+        In-memory files (BytesIO, DatMemberFile) are used without copying, others are read completely.
+        """
+        position = file.tell()
+        if hasattr(file, "getbuffer"):
+            data = file.getbuffer()
+        else:
+            file.seek(0)
+            data = file.read()
+            file.seek(position)
+        return BinaryReader(data, getattr(file, "name", ""), position)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.view.release()
+        self.view = memoryview(b"")
+        self.data = b""
+        self.size = 0
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                pass # arrays from readArray() still alive, the mapping goes away with them
+            self.mapping = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def __len__(self) -> int:
+        return self.size
+
+    def getbuffer(self) -> memoryview:
+        return self.view
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.position
+        end = self.size if size is None or size < 0 else min(start + size, self.size)
+        if end <= start:
+            return b""
+        self.position = end
+        return bytes(self.view[start:end])
+
+    def readinto(self, buffer) -> int:
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def readStruct(self, packer: struct.Struct) -> Tuple[Any]:
+        values = packer.unpack_from(self.view, self.position)
+        self.position += packer.size
+        return values
+
+    def unpack(self, format: str, size: int) -> Tuple[Any]:
+        values = struct.unpack_from(format, self.view, self.position)
+        self.position += size
+        return values
+
+    def readInt8(self) -> int:
+        return self.readStruct(INT8)[0]
+
+    def readUInt8(self) -> int:
+        return self.readStruct(UINT8)[0]
+
+    def readInt16(self) -> int:
+        return self.readStruct(INT16)[0]
+
+    def readUInt16(self) -> int:
+        return self.readStruct(UINT16)[0]
+
+    def readInt32(self) -> int:
+        return self.readStruct(INT32)[0]
+
+    def readUInt32(self) -> int:
+        return self.readStruct(UINT32)[0]
+
+    def readInt64(self) -> int:
+        return self.readStruct(INT64)[0]
+
+    def readUInt64(self) -> int:
+        return self.readStruct(UINT64)[0]
+
+    def readFloat16(self) -> float:
+        return self.readStruct(FLOAT16)[0]
+
+    def readFloat(self) -> float:
+        return self.readStruct(FLOAT)[0]
+
+    def readArray(self, count: int, dtype) -> np.ndarray:
+        """
+        count items of dtype (should include the byte order, e.g. '<u4') at once.
+        The array is a read-only view into the data, copy it if it has to outlive the reader.
+        """
+        dtype = np.dtype(dtype)
+        array = np.frombuffer(self.view, dtype, count, self.position)
+        self.position += count * dtype.itemsize
+        return array
+
+    def findNull(self, start: int) -> int:
+        if hasattr(self.data, "find"):
+            return self.data.find(b"\x00", start)
+        # memoryviews can't search, look at growing chunks instead
+        chunkSize = 64
+        while start < self.size:
+            end = min(start + chunkSize, self.size)
+            index = bytes(self.view[start:end]).find(b"\x00")
+            if index != -1:
+                return start + index
+            start = end
+            chunkSize *= 4
+        return -1
+
+    def readString(self) -> str:
+        """Null terminated utf-8 string, the position ends up after the terminator"""
+        end = self.findNull(self.position)
+        if end == -1:
+            raise EOFError(f"Unterminated string at {self.position} in {self.name}")
+        text = bytes(self.view[self.position:end]).decode('utf-8')
+        self.position = end + 1
+        return text
+
+def read_struct(file, packer: struct.Struct) -> Tuple[Any]:
+    if type(file) is BinaryReader:
+        return file.readStruct(packer)
+    return packer.unpack(file.read(packer.size))
+
 def write_char(file, char):
-    entry = struct.pack('<s', bytes(char, 'utf-8'))
-    file.write(entry)
+    file.write(bytes(char, 'utf-8')[:1].ljust(1, b'\x00'))
 
 
 def write_Int32(file, int):
-    entry = struct.pack('<i', int)
-    file.write(entry)
+    file.write(INT32.pack(int))
 
 
 def write_uInt32(file, int):
-    entry = struct.pack('<I', int)
-    file.write(entry)
+    file.write(UINT32.pack(int))
 
 
 def write_Int16(file, int):
-    entry = struct.pack('<h', int)
-    file.write(entry)
+    file.write(INT16.pack(int))
 
 
 def write_uInt16(file, int):
-    entry = struct.pack('<H', int)
-    file.write(entry)
+    file.write(UINT16.pack(int))
 
 
 def write_float(file, float):
-    entry = struct.pack('<f', float)
-    file.write(entry)
+    file.write(FLOAT.pack(float))
 
 
 def write_xyz(file, xyz):
-    for val in xyz:
-        write_float(file, val)
+    values = tuple(xyz)
+    if len(values) == 3:
+        file.write(FLOAT_XYZ.pack(*values))
+    else:
+        file.write(struct.pack(f'<{len(values)}f', *values))
 
 
 def write_buffer(file, size):
-    for i in range(size):
-        write_char(file, '')
+    if size > 0:
+        file.write(bytes(size))
 
 
 def write_byte(file, val):
-    entry = struct.pack('B', val)
-    file.write(entry)
+    file.write(UINT8.pack(val))
 
 
 def write_float16(file, val):
-    entry = struct.pack("<e", val)
-    file.write(entry)
+    file.write(FLOAT16.pack(val))
+
+# Files
+
+def open_binary(file):
+    """
+    BinaryReader over a path (memory mapped) or an already open file (e.g. from a DatArchive).
+    Only files opened here are closed again.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        return BinaryReader.open(file)
+    return nullcontext(BinaryReader.fromFile(file))
+
+def file_path(file) -> str:
+    """Path of a file given either as a path or as an open file"""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    return file.name
 
 # WMB
 
 def create_wmb(filepath):
+    """The WMB is assembled in memory and written to filepath by close_wmb"""
     print('Creating wmb file: ', filepath)
-    wmb_file = open(filepath, 'wb')
+    wmb_file = BinaryWriter(filepath)
     return wmb_file
 
 
@@ -143,8 +476,7 @@ def close_wmb(wmb_file, generated_data):
     else:
         wmb_file.seek(0, 2)
     write_string(wmb_file, 'WMB created with Blender2NieR v0.(who knows) by Woeful_Wolf and Space Core')
-    wmb_file.flush()
-    wmb_file.close()
+    wmb_file.save()
 
 # String
 
@@ -152,6 +484,8 @@ def to_string(bs, encoding = 'utf8'):
     return bs.split(b'\x00')[0].decode(encoding)
 
 def read_string(file, maxBen = -1) -> str:
+    if maxBen == -1 and type(file) is BinaryReader:
+        return file.readString()
     binaryString = b""
     while maxBen == -1 or len(binaryString) > maxBen:
         char = readBe_char(file)
@@ -162,32 +496,24 @@ def read_string(file, maxBen = -1) -> str:
 
 
 def write_string(file, str):
-    for char in str:
-        write_char(file, char)
-    write_buffer(file, 1)
+    file.write(encode_chars(str) + b'\x00')
 
 # Big Endian
 
 def readBe_int16(file) -> int:
-    entry = file.read(2)
-    return struct.unpack('>h', entry)[0]
+    return read_struct(file, BE_INT16)[0]
 
 def readBe_int32(file) -> int:
-    entry = file.read(4)
-    return struct.unpack('>i', entry)[0]
+    return read_struct(file, BE_INT32)[0]
 
 def readBe_char(file) -> str:
-    entry = file.read(1)
-    return struct.unpack('>c', entry)[0]
+    return read_struct(file, BE_CHAR)[0]
 
 def writeBe_char(file, char):
-    entry = struct.pack('>s', bytes(char, 'utf-8'))
-    file.write(entry)
+    write_char(file, char)
 
 def writeBe_int32(file, int):
-    entry = struct.pack('>i', int)
-    file.write(entry)
+    file.write(BE_INT32.pack(int))
 
 def writeBe_int16(file, int):
-    entry = struct.pack('>h', int)
-    file.write(entry)
+    file.write(BE_INT16.pack(int))
@@ -12,6 +12,7 @@ from mathutils import Vector
 
 from .ioUtils import read_uint32
 from ..consts import ADDON_NAME, DAT_EXTENSIONS
+from ..dat_dtt.importer.datArchive import getFileSortingKey, saveDatInfo
 
 
 class Vector3(object):
@@ -185,6 +186,12 @@ def triangulate_meshes(collection: str):
             bm.to_mesh(me)
             bm.free()
 
+def foreachGetArray(collection, attribute: str, itemSize: int, dtype) -> np.ndarray:
+    """Flat array of an attribute of all items in a bpy collection"""
+    array = np.empty(len(collection) * itemSize, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    return array
+
 def centre_origins(collection: str):
     if bpy.context.object is not None:
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -300,10 +307,6 @@ def importContentsFileFromFolder(folderPath: str, contentsList: bpy.types.Collec
         return False
     return True
 
-def getFileSortingKey(file: str):
-    base, ext = os.path.splitext(file)
-    return (base.lower(), ext.lower())
-
 def readJsonDatInfo(filepath: str, contentsList: bpy.types.CollectionProperty):
     with open(filepath, "r") as f:
         filesData = json.load(f)
@@ -353,15 +356,3 @@ def readFileOrderMetadata(filepath: str, contentsList: bpy.types.CollectionPrope
         bpy.context.scene.DatExtension = ext[1:]
         bpy.context.scene.ExportFileName = os.path.basename(filepath)[:-4]
 
-def saveDatInfo(filepath: str, files: List[str], filename: str):
-    files = list(set(files))
-    files.sort(key=getFileSortingKey)
-    base, ext = os.path.splitext(filename)
-    with open(filepath, 'w') as f:
-        jsonFiles = {
-            "version": 1,
-            "files": files,
-            "basename": base,
-            "ext": ext[1:]
-        }
-        json.dump(jsonFiles, f, indent=4)
@@ -0,0 +1,141 @@
+# Cache of encoded vertex group buffers, so that unchanged meshes don't have to be re-encoded on every export
+import hashlib
+import os
+from typing import List
+
+import bpy
+import numpy as np
+
+from ...utils.util import foreachGetArray
+
+# bump when the encoded vertex data changes, invalidates all existing caches
+CACHE_VERSION = 2
+
+def getExportCacheDir(wmbFilepath: str) -> str:
+    return os.path.join(os.path.dirname(wmbFilepath), "wmb_export_cache", os.path.basename(wmbFilepath))
+
+def idPropertyValue(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    return value
+
+def customPropertiesRepr(idBlock) -> str:
+    return repr(sorted((key, idPropertyValue(idBlock[key])) for key in idBlock.keys()))
+
+def hashMeshObject(fileHash, obj: bpy.types.Object):
+    mesh = obj.data
+    fileHash.update(obj.name.encode("utf-8"))
+    fileHash.update(foreachGetArray(mesh.vertices, "co", 3, np.float32))
+    fileHash.update(foreachGetArray(mesh.loops, "vertex_index", 1, np.int32))
+    fileHash.update(foreachGetArray(mesh.polygons, "loop_total", 1, np.int32))
+
+    # normals (also covers smooth shading and custom normals)
+    if hasattr(mesh, "corner_normals"):
+        fileHash.update(foreachGetArray(mesh.corner_normals, "vector", 3, np.float32))
+    else:
+        mesh.calc_normals_split()
+        fileHash.update(foreachGetArray(mesh.loops, "normal", 3, np.float32))
+
+    fileHash.update(b"uv%d" % len(mesh.uv_layers))
+    for uvLayer in mesh.uv_layers:
+        fileHash.update(foreachGetArray(uvLayer.data, "uv", 2, np.float32))
+
+    # only the active color layer is exported
+    fileHash.update(b"col%d" % len(mesh.vertex_colors))
+    if mesh.vertex_colors.active is not None:
+        fileHash.update(foreachGetArray(mesh.vertex_colors.active.data, "color", 4, np.float32))
+
+    fileHash.update(repr([group.name for group in obj.vertex_groups]).encode("utf-8"))
+    weights = [
+        (vertex.index, group.group, group.weight)
+        for vertex in mesh.vertices
+        for group in vertex.groups
+    ]
+    fileHash.update(np.array(weights, dtype=np.float64).tobytes())
+
+    fileHash.update(customPropertiesRepr(obj).encode("utf-8"))
+    fileHash.update(customPropertiesRepr(mesh).encode("utf-8"))
+
+def vertexGroupHash(blenderObjects: List[bpy.types.Object], exportSettings) -> str:
+    """
+    Stable hash of everything the vertex group buffers are generated from.
+    exportSettings holds the non mesh inputs (vertex flags/format, bone map, bone sets).
+    """
+    fileHash = hashlib.blake2b(digest_size=16)
+    fileHash.update(repr([CACHE_VERSION, exportSettings]).encode("utf-8"))
+    for obj in blenderObjects:
+        hashMeshObject(fileHash, obj)
+    return fileHash.hexdigest()
+
+def itemsToColumns(items: list, fieldCount: int) -> List[np.ndarray]:
+    """
+    Generated vertex lists ([[field0, field1, ...], ...]) as one numeric array per field.
+    Raises ValueError if a field isn't a regular numeric array (ragged or not a number).
+    """
+    columns = []
+    for i in range(fieldCount):
+        column = np.array([item[i] for item in items])
+        if column.dtype.kind not in "iuf":
+            raise ValueError(f"field {i} has the non numeric type {column.dtype}")
+        columns.append(column)
+    return columns
+
+def columnsToItems(columns: List[np.ndarray]) -> list:
+    return list(map(list, zip(*(column.tolist() for column in columns))))
+
+class VertexGroupCache(object):
+    """
+    Encoded vertexes, vertexesExData and indexes of vertex groups, one .npz per content hash.
+    Entries only hold plain numeric arrays and are loaded without pickle support, since the cache
+    sits next to the WMB and may come from anyone.
+    """
+    VERTEX_FIELDS = 7
+    VERTEX_EX_DATA_FIELDS = 3
+
+    def __init__(self, cacheDir: str):
+        self.cacheDir = cacheDir
+        self.usedKeys = set()
+
+    def getPath(self, key: str) -> str:
+        return os.path.join(self.cacheDir, key + ".npz")
+
+    def load(self, key: str):
+        self.usedKeys.add(key)
+        try:
+            with np.load(self.getPath(key), allow_pickle=False) as entry:
+                vertexes = columnsToItems([entry[f"vertexes{i}"] for i in range(self.VERTEX_FIELDS)])
+                vertexesExData = columnsToItems([entry[f"vertexesExData{i}"] for i in range(self.VERTEX_EX_DATA_FIELDS)])
+                indexes = entry["indexes"].tolist()
+            return vertexes, vertexesExData, indexes
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print("[-] Ignoring broken WMB export cache entry", key, e)
+            return None
+
+    def save(self, key: str, data):
+        vertexes, vertexesExData, indexes = data
+        try:
+            arrays = { f"vertexes{i}": column for i, column in enumerate(itemsToColumns(vertexes, self.VERTEX_FIELDS)) }
+            arrays.update({ f"vertexesExData{i}": column for i, column in enumerate(itemsToColumns(vertexesExData, self.VERTEX_EX_DATA_FIELDS)) })
+            arrays["indexes"] = np.array(indexes, dtype=np.int64)
+        except ValueError as e:
+            print("[-] Not caching vertex data", key, e)
+            return
+        self.usedKeys.add(key)
+        os.makedirs(self.cacheDir, exist_ok=True)
+        tmpPath = self.getPath(key) + ".tmp"
+        with open(tmpPath, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmpPath, self.getPath(key))
+
+    def prune(self):
+        """Deletes entries that weren't used by the current export"""
+        if not os.path.isdir(self.cacheDir):
+            return
+        for file in os.listdir(self.cacheDir):
+            key, ext = os.path.splitext(file)
+            if ext == ".npz" and key not in self.usedKeys:
+                os.remove(os.path.join(self.cacheDir, file))
@@ -5,7 +5,10 @@ from ...utils.util import Vector3
 from ...utils.util import *
 from ...utils.util import getUsedMaterials
 from ...utils.util import ShowMessageBox
+from .exportCache import vertexGroupHash
+from ..normalCodec import encodeWmb3Normals, encodeWmb4Normals
 import bpy, math
+import numpy as np
 from mathutils import Vector
 from time import time
 
@@ -1091,7 +1094,7 @@ class c_unknownWorldData(object):
         self.unknownWorldDataCount = len(self.unknownWorldData)
 
 class c_vertexGroup(object):
-    def __init__(self, vertexGroupIndex, vertexesStart, wmb4=False):
+    def __init__(self, vertexGroupIndex, vertexesStart, wmb4=False, exportCache=None):
         self.vertexGroupIndex = vertexGroupIndex
         self.vertexGroupStart = vertexesStart
 
@@ -1104,7 +1107,6 @@ class c_vertexGroup(object):
                 if int(obj_name[0 if wmb4 else -1]) == vertexGroupIndex:
                     if len(obj.data.uv_layers) == 0:
                         obj.data.uv_layers.new()
-                    obj.data.calc_tangents()
                     if not wmb4:
                         objs[int(obj_name[0])] = obj
                     else:
@@ -1145,18 +1147,17 @@ class c_vertexGroup(object):
             
         blenderVertices = get_blenderVertices(self)
 
-        def get_blenderLoops(self, objOwner):
-            blenderLoops = []
-            blenderLoops += objOwner.data.loops
-
-            return blenderLoops
-
-        def get_blenderUVCoords(self, objOwner, loopIndex, uvSlot):
+        def get_blenderUVCoords(self, objOwner, uvSlot):
             if uvSlot > len(objOwner.data.uv_layers)-1:
                 print(" - UV Maps Error: Not enough UV Map layers! (Tried accessing UV layer number", uvSlot + 1, "of object", objOwner.name, "but it does not exist. Adding one!")
                 objOwner.data.uv_layers.new()
-            uv_coords = objOwner.data.uv_layers[uvSlot].data[loopIndex].uv
-            return [uv_coords.x, 1-uv_coords.y]
+            uvCoords = foreachGetArray(objOwner.data.uv_layers[uvSlot].data, "uv", 2, np.float32).reshape(-1, 2).astype(np.float64)
+            uvCoords[:, 1] = 1 - uvCoords[:, 1]
+            return uvCoords
+
+        def get_blenderColors(self, objOwner):
+            loopColors = foreachGetArray(objOwner.data.vertex_colors.active.data, "color", 4, np.float32).reshape(-1, 4)
+            return (loopColors.astype(np.float64) * 255).astype(np.int64) # truncates like int()
 
         # Has bones = 7, 10, 11
         # 1 UV  = 0
@@ -1247,226 +1248,179 @@ class c_vertexGroup(object):
             vertexesExData = []
             for bvertex_obj in blenderVertices:
                 bvertex_obj_obj = bvertex_obj[1]
+                mesh = bvertex_obj_obj.data
                 print('   [>] Generating vertex data for object', bvertex_obj_obj.name)
-                loops = get_blenderLoops(self, bvertex_obj_obj)
-                sorted_loops = sorted(loops, key=lambda loop: loop.vertex_index)
+                mesh.calc_tangents()
 
                 if self.vertexFlags not in {0, 1, 4, 5, 12, 14} or wmb4:
                     boneSet = get_boneSet(self, bvertex_obj_obj["boneSetIndex"])
-                
-                previousIndex = -1
-                for loop in sorted_loops:
-                    if loop.vertex_index == previousIndex:
-                        continue
 
-                    previousIndex = loop.vertex_index
-            
-                    bvertex = bvertex_obj[0][loop.vertex_index]
-                    # XYZ Position
-                    position = [bvertex.co.x, bvertex.co.y, bvertex.co.z]
-
-                    # Tangents
-                    loopTangent = loop.tangent * 127
-                    tx = int(loopTangent[0] + 127.0)
-                    ty = int(loopTangent[1] + 127.0)
-                    tz = int(loopTangent[2] + 127.0)
-                    sign = int(-loop.bitangent_sign*127.0+128.0)
-
-                    tangents = [tx, ty, tz, sign]
-
-                    # Normal
-                    normal = []
-                    if self.vertexFlags == 0 or wmb4:
-                        normal = [loop.normal[0], loop.normal[1], loop.normal[2], 0]
-                        if wmb4:
-                            #print(normal)
-                            # what the fuck is this, 11 bit values?
-                            """
-                            if (normal[0] < 0):
-                                normal[0] = -(0x400-normal[0])
-                                normal[0] ^= 0x400
-                            if (normal[1] < 0):
-                                normal[1] = -(0x400-normal[1])
-                                normal[1] ^= 0x400
-                            if (normal[2] < 0):
-                                normal[2] = -(0x200-normal[2])
-                                normal[2] ^= 0x200
-                            true_normal = normal[0] # bits 0-11
-                            true_normal |= normal[1]<<11
-                            true_normal |= normal[2]<<22
-                            normal = true_normal
-                            """
-                            # help me chatgpt, you're my only hope
-                            nx = int(round(normal[0] * float((1<<10)-1)))
-                            ny = int(round(normal[1] * float((1<<10)-1)))
-                            nz = int(round(normal[2] * float((1<<9 )-1)))
-                            if nx < 0:
-                                nx += (1 << 10)
-                                nx ^= 1 << 10
-                            if ny < 0:
-                                ny += (1 << 10)
-                                ny ^= 1 << 10
-                            if nz < 0:
-                                nz += (1 << 9)
-                                nz ^= 1 << 9
-                            normal = nx | (ny << 11) | (nz << 22)
-                        
-                    # UVs
-                    uv_maps = []
-
-                    uv1 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 0)
-                    uv_maps.append(uv1)
-
-                    if self.vertexFlags in {1, 4, 5, 12, 14}:
-                        uv2 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                        uv_maps.append(uv2)
-
-                    # Bones
-                    boneIndexes = []
-                    boneWeights = []
-                    if self.vertexFlags in {7, 10, 11} or (wmb4 and vertexFormat & 0x30 == 0x30):
-                        # Bone Indices
-                        for groupRef in bvertex.groups:
-                            if len(boneIndexes) < 4:
-                                boneGroupName = bvertex_obj_obj.vertex_groups[groupRef.group].name
-                                boneID = int(boneGroupName.replace("bone", ""))
-                                if not wmb4:
-                                    boneMapIndx = self.boneMap.index(boneID)
-                                    boneSetIndx = boneSet.index(boneMapIndx)
-                                    boneIndexes.append(boneSetIndx)
-                                else:
-                                    try:
-                                        boneSetIndx = boneSet.index(boneID)
-                                    except: # bone not in set? well fuck that
-                                        for obj in bpy.data.collections['WMB'].all_objects:
-                                            if obj.type == 'ARMATURE':
-                                            
-                                                allbonesets = list(obj.data["boneSetArray"])
-                                                boneSet = list(allbonesets[bvertex_obj_obj["boneSetIndex"]])
-                                                if boneID not in boneSet:
-                                                    boneSet.append(boneID)
-                                                allbonesets[bvertex_obj_obj["boneSetIndex"]] = boneSet
-                                                obj.data["boneSetArray"] = allbonesets
-                                                boneSetIndx = boneSet.index(boneID) # i swear to god # !!!
-                                    
-                                    if boneSetIndx < 0 or boneSetIndx > 255:
-                                        print("Hmm, boneID of", boneSetIndx, "could be a problem...")
-                                        print(boneSet)
+                # Every vertex uses the data of its first loop
+                loopVertexIndices = foreachGetArray(mesh.loops, "vertex_index", 1, np.int32)
+                vertexIndices, vertexLoops = np.unique(loopVertexIndices, return_index=True)
+                vertexCount = len(vertexIndices)
+
+                uvLayers = {}
+                def get_uvs(uvSlot):
+                    if uvSlot not in uvLayers:
+                        uvLayers[uvSlot] = get_blenderUVCoords(self, bvertex_obj_obj, uvSlot)[vertexLoops].tolist()
+                    return uvLayers[uvSlot]
+
+                # XYZ Position
+                positions = foreachGetArray(mesh.vertices, "co", 3, np.float32).reshape(-1, 3)[vertexIndices].tolist()
+
+                # Tangents (scaled in single precision, like mathutils vectors)
+                loopTangents = foreachGetArray(mesh.loops, "tangent", 3, np.float32).reshape(-1, 3)[vertexLoops] * np.float32(127)
+                bitangentSigns = foreachGetArray(mesh.loops, "bitangent_sign", 1, np.float32)[vertexLoops].astype(np.float64)
+                tangents = np.empty((vertexCount, 4), dtype=np.int64)
+                tangents[:, :3] = (loopTangents.astype(np.float64) + 127.0).astype(np.int64)
+                tangents[:, 3] = (-bitangentSigns * 127.0 + 128.0).astype(np.int64)
+                tangents = tangents.tolist()
+
+                # Normal
+                loopNormals = foreachGetArray(mesh.loops, "normal", 3, np.float32).reshape(-1, 3)[vertexLoops].astype(np.float64)
+                normals = [[] for _ in range(vertexCount)]
+                if wmb4:
+                    normals = encodeWmb4Normals(loopNormals).tolist()
+                elif self.vertexFlags == 0:
+                    normals = encodeWmb3Normals(loopNormals).tolist()
+
+                # UVs
+                uvLists = [get_uvs(0)]
+                if self.vertexFlags in {1, 4, 5, 12, 14}:
+                    uvLists.append(get_uvs(1))
+                uv_maps = [list(vertexUVs) for vertexUVs in zip(*uvLists)]
+
+                # Bones
+                boneIndexes = [[] for _ in range(vertexCount)]
+                boneWeights = [[] for _ in range(vertexCount)]
+                if self.vertexFlags in {7, 10, 11} or (wmb4 and vertexFormat & 0x30 == 0x30):
+                    meshVertices = mesh.vertices
+                    groupCounts = []
+                    groupIndices = []
+                    groupWeights = []
+                    weightsSums = []
+                    for vertexIndex in vertexIndices.tolist():
+                        groups = meshVertices[vertexIndex].groups
+                        weights = [group.weight for group in groups]
+                        groupCounts.append(len(weights))
+                        groupIndices.extend(group.group for group in groups)
+                        groupWeights.extend(weights)
+                        weightsSums.append(sum(weights))
+
+                    groupCounts = np.array(groupCounts, dtype=np.int64)
+                    for i in np.flatnonzero(groupCounts == 0).tolist():
+                        print(len(vertexes) + i, "- Vertex Weights Error: Vertex has no assigned groups. At least 1 required. Try using Blender's [Select -> Select All By Trait > Ungrouped Verts] function to find them.")
+                    for i in np.flatnonzero(groupCounts > 4).tolist():
+                        print(len(vertexes) + i, "- Vertex Weights Error: Vertex has weights assigned to more than 4 groups. Try using Blender's [Weights -> Limit Total] function.")
+
+                    # first 4 groups of each vertex, unused slots stay 0
+                    hasSlot = np.arange(4) < groupCounts[:, None]
+                    slotPositions = ((np.cumsum(groupCounts) - groupCounts)[:, None] + np.arange(4))[hasSlot]
+                    slotGroups = np.array(groupIndices, dtype=np.int64)[slotPositions]
+                    slotWeights = np.zeros((vertexCount, 4), dtype=np.float64)
+                    slotWeights[hasSlot] = np.array(groupWeights, dtype=np.float64)[slotPositions]
+
+                    # Bone Indices, looked up once per group in the order the groups are first used
+                    groupBoneSetIndexes = np.zeros(len(bvertex_obj_obj.vertex_groups), dtype=np.int64)
+                    for groupIndex in dict.fromkeys(slotGroups.tolist()):
+                        boneGroupName = bvertex_obj_obj.vertex_groups[groupIndex].name
+                        boneID = int(boneGroupName.replace("bone", ""))
+                        if not wmb4:
+                            boneMapIndx = self.boneMap.index(boneID)
+                            boneSetIndx = boneSet.index(boneMapIndx)
+                        else:
+                            try:
+                                boneSetIndx = boneSet.index(boneID)
+                            except: # bone not in set? well fuck that
+                                for obj in bpy.data.collections['WMB'].all_objects:
+                                    if obj.type == 'ARMATURE':
                                     
-                                    boneIndexes.append(boneSetIndx)
-                        
-                        if len(boneIndexes) == 0:
-                            print(len(vertexes) ,"- Vertex Weights Error: Vertex has no assigned groups. At least 1 required. Try using Blender's [Select -> Select All By Trait > Ungrouped Verts] function to find them.")
-
-                        while len(boneIndexes) < 4:
-                            boneIndexes.append(0)
-                        
-                        # Bone Weights
-                        weights = [group.weight for group in bvertex.groups]
-                        weightsSum = sum(weights)
-
-                        if len(weights) >  4:
-                            print(len(vertexes), "- Vertex Weights Error: Vertex has weights assigned to more than 4 groups. Try using Blender's [Weights -> Limit Total] function.")
-
-                        normalized_weights = []                                             # Force normalize the weights as Blender's normalization sometimes get some rounding issues.
-                        for val in weights:
-                            if val > 0:
-                                normalized_weights.append(float(val)/weightsSum)
-                            else:
-                                normalized_weights.append(0)
-
-                        for val in normalized_weights:
-                            if len(boneWeights) < 4:
-                                weight = math.floor(val * 256.0)
-                                if val == 1.0:
-                                    weight = 255
-                                boneWeights.append(weight)
-                        
-                        while len(boneWeights) < 4:
-                            boneWeights.append(0)
+                                        allbonesets = list(obj.data["boneSetArray"])
+                                        boneSet = list(allbonesets[bvertex_obj_obj["boneSetIndex"]])
+                                        if boneID not in boneSet:
+                                            boneSet.append(boneID)
+                                        allbonesets[bvertex_obj_obj["boneSetIndex"]] = boneSet
+                                        obj.data["boneSetArray"] = allbonesets
+                                        boneSetIndx = boneSet.index(boneID) # i swear to god # !!!
+                            
+                            if boneSetIndx < 0 or boneSetIndx > 255:
+                                print("Hmm, boneID of", boneSetIndx, "could be a problem...")
+                                print(boneSet)
+                        groupBoneSetIndexes[groupIndex] = boneSetIndx
+
+                    vertexBoneIndexes = np.zeros((vertexCount, 4), dtype=np.int64)
+                    vertexBoneIndexes[hasSlot] = groupBoneSetIndexes[slotGroups]
+                    boneIndexes = vertexBoneIndexes.tolist()
+
+                    # Bone Weights
+                    # Force normalize the weights as Blender's normalization sometimes get some rounding issues.
+                    normalizedWeights = np.zeros_like(slotWeights)
+                    np.divide(slotWeights, np.array(weightsSums, dtype=np.float64)[:, None], out=normalizedWeights, where=slotWeights > 0)
+                    vertexBoneWeights = np.floor(normalizedWeights * 256.0).astype(np.int64)
+                    vertexBoneWeights[normalizedWeights == 1.0] = 255
+                    # MOAR checks to make sure weights are normalized but in bytes. (A bit cheating but these values should make such a minor impact.)
+                    vertexBoneWeights[:, 0] += 255 - vertexBoneWeights.sum(axis=1)
+                    boneWeights = vertexBoneWeights.tolist()
+
+                colors = [[] for _ in range(vertexCount)]
+                if self.vertexFlags in {4, 5, 12, 14} or (wmb4 and vertexFormat >= 0x337):
+                    if len (mesh.vertex_colors) == 0:
+                        print("Object had no vertex colour layer when one was expected - creating one.")
+                        new_vertex_colors = mesh.vertex_colors.new()
+                    colors = get_blenderColors(self, bvertex_obj_obj)[vertexLoops].tolist()
+
+                vertexes.extend(map(list, zip(positions, tangents, normals, uv_maps, boneIndexes, boneWeights, colors)))
 
-                        while sum(boneWeights) < 255:                     # MOAR checks to make sure weights are normalized but in bytes. (A bit cheating but these values should make such a minor impact.)
-                            boneWeights[0] += 1
+                
+                ##################################################
+                ###### Now lets do the extra data shit ###########
+                ##################################################
+                normals = [[] for _ in range(vertexCount)]
+                uvLists = []
+                colors = [[] for _ in range(vertexCount)]
+                if wmb4:
+                    if vertexFormat in {0x10337, 0x10137, 0x00337}:
+                        if vertexFormat != 0x10137:
+                            uvLists.append(get_uvs(1))
+                        colors = get_blenderColors(self, bvertex_obj_obj)[vertexLoops].tolist()
+                
+                else:
+                    
+                    if self.vertexFlags in {10, 11}:
+                        if len (mesh.vertex_colors) == 0:
+                            print("Object had no vertex colour layer when one was expected - creating one.")
+                            new_vertex_colors = mesh.vertex_colors.new()
 
-                        while sum(boneWeights) > 255:                     
-                            boneWeights[0] -= 1
+                    if self.vertexFlags in {1, 4, 5, 7, 10, 11, 12, 14}:
+                        normals = encodeWmb3Normals(loopNormals).tolist()
+                    
+                    if self.vertexFlags == 5:
+                        uvLists.append(get_uvs(2))
 
-                        if sum(boneWeights) != 255:                       # If EVEN the FORCED normalization doesn't work, say something :/
-                            print(len(vertexes), "- Vertex Weights Error: Vertex has a total weight not equal to 1.0. Try using Blender's [Weights -> Normalize All] function.") 
+                    elif self.vertexFlags == 7:
+                        uvLists.append(get_uvs(1))
 
-                    color = []
-                    if self.vertexFlags in {4, 5, 12, 14} or (wmb4 and vertexFormat >= 0x337):
-                        if len (bvertex_obj_obj.data.vertex_colors) == 0:
-                            print("Object had no vertex colour layer when one was expected - creating one.")
-                            new_vertex_colors = bvertex_obj_obj.data.vertex_colors.new()
-                        loop_color = bvertex_obj_obj.data.vertex_colors.active.data[loop.index].color
-                        color = [int(loop_color[0]*255), int(loop_color[1]*255), int(loop_color[2]*255), int(loop_color[3]*255)]
+                    elif self.vertexFlags == 10:
+                        uvLists.append(get_uvs(1))
+                        colors = get_blenderColors(self, bvertex_obj_obj)[vertexLoops].tolist()
 
-                    vertexes.append([position, tangents, normal, uv_maps, boneIndexes, boneWeights, color])
+                    elif self.vertexFlags == 11:
+                        uvLists.append(get_uvs(1))
+                        colors = get_blenderColors(self, bvertex_obj_obj)[vertexLoops].tolist()
+                        uvLists.append(get_uvs(1))
 
-                    
-                    ##################################################
-                    ###### Now lets do the extra data shit ###########
-                    ##################################################
-                    normal = []
-                    uv_maps = []
-                    color = []
-                    if wmb4:
-                        if vertexFormat in {0x10337, 0x10137, 0x00337}:
-                            if vertexFormat != 0x10137:
-                                uv2 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                                uv_maps.append(uv2)
-                            loop_color = bvertex_obj_obj.data.vertex_colors.active.data[loop.index].color
-                            color = [int(loop_color[0]*255), int(loop_color[1]*255), int(loop_color[2]*255), int(loop_color[3]*255)]
-                    
-                    else:
-                        
-                        if self.vertexFlags in {10, 11}:
-                            if len (bvertex_obj_obj.data.vertex_colors) == 0:
-                                print("Object had no vertex colour layer when one was expected - creating one.")
-                                new_vertex_colors = bvertex_obj_obj.data.vertex_colors.new()
+                    elif self.vertexFlags == 12:
+                        uvLists.append(get_uvs(2))
+                        uvLists.append(get_uvs(3))
+                        uvLists.append(get_uvs(4))
 
-                        if self.vertexFlags in {1, 4, 5, 7, 10, 11, 12, 14}:
-                            normal = [loop.normal[0], loop.normal[1], loop.normal[2], 0]
-                        
-                        if self.vertexFlags == 5:
-                            uv3 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 2)
-                            uv_maps.append(uv3)
-
-                        elif self.vertexFlags == 7:
-                            uv2 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                            uv_maps.append(uv2)
-
-                        elif self.vertexFlags == 10:
-                            uv2 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                            uv_maps.append(uv2)
-                            loop_color = bvertex_obj_obj.data.vertex_colors.active.data[loop.index].color
-                            color = [int(loop_color[0]*255), int(loop_color[1]*255), int(loop_color[2]*255), int(loop_color[3]*255)]
-
-                        elif self.vertexFlags == 11:
-                            uv2 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                            uv_maps.append(uv2)
-                            loop_color = bvertex_obj_obj.data.vertex_colors.active.data[loop.index].color
-                            color = [int(loop_color[0]*255), int(loop_color[1]*255), int(loop_color[2]*255), int(loop_color[3]*255)]
-                            uv3 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 1)
-                            uv_maps.append(uv3)
-
-                        elif self.vertexFlags == 12:
-                            uv3 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 2)
-                            uv_maps.append(uv3)
-                            uv4 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 3)
-                            uv_maps.append(uv4)
-                            uv5 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 4)
-                            uv_maps.append(uv5)
-
-                        elif self.vertexFlags == 14:
-                            uv3 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 2)
-                            uv_maps.append(uv3)
-                            uv4 = get_blenderUVCoords(self, bvertex_obj_obj, loop.index, 3)
-                            uv_maps.append(uv4)
-                    
-                    vertexExData = [normal, uv_maps, color]
-                    vertexesExData.append(vertexExData)
+                    elif self.vertexFlags == 14:
+                        uvLists.append(get_uvs(2))
+                        uvLists.append(get_uvs(3))
+                
+                uv_maps = [list(vertexUVs) for vertexUVs in zip(*uvLists)] if uvLists else [[] for _ in range(vertexCount)]
+                vertexesExData.extend(map(list, zip(normals, uv_maps, colors)))
             #print(hex(len(vertexes)))
             
             return vertexes, vertexesExData
@@ -1511,14 +1465,33 @@ class c_vertexGroup(object):
         
         self.numIndexes = get_numIndexes(self)
 
-        self.vertexes, self.vertexesExData = get_vertexesData(self)
-        
-        self.indexes = get_indexes(self)
+        cacheKey = None
+        cachedData = None
+        if exportCache is not None:
+            boneSets = [get_boneSet(self, obj.get("boneSetIndex", -1)) for obj in self.blenderObjects]
+            cacheKey = vertexGroupHash(self.blenderObjects, [wmb4, self.vertexFlags, vertexFormat if wmb4 else None, self.boneMap, boneSets])
+            cachedData = exportCache.load(cacheKey)
+
+        if cachedData is not None:
+            print('   [>] Reusing cached vertex data for vertex group', vertexGroupIndex)
+            self.vertexes, self.vertexesExData, self.indexes = cachedData
+        else:
+            self.vertexes, self.vertexesExData = get_vertexesData(self)
+            
+            self.indexes = get_indexes(self)
+
+            if exportCache is not None:
+                # WMB4 generation can add missing bones to the bone sets, an entry keyed by the sets from before
+                # that would be reused without the added bones
+                if [get_boneSet(self, obj.get("boneSetIndex", -1)) for obj in self.blenderObjects] == boneSets:
+                    exportCache.save(cacheKey, (self.vertexes, self.vertexesExData, self.indexes))
+                else:
+                    print('   [>] Bone sets changed, not caching vertex data for vertex group', vertexGroupIndex)
 
         self.vertexGroupSize = (self.indexBufferOffset - self.vertexOffset) + (self.numIndexes * (2 if wmb4 else 4))
 
 class c_vertexGroups(object):
-    def __init__(self, offsetVertexGroups, wmb4=False):
+    def __init__(self, offsetVertexGroups, wmb4=False, exportCache=None):
         self.offsetVertexGroups = offsetVertexGroups
         
         # Alright, before we do anything, let's fix the mess that is object IDs
@@ -1559,7 +1532,7 @@ class c_vertexGroups(object):
             vertexGroups = []
             for index in vertexGroupIndex:
                 print('[+] Creating Vertex Group', index)
-                vertexGroups.append(c_vertexGroup(index, vertexesOffset, wmb4))
+                vertexGroups.append(c_vertexGroup(index, vertexesOffset, wmb4, exportCache))
                 vertexesOffset += vertexGroups[index].vertexGroupSize
                 padAmount = 0
                 if wmb4 and (vertexesOffset % 16 > 0):
@@ -1590,7 +1563,7 @@ class c_vertexGroups(object):
 
 
 class c_generate_data(object):
-    def __init__(self, wmb4=False):
+    def __init__(self, wmb4=False, exportCache=None):
         hasArmature = False
         hasColTreeNodes = False
         hasUnknownWorldData = False
@@ -1649,7 +1622,7 @@ class c_generate_data(object):
             currentOffset += 16 - (currentOffset % 16)
 
             self.vertexGroups_Offset = currentOffset
-            self.vertexGroups = c_vertexGroups(self.vertexGroups_Offset)
+            self.vertexGroups = c_vertexGroups(self.vertexGroups_Offset, False, exportCache)
             self.vertexGroupsCount = len(self.vertexGroups.vertexGroups)
             self.vertexGroups_Size = self.vertexGroups.vertexGroups_StructSize
             currentOffset += self.vertexGroups_Size
@@ -1760,7 +1733,7 @@ class c_generate_data(object):
             self.vertexFormat = bpy.data.collections['WMB']['vertexFormat']
 
             self.vertexGroups_Offset = currentOffset
-            self.vertexGroups = c_vertexGroups(self.vertexGroups_Offset, True)
+            self.vertexGroups = c_vertexGroups(self.vertexGroups_Offset, True, exportCache)
             self.vertexGroupsCount = len(self.vertexGroups.vertexGroups)
             self.vertexGroups_Size = self.vertexGroups.vertexGroups_StructSize
             currentOffset += self.vertexGroups_Size
@@ -2,6 +2,7 @@
 from ...utils.ioUtils import create_wmb, close_wmb
 from .generate_data import *
 from .write_wmb import *
+from .exportCache import VertexGroupCache, getExportCacheDir
 
 import time
 
@@ -35,13 +36,14 @@ def restore_blend():
     return {'FINISHED'}
 
 
-def main(filepath, wmb4=False):
+def main(filepath, wmb4=False, useCache=False):
     start_time = int(time.time())
     prepare_blend()
     
     wmb_file = create_wmb(filepath)
     
-    generated_data = c_generate_data(wmb4)
+    exportCache = VertexGroupCache(getExportCacheDir(filepath)) if useCache else None
+    generated_data = c_generate_data(wmb4, exportCache)
     print('-=# All Data Generated. Writing WMB... #=-')
     create_wmb_header(wmb_file, generated_data, wmb4)
     
@@ -123,6 +125,8 @@ def main(filepath, wmb4=False):
 
     print('Finished writing. Closing file..')
     close_wmb(wmb_file, generated_data)
+    if exportCache is not None:
+        exportCache.prune()
 
     end_time = int(time.time())
     export_duration = end_time - start_time
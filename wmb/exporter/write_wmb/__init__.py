@@ -1,7 +1,8 @@
 # write data from Python object to .wmb
-from ....utils.ioUtils import write_Int32, write_uInt32, write_Int16, write_xyz, write_float, write_char, write_string, write_uInt16, SmartIO, write_byte, write_float16
+from ....utils.ioUtils import write_Int32, write_uInt32, write_Int16, write_xyz, write_float, write_char, write_string, write_uInt16, write_byte
 from ....utils.util import *
-from time import time
+from operator import itemgetter
+import numpy as np
 
 def create_wmb_batches(wmb_file, data, wmb4=False):
     wmb_file.seek(data.batches_Offset)
@@ -476,6 +477,104 @@ def create_wmb_unknownWorldData(wmb_file, data):
         for entry in unknownWorldData:                                  
             wmb_file.write(entry)
 
+# Vertex buffer fields: (name, type, count, path of the value in the generated vertex lists)
+# vertexes:       [position.xyz, tangents, normal, uv_maps, boneIndexes, boneWeights, color]
+# vertexesExData: [normal, uv_maps, color]
+# normals are already packed, see normalCodec
+POSITION_FIELD = ("position", "<f4", 3, (0,))
+TANGENT_FIELD = ("tangent", "u1", 4, (1,))
+WMB4_NORMAL_FIELD = ("normal", "<u4", 1, (2,))
+BONE_INDEXES_FIELD = ("boneIndexes", "u1", 4, (4,))
+BONE_WEIGHTS_FIELD = ("boneWeights", "u1", 4, (5,))
+
+def normal_field(path):
+    return ("normal", "<u8", 1, path)
+
+def uv_field(i, path):
+    return (f"uv{i}", "<f2", 2, path)
+
+def color_field(path):
+    return ("color", "u1", 4, path)
+
+def get_vertexFields(vertexFlags, wmb4=False, vertexFormat=None):
+    if wmb4:
+        fields = [POSITION_FIELD, uv_field(1, (3, 0)), WMB4_NORMAL_FIELD, TANGENT_FIELD]
+        #if vertexFormat in {0x10337, 0x10137, 0x00337, 0x00137}:
+        if vertexFormat & 0x30 == 0x30: # hehe i'm clever
+            fields += [BONE_INDEXES_FIELD, BONE_WEIGHTS_FIELD]
+        if vertexFormat in {0x10307, 0x10107}:
+            fields.append(color_field((6,)))
+        if vertexFormat == 0x10307:
+            fields.append(uv_field(2, (3, 1)))
+        return fields
+
+    fields = [POSITION_FIELD, TANGENT_FIELD, uv_field(1, (3, 0))]
+    if vertexFlags == 0:
+        fields.append(normal_field((2,)))
+    if vertexFlags in {1, 4, 5, 12, 14}:
+        fields.append(uv_field(2, (3, 1)))
+    if vertexFlags in {7, 10, 11}:
+        fields += [BONE_INDEXES_FIELD, BONE_WEIGHTS_FIELD]
+    if vertexFlags in {4, 5, 12, 14}:
+        fields.append(color_field((6,)))
+    return fields
+
+def get_vertexExDataFields(vertexFlags, wmb4=False, vertexFormat=None):
+    if wmb4:
+        fields = [color_field((2,))]
+        if vertexFormat in {0x10337, 0x00337}:
+            fields.append(uv_field(1, (1, 0)))
+        elif vertexFormat != 0x10137:
+            print("How the hell is there vertexExData with a vertexFormat of %s?" % hex(vertexFormat))
+        return fields
+
+    normal = normal_field((0,))
+    if vertexFlags in {1, 4}:
+        return [normal]
+    if vertexFlags == 5:
+        return [normal, uv_field(1, (1, 0))]
+    if vertexFlags == 7:
+        return [uv_field(1, (1, 0)), normal]
+    if vertexFlags == 10:
+        return [uv_field(1, (1, 0)), color_field((2,)), normal]
+    if vertexFlags == 11:
+        return [uv_field(1, (1, 0)), color_field((2,)), normal, uv_field(2, (1, 1))]
+    if vertexFlags == 12:
+        return [normal, uv_field(1, (1, 0)), uv_field(2, (1, 1)), uv_field(3, (1, 2))]
+    if vertexFlags == 14:
+        return [normal, uv_field(1, (1, 0)), uv_field(2, (1, 1))]
+    return []
+
+def get_column(items, path):
+    for index in path:
+        items = map(itemgetter(index), items)
+    return list(items)
+
+def pack_structured(items, fields) -> np.ndarray:
+    """All items as one structured array with the binary layout of fields"""
+    layout = np.dtype([(name, valueType, (count,)) if count > 1 else (name, valueType) for name, valueType, count, path in fields])
+    buffer = np.zeros(len(items), dtype=layout)
+    if len(items) == 0:
+        return buffer
+    for name, valueType, count, path in fields:
+        valueType = np.dtype(valueType)
+        if valueType.kind == "f":
+            values = np.array(get_column(items, path), dtype=np.float64)
+            converted = values.astype(valueType)
+            if np.any(np.isinf(converted) & np.isfinite(values)):
+                raise OverflowError(f"Vertex {name} value out of range for {valueType}")
+        else:
+            values = np.array(get_column(items, path), dtype=np.int64)
+            limits = np.iinfo(valueType)
+            if int(values.min()) < limits.min or int(values.max()) > limits.max:
+                raise OverflowError(f"Vertex {name} value out of range for {valueType}")
+            converted = values.astype(valueType)
+        buffer[name] = converted
+    return buffer
+
+def write_array(wmb_file, array: np.ndarray):
+    wmb_file.write(array.view(np.uint8))
+
 def create_wmb_vertexGroups(wmb_file, data, wmb4=False):
     wmb_file.seek(data.vertexGroups_Offset)
     
@@ -496,136 +595,23 @@ def create_wmb_vertexGroups(wmb_file, data, wmb4=False):
         write_Int32(wmb_file, vertexGroup.indexBufferOffset)        # indexBufferOffset
         write_Int32(wmb_file, vertexGroup.numIndexes)               # numIndexes
     
-    fourbytes = SmartIO.makeFormat(SmartIO.uint8, SmartIO.uint8, SmartIO.uint8, SmartIO.uint8)
-    writePos = SmartIO.makeFormat(SmartIO.float, SmartIO.float, SmartIO.float)
-    writeTangent = fourbytes
-    writeNormal = SmartIO.makeFormat(SmartIO.float16, SmartIO.float16, SmartIO.float16, SmartIO.float16)
-    #if wmb4:
-    #    writeNormal = SmartIO.makeFormat(SmartIO.uint32)
-    writeBoneIndexes = fourbytes
-    writeBoneWeights = fourbytes
-    writeUV = SmartIO.makeFormat(SmartIO.float16, SmartIO.float16)
-    writeColor = fourbytes
-    
+    vertexFormat = data.vertexFormat if wmb4 else None
     for vertexGroup in data.vertexGroups.vertexGroups:
         wmb_file.seek(vertexGroup.vertexOffset)
         print("Vertices:", len(vertexGroup.vertexes))
         print("Wacky flag:", vertexGroup.vertexFlags)
-        for vertex in vertexGroup.vertexes:                         # [position.xyz, tangents, normal, uv_maps, boneIndexes, boneWeights, color]
-            writePos.write(wmb_file, vertex[0])
-            if not wmb4:
-                writeTangent.write(wmb_file, vertex[1])
-            writeUV.write(wmb_file, vertex[3][0]) # UVMap 1
-            
-            if vertexGroup.vertexFlags == 0 and not wmb4: # Normal
-                writeNormal.write(wmb_file, vertex[2])
-            elif wmb4:
-                #print(hex(vertex[2]))
-                write_uInt32(wmb_file, vertex[2])
-            if wmb4:
-                writeTangent.write(wmb_file, vertex[1])
-            
-            # bits that change based on flags
-            if wmb4:
-                #if data.vertexFormat in {0x10337, 0x10137, 0x00337, 0x00137}:
-                if data.vertexFormat & 0x30 == 0x30: # hehe i'm clever
-                    writeBoneIndexes.write(wmb_file, vertex[4])
-                    writeBoneWeights.write(wmb_file, vertex[5])
-                if data.vertexFormat in {0x10307, 0x10107}:
-                    writeColor.write(wmb_file, vertex[6])
-                if data.vertexFormat == 0x10307:
-                    writeUV.write(wmb_file, vertex[3][1]) # UVMap 2
-            
-            else:
-                if vertexGroup.vertexFlags in {1, 4, 5, 12, 14}:
-                    writeUV.write(wmb_file, vertex[3][1]) # UVMap 2
-                if vertexGroup.vertexFlags in {7, 10, 11}:
-                    writeBoneIndexes.write(wmb_file, vertex[4])
-                    writeBoneWeights.write(wmb_file, vertex[5])
-                if vertexGroup.vertexFlags in {4, 5, 12, 14}:
-                    writeColor.write(wmb_file, vertex[6])
-            
+        # every buffer is packed into a structured array and written at once
+        vertexFields = get_vertexFields(vertexGroup.vertexFlags, wmb4, vertexFormat)
+        write_array(wmb_file, pack_structured(vertexGroup.vertexes, vertexFields))
+        
         if vertexGroup.vertexExDataOffset > 0:
             wmb_file.seek(vertexGroup.vertexExDataOffset)
-        for vertexExData in vertexGroup.vertexesExData:             # [normal, uv_maps, color]
-            
-            if wmb4:
-                if vertexGroup.vertexExDataOffset <= 0:
-                    break
-                writeColor.write(wmb_file, vertexExData[2])
-                if data.vertexFormat in {0x10337, 0x00337}:
-                    writeUV.write(wmb_file, vertexExData[1][0])
-                elif data.vertexFormat != 0x10137:
-                    print("How the hell is there vertexExData with a vertexFormat of %s?" % hex(data.vertexFormat))
-            
-            elif vertexGroup.vertexFlags in {1, 4}:                   # [1, 4]
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-            elif vertexGroup.vertexFlags == 5:                      # [5]
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-                # for val in vertexExData[1][0]:                      # UVMap 3
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][0])
-            elif vertexGroup.vertexFlags == 7: # [7]
-                # UVMap 1
-                writeUV.write(wmb_file, vertexExData[1][0])
-                # normal
-                writeNormal.write(wmb_file, vertexExData[0])
-            elif vertexGroup.vertexFlags == 10:                     # [10]
-                # for val in vertexExData[1][0]:                      # UVMap 1
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][0])
-                # for val in vertexExData[2]:                         # Color                               
-                #     write_byte(wmb_file, val)
-                writeColor.write(wmb_file, vertexExData[2])
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-            elif vertexGroup.vertexFlags == 11:                     # [11]
-                # for val in vertexExData[1][0]:                      # UVMap 1
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][0])
-                # for val in vertexExData[2]:                         # Color
-                #     write_byte(wmb_file, val)
-                writeColor.write(wmb_file, vertexExData[2])
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-                # for val in vertexExData[1][1]:                      # UVMap 2
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][1])
-            elif vertexGroup.vertexFlags == 12:                     # [12]
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-                # for val in vertexExData[1][0]:                      # UVMap 3
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][0])
-                # for val in vertexExData[1][1]:                      # UVMap 4
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][1])
-                # for val in vertexExData[1][2]:                      # UVMap 5
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][2])
-            elif vertexGroup.vertexFlags == 14:                     # [14]
-                # for val in vertexExData[0]:                         # normal
-                #     write_float16(wmb_file, val)
-                writeNormal.write(wmb_file, vertexExData[0])
-                # for val in vertexExData[1][0]:                      # UVMap 3
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][0])
-                # for val in vertexExData[1][1]:                      # UVMap 4
-                #     write_float16(wmb_file, val)
-                writeUV.write(wmb_file, vertexExData[1][1])
+        if not wmb4 or vertexGroup.vertexExDataOffset > 0:
+            vertexExDataFields = get_vertexExDataFields(vertexGroup.vertexFlags, wmb4, vertexFormat)
+            if vertexExDataFields:
+                write_array(wmb_file, pack_structured(vertexGroup.vertexesExData, vertexExDataFields))
         
         if wmb4:
             wmb_file.seek(vertexGroup.indexBufferOffset)
-        for index in vertexGroup.indexes:                           # indexes
-            if wmb4:
-                write_uInt16(wmb_file, index)
-            else:
-                write_uInt32(wmb_file, index)
+        write_array(wmb_file, np.array(vertexGroup.indexes, dtype="<u2" if wmb4 else "<u4"))
         
@@ -0,0 +1,86 @@
+# Image datablocks of imported textures, shared by all materials (and SCR sub-models) using the same identifier
+import os
+from typing import Dict, List, Optional, Tuple
+
+import bpy
+
+# imports creating more images than this decode them in idle time afterwards
+BACKGROUND_LOAD_THRESHOLD = 32
+# images decoded per timer tick, and the delay between ticks in seconds
+BACKGROUND_LOAD_BATCH = 4
+BACKGROUND_LOAD_INTERVAL = 0.05
+
+class TextureCache(object):
+    """
+    identifier -> bpy.types.Image, so every texture is loaded once no matter how many materials use it.
+    Images are created from their DDS path without reading any pixels (Blender decodes an image the
+    first time it's used, usually the first viewport draw), and an image that already exists for the
+    same file and color space is reused. Images are never packed into the .blend.
+    """
+    def __init__(self):
+        # (identifier, non color) -> image name, names instead of images since those can be invalidated by undo
+        self.images: Dict[Tuple[str, bool], str] = {}
+        self.fileExists: Dict[str, bool] = {}
+        self.newImages: List[str] = []
+        # (file, non color) -> name of images that existed before this cache, collected on first use
+        self.existingImages: Optional[Dict[Tuple[str, bool], str]] = None
+
+    @staticmethod
+    def imageKey(filepath: str, nonColor: bool) -> Tuple[str, bool]:
+        return os.path.normcase(os.path.abspath(filepath)), nonColor
+
+    def findExistingImage(self, path: str, nonColor: bool) -> Optional[bpy.types.Image]:
+        if self.existingImages is None:
+            self.existingImages = {}
+            for image in bpy.data.images:
+                if image.source != 'FILE' or image.packed_file is not None:
+                    continue
+                key = self.imageKey(bpy.path.abspath(image.filepath), image.colorspace_settings.name == 'Non-Color')
+                self.existingImages.setdefault(key, image.name)
+        return bpy.data.images.get(self.existingImages.get(self.imageKey(path, nonColor), ""))
+
+    def findFile(self, textureDir: str, identifier: str) -> Optional[str]:
+        """Path of the DDS file of the texture, None if it wasn't extracted"""
+        path = "%s/%s.dds" % (textureDir, identifier)
+        if path not in self.fileExists:
+            self.fileExists[path] = os.path.exists(path)
+        return path if self.fileExists[path] else None
+
+    def get(self, textureDir: str, identifier: str, nonColor: bool = False) -> Optional[bpy.types.Image]:
+        path = self.findFile(textureDir, identifier)
+        if path is None:
+            return None
+        key = (str(identifier).lower(), nonColor)
+        image = bpy.data.images.get(self.images.get(key, ""))
+        if image is not None:
+            return image
+
+        # images of other imports are only reused with the same color space, changing it would change their materials.
+        # The same file as non color and color data is two images.
+        image = self.findExistingImage(path, nonColor)
+        if image is None:
+            image = bpy.data.images.load(path, check_existing=False)
+            if nonColor:
+                image.colorspace_settings.name = 'Non-Color'
+            self.newImages.append(image.name)
+        self.images[key] = image.name
+        return image
+
+    def loadInBackground(self):
+        """
+        Decodes the images created by this cache a few at a time between UI events, so large imports
+        return right away without the first viewport draw blocking on all DDS files at once.
+        bpy isn't thread safe, so this runs in a timer on the main thread rather than in a worker thread.
+        """
+        if len(self.newImages) <= BACKGROUND_LOAD_THRESHOLD:
+            return
+        pending = list(reversed(self.newImages))
+        self.newImages = []
+
+        def loadBatch():
+            for _ in range(min(BACKGROUND_LOAD_BATCH, len(pending))):
+                image = bpy.data.images.get(pending.pop())
+                if image is not None and not image.has_data:
+                    image.size[0] # getting the size loads the image buffer
+            return BACKGROUND_LOAD_INTERVAL if pending else None
+        bpy.app.timers.register(loadBatch, first_interval=BACKGROUND_LOAD_INTERVAL)
@@ -1,13 +1,14 @@
 # load from .wmb into Python object
 import os
 import json
-import bpy
-import struct # even for only two lines
+import tempfile
+import numpy as np
+from functools import cached_property
 from time import time
 
-from ...utils.util import print_class, create_dir
-from ...utils.ioUtils import SmartIO, read_uint8_x4, to_string, read_float, read_float16, read_uint16, read_uint8, read_uint64, read_int16, read_int32, read_string
+from ...utils.ioUtils import to_string, read_float, read_float16, read_uint16, read_uint8, read_int16, read_int32, read_string, BinaryReader
 from ...wta_wtp.importer.wta import *
+from ..normalCodec import decodeWmb3Normals, decodeWmb4Normals
 
 DEBUG_HEADER_PRINT = True
 DEBUG_VERTEXGROUP_PRINT = False
@@ -260,22 +261,6 @@ class wmb3_material(object):
         self.techniqueName = to_string(wmb_fp.read(0x100))
         self.textureArray = {}
 
-        path_split = wmb_fp.name.split(os.sep)
-        mat_list_filepath = os.sep.join(path_split[:-3])
-        mat_list_file = open(os.path.join(mat_list_filepath, 'materials.json'), 'a+')
-        mat_list_file.seek(0)
-        file_dict = {}
-        # Try to load json from pre-existing file
-        try:
-            file_dict = json.load(mat_list_file)
-        except Exception as ex:
-            print("Could not load json: " , ex)
-            pass
-        
-        # Clear file contents
-        mat_list_file.truncate(0)
-        file_dict[self.materialName] = {}
-        # Append textures to materials in the dictionary
         #print("Iterating over textureNum, length %d" % textureNum)
         for i in range(textureNum):
             wmb_fp.seek(textureOffset + i * 8)
@@ -286,12 +271,7 @@ class wmb3_material(object):
             #print("Seeking to offset: %s" % hex(offset))
             textureTypeName = to_string(wmb_fp.read(256))
             self.textureArray[textureTypeName] = identifier
-            # Add new texture to nested material dictionary
-
-        file_dict[self.materialName]["Textures"] = self.textureArray
 
-        file_dict[self.materialName]["Shader_Name"] = self.effectName
-        file_dict[self.materialName]["Technique_Name"] = self.techniqueName
         wmb_fp.seek(paramterGroupsOffset)
         #print("Seeking to paramterGroupsOffset: %s" % hex(paramterGroupsOffset))
         self.parameterGroups = []
@@ -325,12 +305,40 @@ class wmb3_material(object):
             name = to_string(wmb_fp.read(0x100))
             self.uniformArray[name] = value
 
-        file_dict[self.materialName]["ParameterGroups"] = self.parameterGroups
-        file_dict[self.materialName]["Variables"] = self.uniformArray
-
-        # Write the current material to materials.json
-        json.dump(file_dict, mat_list_file, indent= 4)
-        mat_list_file.close()
+    def jsonInfo(self):
+        return {
+            "Textures": self.textureArray,
+            "Shader_Name": self.effectName,
+            "Technique_Name": self.techniqueName,
+            "ParameterGroups": self.parameterGroups,
+            "Variables": self.uniformArray,
+        }
+
+def saveMaterialsJson(wmb_path, materials):
+    # materials.json sits three directories above the wmb and is shared by every import there
+    path_split = wmb_path.split(os.sep)
+    mat_list_filepath = os.path.join(os.sep.join(path_split[:-3]), 'materials.json')
+    file_dict = {}
+    # Try to load json from pre-existing file
+    if os.path.exists(mat_list_filepath):
+        try:
+            with open(mat_list_filepath, 'r') as mat_list_file:
+                file_dict = json.load(mat_list_file)
+        except Exception as ex:
+            print("Could not load json: " , ex)
+    
+    for material in materials:
+        file_dict[material.materialName] = material.jsonInfo()
+
+    # write next to the target and swap it in, readers never see a half written file
+    tmp_fd, tmp_filepath = tempfile.mkstemp(prefix='materials.', suffix='.json.tmp', dir=os.path.dirname(mat_list_filepath) or '.')
+    try:
+        with os.fdopen(tmp_fd, 'w') as mat_list_file:
+            json.dump(file_dict, mat_list_file, indent= 4)
+        os.replace(tmp_filepath, mat_list_filepath)
+    except:
+        os.remove(tmp_filepath)
+        raise
 
 class wmb3_mesh(object):
     """docstring for wmb3_mesh"""
@@ -427,6 +435,45 @@ class wmb3_vertexHeader(object):
         self.faceArrayOffset = read_uint32(wmb_fp)        
         self.faceCount = read_uint32(wmb_fp)                
 
+# NumPy layouts of the WMB3 vertex buffers, one per vertexFlags value.
+# Every vertex starts with position, normal (3 bytes + padding) and UV.
+# The actual normals are the packedNormal fields, 4 halfs in the vertex or ex data.
+def wmb3_vertexDtype(vertex_flags):
+    fields = [
+        ('position', '<f4', (3,)),
+        ('normal', 'u1', (4,)),
+        ('uv', '<f2', (2,)),
+    ]
+    if vertex_flags == 0:
+        fields.append(('packedNormal', '<u8'))
+    if vertex_flags in {1, 4, 5, 12, 14}:
+        fields.append(('uv2', '<f2', (2,)))
+    if vertex_flags in {7, 10, 11}:
+        fields.append(('boneIndices', 'u1', (4,)))
+        fields.append(('boneWeights', 'u1', (4,)))
+    if vertex_flags in {4, 5, 12, 14}:
+        fields.append(('color', 'u1', (4,)))
+    return np.dtype(fields)
+
+WMB3_VERTEX_DTYPES = {flags: wmb3_vertexDtype(flags) for flags in (0, 1, 4, 5, 7, 10, 11, 12, 14)}
+
+WMB3_VERTEX_EXDATA_DTYPES = {
+    0: None, # 0x0 has no ExVertexData
+    1: np.dtype([('packedNormal', '<u8')]),
+    4: np.dtype([('packedNormal', '<u8')]),
+    5: np.dtype([('packedNormal', '<u8'), ('uv3', '<f2', (2,))]),
+    7: np.dtype([('uv2', '<f2', (2,)), ('packedNormal', '<u8')]),
+    10: np.dtype([('uv2', '<f2', (2,)), ('color', 'u1', (4,)), ('packedNormal', '<u8')]),
+    11: np.dtype([('uv2', '<f2', (2,)), ('color', 'u1', (4,)), ('packedNormal', '<u8'), ('uv3', '<f2', (2,))]),
+    12: np.dtype([('packedNormal', '<u8'), ('uv3', '<f2', (2,)), ('uv4', '<f2', (2,)), ('uv5', '<f2', (2,))]),
+    14: np.dtype([('packedNormal', '<u8'), ('uv3', '<f2', (2,)), ('uv4', '<f2', (2,))]),
+}
+
+def structField(records, name):
+    if records is not None and name in records.dtype.names:
+        return records[name]
+    return None
+
 class wmb3_vertexGroup(object):
     """docstring for wmb3_vertexGroup"""
     def __init__(self, wmb_fp, faceSize):
@@ -435,225 +482,138 @@ class wmb3_vertexGroup(object):
         self.vertexGroupHeader = wmb3_vertexHeader(wmb_fp)
 
         self.vertexFlags = self.vertexGroupHeader.vertexFlags    
-        
-        self.vertexArray = [None] * self.vertexGroupHeader.vertexCount
-        wmb_fp.seek(self.vertexGroupHeader.vertexArrayOffset)
-        #print("Seeking to self.vertexGroupHeader.vertexArrayOffset: %s" % hex(self.vertexGroupHeader.vertexArrayOffset))
-        #print("Iterating over self.vertexGroupHeader.vertexCount, length %d" % self.vertexGroupHeader.vertexCount)
-        for vertex_index in range(self.vertexGroupHeader.vertexCount):
-            vertex = wmb3_vertex(wmb_fp, self.vertexGroupHeader.vertexFlags)
-            self.vertexArray[vertex_index] = vertex
-
-        self.vertexesExDataArray = [None] * self.vertexGroupHeader.vertexCount
-        wmb_fp.seek(self.vertexGroupHeader.vertexExDataArrayOffset)
-        #print("Seeking to self.vertexGroupHeader.vertexExDataArrayOffset: %s" % hex(self.vertexGroupHeader.vertexExDataArrayOffset))
-        #print("Iterating over self.vertexGroupHeader.vertexCount, length %d" % self.vertexGroupHeader.vertexCount)
-        for vertexIndex in range(self.vertexGroupHeader.vertexCount):
-            self.vertexesExDataArray[vertexIndex] = wmb3_vertexExData(wmb_fp, self.vertexGroupHeader.vertexFlags)
-
-        self.faceRawArray = [None] * self.vertexGroupHeader.faceCount
-        wmb_fp.seek(self.vertexGroupHeader.faceArrayOffset)
-        #print("Seeking to self.vertexGroupHeader.faceArrayOffset: %s" % hex(self.vertexGroupHeader.faceArrayOffset))
-        #print("Iterating over self.vertexGroupHeader.faceCount, length %d" % self.vertexGroupHeader.faceCount)
-        for face_index in range(self.vertexGroupHeader.faceCount):
-            if faceSize == 2:
-                self.faceRawArray[face_index] = read_uint16(wmb_fp) + 1
-            else:
-                self.faceRawArray[face_index] = read_uint32(wmb_fp) + 1
+        vertexCount = self.vertexGroupHeader.vertexCount
+
+        # whole buffers at once, one record per vertex
+        vertexDtype = WMB3_VERTEX_DTYPES.get(self.vertexFlags) or wmb3_vertexDtype(self.vertexFlags)
+        self.vertexes = load_struct_array(wmb_fp, self.vertexGroupHeader.vertexArrayOffset, vertexCount, vertexDtype)
+        exDataDtype = WMB3_VERTEX_EXDATA_DTYPES.get(self.vertexFlags)
+        self.vertexesExData = None
+        if exDataDtype is not None:
+            self.vertexesExData = load_struct_array(wmb_fp, self.vertexGroupHeader.vertexExDataArrayOffset, vertexCount, exDataDtype)
+
+        # decoded columns
+        self.positions = self.vertexes['position']
+        packedNormals = structField(self.vertexes, 'packedNormal')
+        if packedNormals is None:
+            packedNormals = structField(self.vertexesExData, 'packedNormal')
+        self.normals = decodeWmb3Normals(packedNormals) if packedNormals is not None else None
+        self.boneIndices = structField(self.vertexes, 'boneIndices')
+        self.boneWeights = structField(self.vertexes, 'boneWeights')
+        if self.boneWeights is not None:
+            self.boneWeights = self.boneWeights.astype(np.float64) / 255
+        self.colors = structField(self.vertexes, 'color')
+        if self.colors is None:
+            self.colors = structField(self.vertexesExData, 'color')
+        uv2 = structField(self.vertexes, 'uv2')
+        if uv2 is None:
+            uv2 = structField(self.vertexesExData, 'uv2')
+        self.uvMaps = [
+            self.vertexes['uv'],
+            uv2,
+            structField(self.vertexesExData, 'uv3'),
+            structField(self.vertexesExData, 'uv4'),
+            structField(self.vertexesExData, 'uv5'),
+        ]
+
+        faceDtype = faceSize == 2 and '<u2' or '<u4'
+        self.faceRawArray = load_struct_array(wmb_fp, self.vertexGroupHeader.faceArrayOffset, self.vertexGroupHeader.faceCount, faceDtype).astype(np.int64) + 1
+
+        self._vertexArray = None
+        self._vertexesExDataArray = None
+
+    # object-per-vertex views, only built for callers that still want them
+    @property
+    def vertexArray(self):
+        if self._vertexArray is None:
+            self._vertexArray = vertexRecordView(self.vertexes, len(self.vertexes), wmb3_vertex, self.vertexFlags)
+        return self._vertexArray
+
+    @property
+    def vertexesExDataArray(self):
+        if self._vertexesExDataArray is None:
+            self._vertexesExDataArray = vertexRecordView(self.vertexesExData, len(self.vertexes), wmb3_vertexExData, self.vertexFlags)
+        return self._vertexesExDataArray
+
+class vertexRecordView(object):
+    """Lazy list of per-vertex objects over a structured array, None where there is no data"""
+    def __init__(self, records, count, recordClass, vertex_flags):
+        super(vertexRecordView, self).__init__()
+        self.records = records
+        self.count = count
+        self.recordClass = recordClass
+        self.vertex_flags = vertex_flags
+        self.cache = {}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        index = int(index)
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("vertex index %d out of range" % index)
+        if self.records is None:
+            return None
+        item = self.cache.get(index)
+        if item is None:
+            item = self.recordClass(self.records[index], self.vertex_flags)
+            self.cache[index] = item
+        return item
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
 
 class wmb3_vertex(object):
-    smartRead = SmartIO.makeFormat(
-        SmartIO.float,
-        SmartIO.float,
-        SmartIO.float,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-    smartReadUV2 = SmartIO.makeFormat(
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-
     """docstring for wmb3_vertex"""
-    def __init__(self, wmb_fp, vertex_flags):
+    def __init__(self, record, vertex_flags):
         super(wmb3_vertex, self).__init__()
-        # self.positionX = read_float(wmb_fp)
-        # self.positionY = read_float(wmb_fp)
-        # self.positionZ = read_float(wmb_fp)
-        # self.normalX = read_uint8(wmb_fp) * 2 / 255            
-        # self.normalY = read_uint8(wmb_fp) * 2 / 255    
-        # self.normalZ = read_uint8(wmb_fp) * 2 / 255    
-        # wmb_fp.read(1)                                            
-        # self.textureU = read_float16(wmb_fp)                
-        # self.textureV = read_float16(wmb_fp)
         self.positionX, \
         self.positionY, \
-        self.positionZ, \
+        self.positionZ = record['position'].tolist()
         self.normalX, \
         self.normalY, \
-        self.normalZ, \
-        _, \
+        self.normalZ = (record['normal'][:3].astype(np.float64) * 2 / 255).tolist()
         self.textureU, \
-        self.textureV = wmb3_vertex.smartRead.read(wmb_fp)
-        self.normalX = self.normalX * 2 / 255
-        self.normalY = self.normalY * 2 / 255
-        self.normalZ = self.normalZ * 2 / 255
+        self.textureV = record['uv'].tolist()
 
         if vertex_flags == 0:
-            self.normal = hex(read_uint64(wmb_fp))
+            self.normal = hex(int(record['packedNormal']))
         if vertex_flags in {1, 4, 5, 12, 14}:
-            # self.textureU2 = read_float16(wmb_fp)                
-            # self.textureV2 = read_float16(wmb_fp)
             self.textureU2, \
-            self.textureV2 = wmb3_vertex.smartReadUV2.read(wmb_fp)
+            self.textureV2 = record['uv2'].tolist()
         if vertex_flags in {7, 10, 11}:
-            self.boneIndices = read_uint8_x4(wmb_fp)
-            self.boneWeights = [x / 255 for x in read_uint8_x4(wmb_fp)]
+            self.boneIndices = tuple(record['boneIndices'].tolist())
+            self.boneWeights = [x / 255 for x in record['boneWeights'].tolist()]
         if vertex_flags in {4, 5, 12, 14}:
-            self.color = read_uint8_x4(wmb_fp)
+            self.color = tuple(record['color'].tolist())
 
 class wmb3_vertexExData(object):
-    smartRead5 = SmartIO.makeFormat(
-        SmartIO.uint64,
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-    smartRead7 = SmartIO.makeFormat(
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.uint64,
-    )
-    smartRead10 = SmartIO.makeFormat(
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint64,
-    )
-    smartRead11 = SmartIO.makeFormat(
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint8,
-        SmartIO.uint64,
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-    smartRead12 = SmartIO.makeFormat(
-        SmartIO.uint64,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-    smartRead14 = SmartIO.makeFormat(
-        SmartIO.uint64,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-        SmartIO.float16,
-    )
-
     """docstring for wmb3_vertexExData"""
-    def __init__(self, wmb_fp, vertex_flags):
+    def __init__(self, record, vertex_flags):
         super(wmb3_vertexExData, self).__init__()
         
-        #0x0 has no ExVertexData
-
-        if vertex_flags in {1, 4}: #0x1, 0x4
-            self.normal = hex(read_uint64(wmb_fp))
-
-        elif vertex_flags == 5: #0x5
-            # self.normal = hex(read_uint64(wmb_fp))
-            # self.textureU3 = read_float16(wmb_fp)                
-            # self.textureV3 = read_float16(wmb_fp)
-            self.normal, \
-            self.textureU3, \
-            self.textureV3 = wmb3_vertexExData.smartRead5.read(wmb_fp)
-            self.normal = hex(self.normal)
-
-        elif vertex_flags == 7: #0x7
-            # self.textureU2 = read_float16(wmb_fp)                
-            # self.textureV2 = read_float16(wmb_fp)
-            # self.normal = hex(read_uint64(wmb_fp))
-            self.textureU2, \
-            self.textureV2, \
-            self.normal = wmb3_vertexExData.smartRead7.read(wmb_fp)
-            self.normal = hex(self.normal)
-
-        elif vertex_flags == 10: #0xa
-            # self.textureU2 = read_float16(wmb_fp)                
-            # self.textureV2 = read_float16(wmb_fp)
-            # self.color = read_uint8_x4(wmb_fp)
-            # self.normal = hex(read_uint64(wmb_fp))
-            self.color = [0, 0, 0, 0]
-            self.textureU2, \
-            self.textureV2, \
-            self.color[0], \
-            self.color[1], \
-            self.color[2], \
-            self.color[3], \
-            self.normal = wmb3_vertexExData.smartRead10.read(wmb_fp)
-            self.normal = hex(self.normal)
-
-        elif vertex_flags == 11: #0xb
-            # self.textureU2 = read_float16(wmb_fp)                
-            # self.textureV2 = read_float16(wmb_fp)
-            # self.color = read_uint8_x4(wmb_fp)
-            # self.normal = hex(read_uint64(wmb_fp))
-            # self.textureU3 = read_float16(wmb_fp)                
-            # self.textureV3 = read_float16(wmb_fp)
-            self.color = [0, 0, 0, 0]
+        fields = record.dtype.names
+        if 'packedNormal' in fields:
+            self.normal = hex(int(record['packedNormal']))
+        if 'uv2' in fields:
             self.textureU2, \
-            self.textureV2, \
-            self.color[0], \
-            self.color[1], \
-            self.color[2], \
-            self.color[3], \
-            self.normal, \
+            self.textureV2 = record['uv2'].tolist()
+        if 'color' in fields:
+            self.color = record['color'].tolist()
+        if 'uv3' in fields:
             self.textureU3, \
-            self.textureV3 = wmb3_vertexExData.smartRead11.read(wmb_fp)
-            self.normal = hex(self.normal)
-
-        elif vertex_flags == 12: #0xc
-            # self.normal = hex(read_uint64(wmb_fp))
-            # self.textureU3 = read_float16(wmb_fp)                
-            # self.textureV3 = read_float16(wmb_fp)
-            # self.textureU4 = read_float16(wmb_fp)                
-            # self.textureV4 = read_float16(wmb_fp)
-            # self.textureU5 = read_float16(wmb_fp)                
-            # self.textureV5 = read_float16(wmb_fp)
-            self.normal, \
-            self.textureU3, \
-            self.textureV3, \
+            self.textureV3 = record['uv3'].tolist()
+        if 'uv4' in fields:
             self.textureU4, \
-            self.textureV4, \
+            self.textureV4 = record['uv4'].tolist()
+        if 'uv5' in fields:
             self.textureU5, \
-            self.textureV5 = wmb3_vertexExData.smartRead12.read(wmb_fp)
-            self.normal = hex(self.normal)
-
-        elif vertex_flags == 14: #0xe
-            # self.normal = hex(read_uint64(wmb_fp))
-            # self.textureU3 = read_float16(wmb_fp)                
-            # self.textureV3 = read_float16(wmb_fp)
-            # self.textureU4 = read_float16(wmb_fp)                
-            # self.textureV4 = read_float16(wmb_fp)
-            self.normal, \
-            self.textureU3, \
-            self.textureV3, \
-            self.textureU4, \
-            self.textureV4 = wmb3_vertexExData.smartRead14.read(wmb_fp)
-            self.normal = hex(self.normal)
+            self.textureV5 = record['uv5'].tolist()
 
 class wmb3_worldData(object):
     """docstring for wmb3_unknownWorldData"""
@@ -888,6 +848,47 @@ class wmb4_texture(object):
         self.flags = read_uint32(wmb_fp)
         self.id = "%08x" % read_uint32(wmb_fp)
 
+# NumPy layouts of the WMB4 vertex buffers: vertexFormat -> (vertex, exData).
+# Every vertex starts with position, UV, packed normal and tangent.
+def wmb4_vertexDtype(*fields):
+    return np.dtype([
+        ('position', '<f4', (3,)),
+        ('uv', '<f2', (2,)),
+        ('normal', '<u4'),
+        ('tangent', 'u1', (4,)),
+    ] + list(fields))
+
+WMB4_VERTEX_DTYPES = {
+    0x10337: (
+        wmb4_vertexDtype(('boneIndices', 'u1', (4,)), ('boneWeights', 'u1', (4,))),
+        np.dtype([('color', 'u1', (4,)), ('uv2', '<f2', (2,))]),
+    ),
+    0x00337: (
+        wmb4_vertexDtype(('boneIndices', 'u1', (4,)), ('boneWeights', 'u1', (4,))),
+        np.dtype([('color', 'u1', (4,)), ('uv2', '<f2', (2,))]),
+    ),
+    0x10137: (
+        wmb4_vertexDtype(('boneIndices', 'u1', (4,)), ('boneWeights', 'u1', (4,))),
+        np.dtype([('color', 'u1', (4,))]),
+    ),
+    0x00137: (
+        wmb4_vertexDtype(('boneIndices', 'u1', (4,)), ('boneWeights', 'u1', (4,))),
+        None,
+    ),
+    0x10307: (
+        wmb4_vertexDtype(('color', 'u1', (4,)), ('uv2', '<f2', (2,))),
+        None,
+    ),
+    0x10107: (
+        wmb4_vertexDtype(('color', 'u1', (4,))),
+        None,
+    ),
+    0x00107: (
+        wmb4_vertexDtype(),
+        None,
+    ),
+}
+
 class wmb4_vertexGroup(object):
     """docstring for wmb4_vertexGroup"""
     def size(a):
@@ -911,165 +912,86 @@ class wmb4_vertexGroup(object):
             print(" unknown                 " + hex(self.unknownPointer).rjust(10, " ") + str(self.unknownCount).rjust(6, " "))
             print(" faceIndexes             " + hex(self.faceIndexesPointer).rjust(10, " ") + str(self.faceIndexesCount).rjust(6, " "))
         
+        if vertexFormat not in WMB4_VERTEX_DTYPES:
+            raise ValueError(f"Unknown WMB4 vertex format {hex(vertexFormat)}! Known formats: {', '.join(hex(fmt) for fmt in WMB4_VERTEX_DTYPES)}")
+        vertexDtype, exDataDtype = WMB4_VERTEX_DTYPES[vertexFormat]
+        self.vertexFormat = vertexFormat
         
-        self.vertexArray = load_data_array(wmb_fp, self.vertexesDataPointer, self.vertexesCount, wmb4_vertex, vertexFormat)
+        self.vertexes = load_struct_array(wmb_fp, self.vertexesDataPointer, self.vertexesCount, vertexDtype)
+        self.vertexesExData = None
+        if exDataDtype is not None:
+            self.vertexesExData = load_struct_array(wmb_fp, self.extraVertexesDataPointer, self.vertexesCount, exDataDtype)
         
-        if vertexFormat in {0x10337, 0x10137, 0x00337}:
-            self.vertexesExDataArray = load_data_array(wmb_fp, self.extraVertexesDataPointer, self.vertexesCount, wmb4_vertexExData, vertexFormat)
-        else:
-            self.vertexesExDataArray = [None] * self.vertexesCount
+        # decoded columns
+        self.positions = self.vertexes['position']
+        self.normals = decodeWmb4Normals(self.vertexes['normal'])
+        self.tangents = self.vertexes['tangent'].astype(np.float64) * 2 / 255
+        self.boneIndices = structField(self.vertexes, 'boneIndices')
+        self.boneWeights = structField(self.vertexes, 'boneWeights')
+        if self.boneWeights is not None:
+            self.boneWeights = self.boneWeights.astype(np.float64) / 255
+        self.colors = structField(self.vertexes, 'color')
+        if self.colors is None:
+            self.colors = structField(self.vertexesExData, 'color')
+        uv2 = structField(self.vertexes, 'uv2')
+        if uv2 is None:
+            uv2 = structField(self.vertexesExData, 'uv2')
+        self.uvMaps = [
+            self.vertexes['uv'].astype(np.float32),
+            uv2.astype(np.float32) if uv2 is not None else None,
+            None,
+            None,
+            None,
+        ]
         
         self.unknownArray = load_data_array(wmb_fp, self.unknownPointer, self.unknownCount, uint32)
         # mercifully empty
         
-        self.faceRawArray = load_data_array(wmb_fp, self.faceIndexesPointer, self.faceIndexesCount, uint16)
+        self.faceRawArray = load_struct_array(wmb_fp, self.faceIndexesPointer, self.faceIndexesCount, '<u2').astype(np.int64)
         
         self.vertexFlags = None # <trollface>
+        
+        self._vertexArray = None
+        self._vertexesExDataArray = None
+
+    # object-per-vertex views, only built for callers that still want them
+    @property
+    def vertexArray(self):
+        if self._vertexArray is None:
+            self._vertexArray = vertexRecordView(self.vertexes, len(self.vertexes), wmb4_vertex, self.vertexFormat)
+        return self._vertexArray
+
+    @property
+    def vertexesExDataArray(self):
+        if self._vertexesExDataArray is None:
+            self._vertexesExDataArray = vertexRecordView(self.vertexesExData, len(self.vertexes), wmb4_vertexExData, self.vertexFormat)
+        return self._vertexesExDataArray
 
 class wmb4_vertex(object):
-    smartRead10337 = SmartIO.makeFormat( # 10137, 00337, 00137 same
-        SmartIO.float,   # x
-        SmartIO.float,   # y
-        SmartIO.float,   # z
-        SmartIO.float16, # texture u
-        SmartIO.float16, # texture v
-        SmartIO.uint8,   # normal x
-        SmartIO.uint8,   # normal y
-        SmartIO.uint8,   # normal z
-        SmartIO.uint8,   # normal padding
-        SmartIO.uint8,   # tangent x
-        SmartIO.uint8,   # tangent y
-        SmartIO.uint8,   # tangent z
-        SmartIO.uint8,   # tangent d
-        SmartIO.uint8, SmartIO.uint8, SmartIO.uint8, SmartIO.uint8, # boneIndexes
-        SmartIO.uint8, SmartIO.uint8, SmartIO.uint8, SmartIO.uint8  # boneWeights
-    )
-    smartRead10307 = SmartIO.makeFormat(
-        SmartIO.float,   # x
-        SmartIO.float,   # y
-        SmartIO.float,   # z
-        SmartIO.float16, # texture u
-        SmartIO.float16, # texture v
-        SmartIO.uint8,   # normal x
-        SmartIO.uint8,   # normal y
-        SmartIO.uint8,   # normal z
-        SmartIO.uint8,   # normal padding
-        SmartIO.uint8,   # tangent x
-        SmartIO.uint8,   # tangent y
-        SmartIO.uint8,   # tangent z
-        SmartIO.uint8,   # tangent d
-        SmartIO.uint32,  # color
-        SmartIO.float16, # texture2 u
-        SmartIO.float16  # texture2 v
-    )
-    smartRead10107 = SmartIO.makeFormat(
-        SmartIO.float,   # x
-        SmartIO.float,   # y
-        SmartIO.float,   # z
-        SmartIO.float16, # texture u
-        SmartIO.float16, # texture v
-        SmartIO.uint8,   # normal x
-        SmartIO.uint8,   # normal y
-        SmartIO.uint8,   # normal z
-        SmartIO.uint8,   # normal padding
-        SmartIO.uint8,   # tangent x
-        SmartIO.uint8,   # tangent y
-        SmartIO.uint8,   # tangent z
-        SmartIO.uint8,   # tangent d
-        SmartIO.uint32   # color
-    )
-    smartRead00107 = SmartIO.makeFormat(
-        SmartIO.float,   # x
-        SmartIO.float,   # y
-        SmartIO.float,   # z
-        SmartIO.float16, # texture u
-        SmartIO.float16, # texture v
-        SmartIO.uint8,   # normal x
-        SmartIO.uint8,   # normal y
-        SmartIO.uint8,   # normal z
-        SmartIO.uint8,   # normal padding
-        SmartIO.uint8,   # tangent x
-        SmartIO.uint8,   # tangent y
-        SmartIO.uint8,   # tangent z
-        SmartIO.uint8,   # tangent d
-    )
-    
     """docstring for wmb4_vertex"""
-    def read(self, wmb_fp, vertexFormat):
-        if (vertexFormat & 0x137) == 0x137: # 10337, 10137, 00337, 00137, all match this
-            # everything I did with the indexes is horrible here todo fix
-            boneIndex = [0] * 4
-            boneWeight = [0] * 4
-            self.positionX, self.positionY, self.positionZ, \
-            self.textureU, self.textureV, \
-            self.normalX, self.normalY, self.normalZ, _, \
-            self.tangentX, self.tangentY, self.tangentZ, self.tangentD, \
-            boneIndex[0], boneIndex[1], boneIndex[2], boneIndex[3], \
-            boneWeight[0], boneWeight[1], boneWeight[2], boneWeight[3] \
-            = wmb4_vertex.smartRead10337.read(wmb_fp)
-            self.boneIndices = boneIndex
-            self.boneWeights = [weight/255 for weight in boneWeight]
-            # All these values are discarded??
-            self.normalX *= 2/255
-            self.normalY *= 2/255
-            self.normalZ *= 2/255
-            self.tangentX *= 2/255
-            self.tangentY *= 2/255
-            self.tangentZ *= 2/255
-            self.tangentD *= 2/255
-            return
+    def __init__(self, record, vertexFormat):
+        super(wmb4_vertex, self).__init__()
+        self.positionX, self.positionY, self.positionZ = record['position'].tolist()
+        self.textureU, self.textureV = record['uv'].tolist()
+        self.normalX, self.normalY, self.normalZ = decodeWmb4Normals(record['normal']).tolist()
+        self.tangentX, self.tangentY, self.tangentZ, self.tangentD = (record['tangent'].astype(np.float64) * 2 / 255).tolist()
         
-        elif vertexFormat == 0x10307:
-            self.positionX, self.positionY, self.positionZ, \
-            self.textureU, self.textureV, \
-            self.normalX, self.normalY, self.normalZ, _, \
-            self.tangentX, self.tangentY, self.tangentZ, self.tangentD, \
-            self.color, \
-            self.textureU2, self.textureV2 \
-            = wmb4_vertex.smartRead10307.read(wmb_fp)
-            
-            self.color = list(struct.unpack("<BBBB", struct.pack("<I", self.color))) # byte me
-            return
-            
-        elif vertexFormat == 0x10107:
-            self.positionX, self.positionY, self.positionZ, \
-            self.textureU, self.textureV, \
-            self.normalX, self.normalY, self.normalZ, _, \
-            self.tangentX, self.tangentY, self.tangentZ, self.tangentD, \
-            self.color \
-            = wmb4_vertex.smartRead10107.read(wmb_fp)
-            
-            self.color = list(struct.unpack("<BBBB", struct.pack("<I", self.color))) # byte me
-            return
-            
-        elif vertexFormat == 0x00107:
-            self.positionX, self.positionY, self.positionZ, \
-            self.textureU, self.textureV, \
-            self.normalX, self.normalY, self.normalZ, _, \
-            self.tangentX, self.tangentY, self.tangentZ, self.tangentD \
-            = wmb4_vertex.smartRead00107.read(wmb_fp)
-            return
-            
-        else:
-            print("God fucking DAMMIT Kris, the vertex format is %s." % hex(vertexFormat))
-            return
+        fields = record.dtype.names
+        if 'boneIndices' in fields:
+            self.boneIndices = record['boneIndices'].tolist()
+            self.boneWeights = [weight/255 for weight in record['boneWeights'].tolist()]
+        if 'color' in fields:
+            self.color = record['color'].tolist()
+        if 'uv2' in fields:
+            self.textureU2, self.textureV2 = record['uv2'].tolist()
 
 class wmb4_vertexExData(object):
     """docstring for wmb4_vertexExData"""
-    def read(self, wmb_fp, vertexFormat):
-        if (vertexFormat & 0x337) == 0x337: # both 10337 and 00337
-            self.color = list(read_uint8_x4(wmb_fp))
-            self.textureU2 = read_float16(wmb_fp)
-            self.textureV2 = read_float16(wmb_fp)
-            return
-            
-        elif vertexFormat == 0x10137:
-            self.color = list(read_uint8_x4(wmb_fp))
-            return
-        
-        else:
-            print("How the FUCK did you get here, the function call is *directly* inside a check for vertexFormat matching... Somehow, it's", hex(vertexFormat))
-            return
+    def __init__(self, record, vertexFormat):
+        super(wmb4_vertexExData, self).__init__()
+        self.color = record['color'].tolist()
+        if 'uv2' in record.dtype.names: # both 10337 and 00337
+            self.textureU2, self.textureV2 = record['uv2'].tolist()
 
 class int16(object):
     """
@@ -1126,15 +1048,269 @@ class filestring(object):
     def read(self, wmb_fp):
         self.val = read_string(wmb_fp)
 
-class WMB(object):
-    """docstring for WMB"""
-    def __init__(self, wmb_file, only_extract):
-        super(WMB, self).__init__()
+class WMBFile(object):
+    """
+    Lazily parsed WMB3/WMB4. Only the header is read when opening,
+    every section (bones, boneSets, materials, vertexGroups, meshes, batches, ...)
+    is decoded when it is first accessed and then cached.
+    """
+    def __init__(self, wmb_fp=None, scr_mode=False, wmbinscr_name=""):
+        if wmb_fp is not None:
+            self.open(wmb_fp, scr_mode, wmbinscr_name)
+
+    def open(self, wmb_fp, scr_mode=False, wmbinscr_name=""):
+        if not isinstance(wmb_fp, BinaryReader):
+            wmb_fp = BinaryReader.fromFile(wmb_fp)
+        self.wmb_fp = wmb_fp
+        self.scr_mode = scr_mode
+        self.wmbinscr_name = wmbinscr_name
+        self.wmb_header = WMB_Header(wmb_fp)
+        self.wmb4 = self.wmb_header.magicNumber == b'WMB4'
+        if self.wmb_header.magicNumber not in {b'WMB3', b'WMB4'}:
+            print("You madman! This isn't WMB3 or WMB4, but %s!" % self.wmb_header.magicNumber.decode("ascii"))
+        self.hasBone = self.wmb_header.boneCount > 0
+        self.hasColTreeNodes = not self.wmb4 and self.wmb_header.colTreeNodesPointer > 0
+        self.hasUnknownWorldData = not self.wmb4 and self.wmb_header.unknownWorldDataPointer > 0
+
+    @cached_property
+    def boneArray(self):
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            if DEBUG_BONE_PRINT:
+                print()
+                print("Bones?", self.hasBone)
+                if self.hasBone:
+                    print("Enjoy the debug bone data:")
+            return load_data_array(wmb_fp, self.wmb_header.bonePointer, self.wmb_header.boneCount, wmb4_bone, None, True)
+
+        wmb_fp.seek(self.wmb_header.bonePointer)
+        boneArray = []
+        for boneIndex in range(self.wmb_header.boneCount):
+            boneArray.append(wmb3_bone(wmb_fp,boneIndex))
+        return boneArray
+
+    @cached_property
+    def boneTranslateTable(self):
+        """[firstLevel, secondLevel, thirdLevel], None if the WMB4 has none"""
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            if DEBUG_BITT_PRINT:
+                print()
+                print("The boneIndexTranslateTable? I got no debug info besides what's in the header.")
+            boneTranslateTable = load_data(wmb_fp, self.wmb_header.boneTranslateTablePointer, wmb4_boneTranslateTable)
+            if boneTranslateTable is None:
+                return None
+            return [boneTranslateTable.firstLevel, boneTranslateTable.secondLevel, boneTranslateTable.thirdLevel]
+
+        firstLevel = []
+        secondLevel = []
+        thirdLevel = []
+        if self.wmb_header.boneTranslateTablePointer > 0:
+            wmb_fp.seek(self.wmb_header.boneTranslateTablePointer)
+            for entry in range(16):
+                firstLevel.append(read_uint16(wmb_fp))
+                if firstLevel[-1] == 65535:
+                    firstLevel[-1] = -1
+
+            firstLevel_Entry_Count = 0
+            for entry in firstLevel:
+                if entry != -1:
+                    firstLevel_Entry_Count += 1
+
+            for entry in range(firstLevel_Entry_Count * 16):
+                secondLevel.append(read_uint16(wmb_fp))
+                if secondLevel[-1] == 65535:
+                    secondLevel[-1] = -1
+
+            secondLevel_Entry_Count = 0
+            for entry in secondLevel:
+                if entry != -1:
+                    secondLevel_Entry_Count += 1
+
+            for entry in range(secondLevel_Entry_Count * 16):
+                thirdLevel.append(read_uint16(wmb_fp))
+                if thirdLevel[-1] == 65535:
+                    thirdLevel[-1] = -1
+        return [firstLevel, secondLevel, thirdLevel]
+
+    def getBoneTranslateLevel(self, level):
+        if self.boneTranslateTable is None:
+            raise AttributeError("WMB has no boneIndexTranslateTable")
+        return self.boneTranslateTable[level]
+
+    firstLevel = property(lambda self: self.getBoneTranslateLevel(0))
+    secondLevel = property(lambda self: self.getBoneTranslateLevel(1))
+    thirdLevel = property(lambda self: self.getBoneTranslateLevel(2))
+
+    @cached_property
+    def materialArray(self):
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            if DEBUG_MATERIAL_PRINT:
+                print()
+                print("Material info (specifically textures, not shaders; not yet):")
+            materialArray = load_data_array(wmb_fp, self.wmb_header.materialPointer, self.wmb_header.materialCount, wmb4_material)
+            # WMB4 materials are named after the meshes using them
+            for mesh in self.meshArray:
+                for materialIndex, material in enumerate(mesh.materials):
+                    materialArray[material].materialName = mesh.name + "-%d" % materialIndex
+            return materialArray
+
+        materialArray = []
+        for materialIndex in range(self.wmb_header.materialCount):
+            wmb_fp.seek(self.wmb_header.materialPointer + materialIndex * 0x30)
+            material = wmb3_material(wmb_fp)
+            materialArray.append(material)
+        return materialArray
+
+    @cached_property
+    def textureArray(self):
+        if not self.wmb4:
+            raise AttributeError("Only WMB4 has a global texture array")
+        if DEBUG_TEXTURE_PRINT:
+            print()
+            print("Just have the textures array if you care so bad")
+        textureArray = load_data_array(self.wmb_fp, self.wmb_header.texturePointer, self.wmb_header.textureCount, wmb4_texture)
+        if DEBUG_TEXTURE_PRINT:
+            print([(item.id, hex(item.flags)) for item in textureArray])
+        return textureArray
+
+    @cached_property
+    def vertexGroupArray(self):
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            return load_data_array(wmb_fp, self.wmb_header.vertexGroupPointer, self.wmb_header.vertexGroupCount, wmb4_vertexGroup, self.wmb_header.vertexFormat)
+
+        vertexGroupArray = []
+        for vertexGroupIndex in range(self.wmb_header.vertexGroupCount):
+            wmb_fp.seek(self.wmb_header.vertexGroupPointer + 0x30 * vertexGroupIndex)
+            vertexGroup = wmb3_vertexGroup(wmb_fp,((self.wmb_header.flags & 0x8) and 4 or 2))
+            vertexGroupArray.append(vertexGroup)
+        return vertexGroupArray
+
+    @cached_property
+    def meshArray(self):
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            if DEBUG_MESH_PRINT:
+                print()
+                print("Meshes (batches separated by batchGroup, naturally):")
+            return load_data_array(wmb_fp, self.wmb_header.meshPointer, self.wmb_header.meshCount, wmb4_mesh, [self.scr_mode, self.wmbinscr_name])
+
+        meshArray = []
+        wmb_fp.seek(self.wmb_header.meshPointer)
+        for meshIndex in range(self.wmb_header.meshCount):
+            mesh = wmb3_mesh(wmb_fp)
+            meshArray.append(mesh)
+        return meshArray
+
+    @cached_property
+    def meshGroupInfoArray(self):
+        meshGroupInfoArray = []
+        for meshGroupInfoArrayIndex in range(self.wmb_header.meshGroupInfoCount):
+            self.wmb_fp.seek(self.wmb_header.meshGroupInfoPointer + meshGroupInfoArrayIndex * 0x14)
+            meshGroupInfo = wmb3_meshGroupInfo(self.wmb_fp)
+            meshGroupInfoArray.append(meshGroupInfo)
+        return meshGroupInfoArray
+
+    @cached_property
+    def meshGroupArray(self):
+        meshGroupArray = []
+        for meshGroupIndex in range(self.wmb_header.meshGroupCount):
+            self.wmb_fp.seek(self.wmb_header.meshGroupPointer + meshGroupIndex * 0x2c)
+            meshGroup = wmb3_meshGroup(self.wmb_fp)
+            meshGroupArray.append(meshGroup)
+        return meshGroupArray
+
+    @cached_property
+    def boneMap(self):
+        if self.wmb4:
+            return None # <trollface>
+        self.wmb_fp.seek(self.wmb_header.boneMapPointer)
+        boneMap = []
+        for index in range(self.wmb_header.boneMapCount):
+            boneMap.append(read_uint32(self.wmb_fp))
+        return boneMap
+
+    @cached_property
+    def boneSetArray(self):
+        wmb_fp = self.wmb_fp
+        if self.wmb4:
+            if DEBUG_BONESET_PRINT:
+                print()
+                print("Bonesets:")
+            boneSetArrayTrue = load_data_array(wmb_fp, self.wmb_header.boneSetPointer, self.wmb_header.boneSetCount, wmb4_boneSet)
+            # is this cheating
+            return [item.boneSet for item in boneSetArrayTrue]
+
+        wmb_fp.seek(self.wmb_header.boneSetPointer)
+        return wmb3_boneSet(wmb_fp, self.wmb_header.boneSetCount).boneSetArray
+
+    @cached_property
+    def colTreeNodes(self):
+        if not self.hasColTreeNodes:
+            raise AttributeError("WMB has no colTreeNodes")
+        self.wmb_fp.seek(self.wmb_header.colTreeNodesPointer)
+        colTreeNodes = []
+        for index in range(self.wmb_header.colTreeNodesCount):
+            colTreeNodes.append(wmb3_colTreeNode(self.wmb_fp))
+        return colTreeNodes
+
+    @cached_property
+    def unknownWorldDataArray(self):
+        if not self.hasUnknownWorldData:
+            raise AttributeError("WMB has no unknownWorldData")
+        self.wmb_fp.seek(self.wmb_header.unknownWorldDataPointer)
+        unknownWorldDataArray = []
+        for index in range(self.wmb_header.unknownWorldDataCount):
+            unknownWorldDataArray.append(wmb3_worldData(self.wmb_fp))
+        return unknownWorldDataArray
+
+    @cached_property
+    def batchDescription(self):
+        if DEBUG_BATCHSUPPLEMENT_PRINT:
+            print()
+            print("Batch supplement data:")
+        return load_data(self.wmb_fp, self.wmb_header.batchDescriptionPointer, wmb4_batchDescription)
+
+    @cached_property
+    def batchArray(self):
+        if DEBUG_BATCHES_PRINT:
+            print()
+            print("Batches:")
+            print("vertexGroup vertexRange indexRange")
+        batchArray = load_data_array(self.wmb_fp, self.wmb_header.batchPointer, self.wmb_header.batchCount, wmb4_batch)
+        # hack
+        for dataNum, batchDataSubgroup in enumerate(self.batchDescription.batchData):
+            for batchData in batchDataSubgroup:
+                batchArray[batchData.batchIndex].batchGroup = dataNum
+        return batchArray
+
+    @cached_property
+    def batchDataArray(self):
+        batchDataArray = []
+        for batchDataSubgroup in self.batchDescription.batchData:
+            batchDataArray.extend(batchDataSubgroup)
+        return batchDataArray
+
+class WMB(WMBFile):
+    """WMBFile plus the WTA/WTP next to it, opened from a path or from already open files"""
+    def __init__(self, wmb_file, only_extract, write_materials_json=True, wta_file=None, wtp_file=None):
         wmb_fp = 0
         wta_fp = 0
         wtp_fp = 0
         self.wta = 0
 
+        if not isinstance(wmb_file, str):
+            # already open files, e.g. straight from a DatArchive
+            if wtp_file:
+                self.wtp_fp = wtp_file
+            self.wta = None
+            if wta_file:
+                self.wta = WTA(BinaryReader.fromFile(wta_file))
+            self.read(BinaryReader.fromFile(wmb_file), only_extract, write_materials_json)
+            return
+
         wmb_path = wmb_file
         if not os.path.exists(wmb_path):
             wmb_path = wmb_file.replace('.dat','.dtt')
@@ -1156,10 +1332,10 @@ class WMB(object):
                 pass # todo: load this somewhere other files can get it
         if os.path.exists(wtp_path):    
             print('open wtp file')
-            self.wtp_fp = open(wtp_path,'rb')
+            self.wtp_fp = BinaryReader.open(wtp_path)
         if os.path.exists(wta_path):
             print('open wta file')
-            wta_fp = open(wta_path,'rb')
+            wta_fp = BinaryReader.open(wta_path)
         
         self.wta = None
         if wta_fp:
@@ -1167,224 +1343,19 @@ class WMB(object):
             wta_fp.close()
 
         if os.path.exists(wmb_path):
-            wmb_fp = open(wmb_path, "rb")
+            wmb_fp = BinaryReader.load(wmb_path)
         else:
             print("DTT/DAT does not contain WMB file.")
             print("Last attempted path:", wmb_path)
             return
-        
-        
-        
-        self.wmb_header = WMB_Header(wmb_fp)
-        if self.wmb_header.magicNumber == b'WMB3':
-            self.hasBone = False
-            if self.wmb_header.boneCount > 0:
-                self.hasBone = True
-
-            wmb_fp.seek(self.wmb_header.bonePointer)
-            #print("Seeking to self.wmb_header.bonePointer: %s" % hex(self.wmb_header.bonePointer))
-            self.boneArray = []
-            #print("Iterating over self.wmb_header.boneCount, length %d" % self.wmb_header.boneCount)
-            for boneIndex in range(self.wmb_header.boneCount):
-                self.boneArray.append(wmb3_bone(wmb_fp,boneIndex))
-            
-            # indexBoneTranslateTable
-            self.firstLevel = []
-            self.secondLevel = []
-            self.thirdLevel = []
-            if self.wmb_header.boneTranslateTablePointer > 0:
-                wmb_fp.seek(self.wmb_header.boneTranslateTablePointer)
-                #print("Seeking to self.wmb_header.boneTranslateTablePointer: %s" % hex(self.wmb_header.boneTranslateTablePointer))
-                #print("Iterating over 16, length %d" % 16)
-                for entry in range(16):
-                    self.firstLevel.append(read_uint16(wmb_fp))
-                    if self.firstLevel[-1] == 65535:
-                        self.firstLevel[-1] = -1
-
-                firstLevel_Entry_Count = 0
-                for entry in self.firstLevel:
-                    if entry != -1:
-                        firstLevel_Entry_Count += 1
-
-                #print("Iterating over firstLevel_Entry_Count * 16, length %d" % firstLevel_Entry_Count * 16)
-                for entry in range(firstLevel_Entry_Count * 16):
-                    self.secondLevel.append(read_uint16(wmb_fp))
-                    if self.secondLevel[-1] == 65535:
-                        self.secondLevel[-1] = -1
-
-                secondLevel_Entry_Count = 0
-                for entry in self.secondLevel:
-                    if entry != -1:
-                        secondLevel_Entry_Count += 1
-
-                #print("Iterating over secondLevel_Entry_Count * 16, length %d" % secondLevel_Entry_Count * 16)
-                for entry in range(secondLevel_Entry_Count * 16):
-                    self.thirdLevel.append(read_uint16(wmb_fp))
-                    if self.thirdLevel[-1] == 65535:
-                        self.thirdLevel[-1] = -1
-
-
-                wmb_fp.seek(self.wmb_header.boneTranslateTablePointer)
-                #print("Seeking to self.wmb_header.boneTranslateTablePointer: %s" % hex(self.wmb_header.boneTranslateTablePointer))
-                unknownData1Array = []
-                #print("Iterating over self.wmb_header.boneTranslateTableSize, length %d" % self.wmb_header.boneTranslateTableSize)
-                for i in range(self.wmb_header.boneTranslateTableSize):
-                    unknownData1Array.append(read_uint8(wmb_fp))
-
-            self.materialArray = []
-            #print("Iterating over self.wmb_header.materialCount, length %d" % self.wmb_header.materialCount)
-            for materialIndex in range(self.wmb_header.materialCount):
-                wmb_fp.seek(self.wmb_header.materialPointer + materialIndex * 0x30)
-                #print("Seeking to self.wmb_header.materialPointer + materialIndex * 0x30: %s" % hex(self.wmb_header.materialPointer + materialIndex * 0x30))
-                material = wmb3_material(wmb_fp)
-                self.materialArray.append(material)
-
-            if only_extract:
-                return
-
-            self.vertexGroupArray = []
-            #print("Iterating over self.wmb_header.vertexGroupCount, length %d" % self.wmb_header.vertexGroupCount)
-            for vertexGroupIndex in range(self.wmb_header.vertexGroupCount):
-                wmb_fp.seek(self.wmb_header.vertexGroupPointer + 0x30 * vertexGroupIndex)
-                #print("Seeking to self.wmb_header.vertexGroupPointer + 0x30 * vertexGroupIndex: %s" % hex(self.wmb_header.vertexGroupPointer + 0x30 * vertexGroupIndex))
-
-                vertexGroup = wmb3_vertexGroup(wmb_fp,((self.wmb_header.flags & 0x8) and 4 or 2))
-                self.vertexGroupArray.append(vertexGroup)
-
-            self.meshArray = []
-            wmb_fp.seek(self.wmb_header.meshPointer)
-            #print("Seeking to self.wmb_header.meshPointer: %s" % hex(self.wmb_header.meshPointer))
-            #print("Iterating over self.wmb_header.meshCount, length %d" % self.wmb_header.meshCount)
-            for meshIndex in range(self.wmb_header.meshCount):
-                mesh = wmb3_mesh(wmb_fp)
-                self.meshArray.append(mesh)
-
-            self.meshGroupInfoArray = []
-            #print("Iterating over self.wmb_header.meshGroupInfoCount, length %d" % self.wmb_header.meshGroupInfoCount)
-            for meshGroupInfoArrayIndex in range(self.wmb_header.meshGroupInfoCount):
-                wmb_fp.seek(self.wmb_header.meshGroupInfoPointer + meshGroupInfoArrayIndex * 0x14)
-                #print("Seeking to self.wmb_header.meshGroupInfoPointer + meshGroupInfoArrayIndex * 0x14: %s" % hex(self.wmb_header.meshGroupInfoPointer + meshGroupInfoArrayIndex * 0x14))
-                meshGroupInfo= wmb3_meshGroupInfo(wmb_fp)
-                self.meshGroupInfoArray.append(meshGroupInfo)
-
-            self.meshGroupArray = []
-            #print("Iterating over self.wmb_header.meshGroupCount, length %d" % self.wmb_header.meshGroupCount)
-            for meshGroupIndex in range(self.wmb_header.meshGroupCount):
-                wmb_fp.seek(self.wmb_header.meshGroupPointer + meshGroupIndex * 0x2c)
-                #print("Seeking to self.wmb_header.meshGroupPointer + meshGroupIndex * 0x2c: %s" % hex(self.wmb_header.meshGroupPointer + meshGroupIndex * 0x2c))
-                meshGroup = wmb3_meshGroup(wmb_fp)
-                
-                self.meshGroupArray.append(meshGroup)
-
-            wmb_fp.seek(self.wmb_header.boneMapPointer)
-            #print("Seeking to self.wmb_header.boneMapPointer: %s" % hex(self.wmb_header.boneMapPointer))
-            self.boneMap = []
-            #print("Iterating over self.wmb_header.boneMapCount, length %d" % self.wmb_header.boneMapCount)
-            for index in range(self.wmb_header.boneMapCount):
-                self.boneMap.append(read_uint32(wmb_fp))
-            wmb_fp.seek(self.wmb_header.boneSetPointer)
-            #print("Seeking to self.wmb_header.boneSetPointer: %s" % hex(self.wmb_header.boneSetPointer))
-            self.boneSetArray = wmb3_boneSet(wmb_fp, self.wmb_header.boneSetCount).boneSetArray
-
-            # colTreeNode
-            self.hasColTreeNodes = False
-            if self.wmb_header.colTreeNodesPointer > 0:
-                self.hasColTreeNodes = True
-                self.colTreeNodes = []
-                wmb_fp.seek(self.wmb_header.colTreeNodesPointer)
-                #print("Seeking to self.wmb_header.colTreeNodesPointer: %s" % hex(self.wmb_header.colTreeNodesPointer))
-                #print("Iterating over self.wmb_header.colTreeNodesCount, length %d" % self.wmb_header.colTreeNodesCount)
-                for index in range(self.wmb_header.colTreeNodesCount):
-                    self.colTreeNodes.append(wmb3_colTreeNode(wmb_fp))
-            
-            # World Model Data
-            self.hasUnknownWorldData = False
-            if self.wmb_header.unknownWorldDataPointer > 0:
-                self.hasUnknownWorldData = True
-                self.unknownWorldDataArray = []
-                wmb_fp.seek(self.wmb_header.unknownWorldDataPointer)
-                #print("Seeking to self.wmb_header.unknownWorldDataPointer: %s" % hex(self.wmb_header.unknownWorldDataPointer))
-                #print("Iterating over self.wmb_header.unknownWorldDataCount, length %d" % self.wmb_header.unknownWorldDataCount)
-                for index in range(self.wmb_header.unknownWorldDataCount):
-                    self.unknownWorldDataArray.append(wmb3_worldData(wmb_fp))
-        
-        elif self.wmb_header.magicNumber == b'WMB4':
-            self.vertexGroupArray = load_data_array(wmb_fp, self.wmb_header.vertexGroupPointer, self.wmb_header.vertexGroupCount, wmb4_vertexGroup, self.wmb_header.vertexFormat)
-            
-            if DEBUG_BATCHES_PRINT:
-                print()
-                print("Batches:")
-                print("vertexGroup vertexRange indexRange")
-            self.batchArray = load_data_array(wmb_fp, self.wmb_header.batchPointer, self.wmb_header.batchCount, wmb4_batch)
-            
-            if DEBUG_BATCHSUPPLEMENT_PRINT:
-                print()
-                print("Batch supplement data:")
-            self.batchDescription = load_data(wmb_fp, self.wmb_header.batchDescriptionPointer, wmb4_batchDescription)
-            self.batchDataArray = []
-            for batchDataSubgroup in self.batchDescription.batchData:
-                self.batchDataArray.extend(batchDataSubgroup)
-            
-            # hack
-            for dataNum, batchDataSubgroup in enumerate(self.batchDescription.batchData):
-                for batchData in batchDataSubgroup:
-                    self.batchArray[batchData.batchIndex].batchGroup = dataNum
-            
-            self.hasBone = self.wmb_header.boneCount > 0
-            if DEBUG_BONE_PRINT:
-                print()
-                print("Bones?", self.hasBone)
-                if self.hasBone:
-                    print("Enjoy the debug bone data:")
-            self.boneArray = load_data_array(wmb_fp, self.wmb_header.bonePointer, self.wmb_header.boneCount, wmb4_bone, None, True)
-            
-            if DEBUG_BITT_PRINT:
-                print()
-                print("The boneIndexTranslateTable? I got no debug info besides what's in the header.")
-            boneTranslateTable = load_data(wmb_fp, self.wmb_header.boneTranslateTablePointer, wmb4_boneTranslateTable)
-            if boneTranslateTable is not None:
-                self.firstLevel = boneTranslateTable.firstLevel
-                self.secondLevel = boneTranslateTable.secondLevel
-                self.thirdLevel = boneTranslateTable.thirdLevel
-            
-            if DEBUG_BONESET_PRINT:
-                print()
-                print("Bonesets:")
-            boneSetArrayTrue = load_data_array(wmb_fp, self.wmb_header.boneSetPointer, self.wmb_header.boneSetCount, wmb4_boneSet)
-            # is this cheating
-            self.boneSetArray = [item.boneSet for item in boneSetArrayTrue]
-            #print(self.boneSetArray)
-            
-            if DEBUG_MATERIAL_PRINT:
-                print()
-                print("Material info (specifically textures, not shaders; not yet):")
-            self.materialArray = load_data_array(wmb_fp, self.wmb_header.materialPointer, self.wmb_header.materialCount, wmb4_material)
-            
-            if DEBUG_TEXTURE_PRINT:
-                print()
-                print("Just have the textures array if you care so bad")
-            self.textureArray = load_data_array(wmb_fp, self.wmb_header.texturePointer, self.wmb_header.textureCount, wmb4_texture)
-            if DEBUG_TEXTURE_PRINT:
-                print([(item.id, hex(item.flags)) for item in self.textureArray])
-            
-            if DEBUG_MESH_PRINT:
-                print()
-                print("Meshes (batches separated by batchGroup, naturally):")
-            self.meshArray = load_data_array(wmb_fp, self.wmb_header.meshPointer, self.wmb_header.meshCount, wmb4_mesh, [scr_mode, wmbinscr_name])
-            
-            for mesh in self.meshArray:
-                for materialIndex, material in enumerate(mesh.materials):
-                    self.materialArray[material].materialName = mesh.name + "-%d" % materialIndex
-            
-            self.boneMap = None # <trollface>
-            self.hasColTreeNodes = False # maybe this could be before the version check
-            self.hasUnknownWorldData = False
-            
-            print("\n\n")
-            print("Continuing to wmb_importer.py...\n")
-        
-        else:
-            print("You madman! This isn't WMB3 or WMB4, but %s!" % self.wmb_header.magicNumber.decode("ascii"))
+
+        self.read(wmb_fp, only_extract, write_materials_json, scr_mode, wmbinscr_name)
+
+    def read(self, wmb_fp, only_extract, write_materials_json=True, scr_mode=False, wmbinscr_name=""):
+        # sections are parsed on first access, only_extract just never touches the meshes
+        self.open(wmb_fp, scr_mode, wmbinscr_name)
+        if write_materials_json and self.wmb_header.magicNumber == b'WMB3':
+            saveMaterialsJson(self.wmb_fp.name, self.materialArray)
 
     def clear_unused_vertex(self, meshArrayIndex,vertexGroupIndex, wmb4=False):
         mesh = self.meshArray[meshArrayIndex]
@@ -1395,76 +1366,53 @@ class WMB(object):
         vertexStart = mesh.vertexStart
         vertexCount = mesh.vertexCount
 
-        vertexesExData = vertexGroup.vertexesExDataArray[vertexStart : vertexStart + vertexCount]
-
-        vertex_colors = []
-        
-        facesRaw = vertexGroup.faceRawArray[faceRawStart : faceRawStart + faceRawCount ]
+        facesRaw = vertexGroup.faceRawArray[faceRawStart : faceRawStart + faceRawCount]
         if not wmb4:
-            facesRaw = [index - 1 for index in facesRaw]
-        usedVertexIndexArray = sorted(list(set(facesRaw))) # oneliner to remove duplicates
+            facesRaw = facesRaw - 1
+        # usedVertexIndexArray is sorted and free of duplicates,
+        # facesRaw now points to indexes in usedVertices (below)
+        usedVertexIndexArray, facesRaw = np.unique(facesRaw, return_inverse=True)
+        faces = facesRaw[:len(facesRaw) // 3 * 3].reshape(-1, 3)
         
-        """
-        print("Vertex group index:", vertexGroupIndex, "Face first index:", faceRawStart, "Face last index:", faceRawStart+faceRawCount)
-        print("Faces range from %d to %d" % (min(facesRaw), max(facesRaw)))
-        print([("[" if i%3==0 else "") + str(face).rjust(3, " ") + ("]" if i%3==2 else "") for i, face in enumerate(facesRaw)])
-        """
-        # mappingDict is the reverse lookup for usedVertexIndexArray
-        mappingDict = {}
-        for newIndex, vertid in enumerate(usedVertexIndexArray):
-            mappingDict[vertid] = newIndex
-        #print(mappingDict)
-        # After this loop, facesRaw now points to indexes in usedVertices (below)
-        for i, vertex in enumerate(facesRaw):
-            facesRaw[i] = mappingDict[vertex]
-        faces = [0] * int(faceRawCount / 3)
-        usedVertices = [0] * len(usedVertexIndexArray)
-        boneWeightInfos = [[],[]]
-        #print("Iterating over 0, faceRawCount, 3, length %d" % 0, faceRawCount, 3)
-        for i in range(0, faceRawCount, 3):
-            faces[int(i/3)] = ( facesRaw[i], facesRaw[i + 1], facesRaw[i + 2] )
-        meshVertices = vertexGroup.vertexArray[vertexStart : vertexStart + vertexCount]
+        meshRange = slice(vertexStart, vertexStart + vertexCount)
+        usedVertices = vertexGroup.positions[meshRange][usedVertexIndexArray]
+
+        # Vertex_Colors are stored in VertexData or VertexExData, wherever the format has them
+        vertex_colors = []
+        if vertexGroup.colors is not None:
+            vertex_colors = vertexGroup.colors[meshRange][usedVertexIndexArray]
 
+        normals = None
+        if vertexGroup.normals is not None:
+            normals = vertexGroup.normals[meshRange][usedVertexIndexArray]
+
+        # [boneIndices, boneWeights], both one row of 4 per used vertex
+        boneWeightInfos = [np.zeros((0, 4), np.int64), np.zeros((0, 4))]
         if self.hasBone:
-            boneWeightInfos = [0] * len(usedVertexIndexArray)
-        for newIndex, i in enumerate(usedVertexIndexArray):
-            usedVertices[newIndex] = (meshVertices[i].positionX, meshVertices[i].positionY, meshVertices[i].positionZ)
-
-            # Vertex_Colors are stored in VertexData
-            if vertexGroup.vertexFlags in {4, 5, 12, 14} or (wmb4 and self.wmb_header.vertexFormat in {0x10307, 0x10107}):
-                vertex_colors.append(meshVertices[i].color)
-            # Vertex_Colors are stored in VertexExData
-            if vertexGroup.vertexFlags in {10, 11} or (wmb4 and self.wmb_header.vertexFormat in {0x10337, 0x10137, 0x00337}):
-                vertex_colors.append(vertexesExData[i].color)
-
-            if self.hasBone:
-                bonesetIndex = mesh.bonesetIndex
-                if bonesetIndex != -1:
-                    boneSet = self.boneSetArray[bonesetIndex]
-                    if not wmb4:
-                        boneIndices = [self.boneMap[boneSet[index]] for index in meshVertices[i].boneIndices]
-                    else:
-                        #boneIndices = meshVertices[i].boneIndices
-                        # this is really rather obvious
-                        try:
-                            boneIndices = [boneSet[index] for index in meshVertices[i].boneIndices]
-                        except:
-                            print()
-                            print("Hey! Something's wrong with the bone set. The mesh %s has these bone indices:" % mesh.name)
-                            #print([vertexes.boneIndices for vertexes in meshVertices])
-                            print("...nevermind that's way too much to print")
-                            print("(They go up to %d)" % max([max(vertexes.boneIndices) for vertexes in meshVertices]))
-                            print("But the bone set (#%d) only has %d bones." % (bonesetIndex, len(boneSet)))
-                            print("How terrible! Time to crash.")
-                            assert False
-                    boneWeightInfos[newIndex] = [boneIndices, meshVertices[i].boneWeights]
-                    s = sum(meshVertices[i].boneWeights)
-                    if s > 1.000000001 or s < 0.999999:
-                        print('[-] error weight detect %f' % s)
-                        print(meshVertices[i].boneWeights) 
-                else:
-                    self.hasBone = False
-        return usedVertices, faces, usedVertexIndexArray, boneWeightInfos, vertex_colors, vertexStart
+            bonesetIndex = mesh.bonesetIndex
+            if bonesetIndex != -1:
+                boneSet = np.asarray(self.boneSetArray[bonesetIndex])
+                localBoneIndices = vertexGroup.boneIndices[meshRange][usedVertexIndexArray]
+                boneWeights = vertexGroup.boneWeights[meshRange][usedVertexIndexArray]
+                if len(localBoneIndices) > 0 and localBoneIndices.max() >= len(boneSet):
+                    print()
+                    print("Hey! Something's wrong with the bone set. Mesh #%d uses bone indices up to %d," % (meshArrayIndex, localBoneIndices.max()))
+                    print("but the bone set (#%d) only has %d bones." % (bonesetIndex, len(boneSet)))
+                    print("How terrible! Time to crash.")
+                    assert False
+                boneIndices = boneSet[localBoneIndices]
+                if not wmb4:
+                    boneIndices = np.asarray(self.boneMap)[boneIndices]
+                boneWeightInfos = [boneIndices, boneWeights]
+
+                weightSums = boneWeights.sum(axis=1)
+                badWeights = (weightSums > 1.000000001) | (weightSums < 0.999999)
+                if badWeights.any():
+                    print('[-] error weight detect: %d of %d vertices do not sum to 1 (%f to %f)' % (
+                        np.count_nonzero(badWeights), len(weightSums), weightSums[badWeights].min(), weightSums[badWeights].max()))
+            elif len(usedVertexIndexArray) > 0:
+                self.hasBone = False
+        return usedVertices, faces, usedVertexIndexArray, boneWeightInfos, vertex_colors, vertexStart, normals
 
 def load_data(wmb_fp, pointer, chunkClass, other=None):
     pos = wmb_fp.tell()
@@ -1522,10 +1470,25 @@ def load_data_array(wmb_fp, pointer, count, chunkClass, other=None, useIndex=Fal
     return array
 
 
+def load_struct_array(wmb_fp, pointer, count, dtype):
+    # one read per buffer instead of one per item
+    dtype = np.dtype(dtype)
+    if pointer <= 0 or count <= 0:
+        return np.zeros(0, dtype)
+    pos = wmb_fp.tell()
+    wmb_fp.seek(pointer)
+    if isinstance(wmb_fp, BinaryReader):
+        array = wmb_fp.readArray(count, dtype)
+    else:
+        array = np.frombuffer(wmb_fp.read(count * dtype.itemsize), dtype, count)
+    wmb_fp.seek(pos)
+    return array
+
+
 def export_obj(wmb, wta, wtp_fp, obj_file):
     if not obj_file:
         obj_file = 'test'
-    create_dir('out/%s'%obj_file)
+    os.makedirs('out/%s'%obj_file, exist_ok=True)
     obj_file = 'out/%s/%s'%(obj_file, obj_file)
     textureArray = []
     
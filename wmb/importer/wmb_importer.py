@@ -1,12 +1,15 @@
 # load from Python object into Blender (way too many custom properties)
 from time import time
 import bpy
-import bmesh
 import math
+import numpy as np
 from typing import List, Tuple
 from mathutils import Vector
 
 from ...utils.util import ShowMessageBox, getPreferences, printTimings
+from ...utils.ioUtils import file_path
+from ...wta_wtp.importer.wta import TextureBundle
+from .textureCache import TextureCache
 from .wmb import *
 from ...wta_wtp.exporter.wta_wtp_ui_manager import isTextureTypeSupported, makeWtaMaterial
 
@@ -144,10 +147,9 @@ def construct_mesh(mesh_data, collection_name):
     # i'd prefer to avoid the numbers when there's only one mesh, but it's
     # basically impossible to tell once the names contain hyphens
     name += "-%d" % matched_objs
-    vertices = mesh_data[1]
-    faces = mesh_data[2]
+    vertices = np.asarray(mesh_data[1], dtype=np.float32).reshape(-1, 3)
+    faces = np.asarray(mesh_data[2], dtype=np.int32).reshape(-1, 3)
     has_bone = mesh_data[3]
-    weight_infos = [[[],[]]] # A real fan can recognize me even I am a 2 dimensional array
     print("[+] importing %s" % name)
     objmesh = bpy.data.meshes.new(name)
     if not name in bpy.data.objects.keys(): 
@@ -156,38 +158,57 @@ def construct_mesh(mesh_data, collection_name):
         obj = bpy.data.objects[name]
     obj.location = Vector((0,0,0))
     bpy.data.collections.get(collection_name).objects.link(obj)
-    objmesh.from_pydata(vertices, [], faces)
+    # bulk equivalent of from_pydata, every face is a triangle
+    objmesh.vertices.add(len(vertices))
+    objmesh.vertices.foreach_set("co", vertices.ravel())
+    objmesh.loops.add(faces.size)
+    objmesh.loops.foreach_set("vertex_index", faces.ravel())
+    objmesh.polygons.add(len(faces))
+    objmesh.polygons.foreach_set("loop_start", np.arange(0, faces.size, 3, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0): # read-only since 4.0, derived from loop_start
+        objmesh.polygons.foreach_set("loop_total", np.full(len(faces), 3, dtype=np.int32))
     objmesh.update(calc_edges=True)
 
     if len(mesh_data[7]) != 0:
-        if objmesh.vertex_colors:
-            vcol_layer = objmesh.vertex_colors.active
+        loopColors = (np.asarray(mesh_data[7], dtype=np.float32)[faces.ravel()] / 255).ravel()
+        # "color" is linear on byte color attributes while the file stores the raw (sRGB) bytes,
+        # before color_srgb (3.4) only the vertex_colors layers take them as they are
+        if hasattr(objmesh, "color_attributes") and "color_srgb" in bpy.types.ByteColorAttributeValue.bl_rna.properties:
+            vcol_layer = objmesh.color_attributes.new("Col", 'BYTE_COLOR', 'CORNER')
+            vcol_layer.data.foreach_set("color_srgb", loopColors)
         else:
-            vcol_layer = objmesh.vertex_colors.new()
-        
-        for loop_idx, loop in enumerate(objmesh.loops):
-            meshColor = vcol_layer.data[loop_idx]
-            dataColor = mesh_data[7][loop.vertex_index]
-            meshColor.color = [
-                dataColor[0]/255,
-                dataColor[1]/255,
-                dataColor[2]/255,
-                dataColor[3]/255
-            ]
-            
+            if objmesh.vertex_colors:
+                vcol_layer = objmesh.vertex_colors.active
+            else:
+                vcol_layer = objmesh.vertex_colors.new(name="Col")
+            vcol_layer.data.foreach_set("color", loopColors)
 
     if has_bone:
-        weight_infos = mesh_data[4]
-        group_names = sorted(list(set(["bone%d" % i  for weight_info in weight_infos for i in weight_info[0]])))
+        boneIndices = np.asarray(mesh_data[4][0], dtype=np.int64).reshape(-1, 4)
+        boneWeights = np.asarray(mesh_data[4][1], dtype=np.float64).reshape(-1, 4)
+        group_names = sorted(["bone%d" % i for i in np.unique(boneIndices).tolist()])
         for group_name in group_names:
             obj.vertex_groups.new(name=group_name)
-        for i, weightinfo in enumerate(weight_infos):
-            for index in range(4):
-                group_name = "bone%d"%weightinfo[0][index]
-                weight = weightinfo[1][index]
-                group = obj.vertex_groups[group_name]
-                if weight:
-                    group.add([i], weight, "REPLACE")
+        # one (vertex, bone, weight) row per non-zero slot; when a bone shows up twice
+        # in a vertex the later slot wins, like a per-slot "REPLACE" would
+        vertexIndices = np.repeat(np.arange(len(boneIndices)), 4)
+        slotBones = boneIndices.ravel()
+        slotWeights = boneWeights.ravel()
+        nonZero = slotWeights != 0
+        vertexIndices = vertexIndices[nonZero][::-1]
+        slotBones = slotBones[nonZero][::-1]
+        slotWeights = slotWeights[nonZero][::-1]
+        _, lastSlots = np.unique(np.stack((vertexIndices, slotBones), axis=1), axis=0, return_index=True)
+        vertexIndices = vertexIndices[lastSlots]
+        slotBones = slotBones[lastSlots]
+        slotWeights = slotWeights[lastSlots]
+        # one add() per (bone, weight) bucket
+        buckets, bucketIndices = np.unique(np.stack((slotBones, slotWeights), axis=1), axis=0, return_inverse=True)
+        bucketIndices = bucketIndices.ravel()
+        bucketSizes = np.bincount(bucketIndices, minlength=len(buckets))
+        bucketVertices = np.split(vertexIndices[np.argsort(bucketIndices, kind="stable")], np.cumsum(bucketSizes)[:-1])
+        for (bone, weight), vertexList in zip(buckets.tolist(), bucketVertices):
+            obj.vertex_groups["bone%d" % bone].add(vertexList.tolist(), weight, "REPLACE")
     obj.rotation_euler = (math.radians(90),0,0)
     if mesh_data[5] != "None":
         obj['boneSetIndex'] = mesh_data[5]
@@ -216,6 +237,17 @@ def construct_mesh(mesh_data, collection_name):
     
     return obj
 
+def set_custom_normals(obj, normals):
+    """Uses the normals stored in the file (one per vertex) instead of recalculated ones"""
+    if normals is None or len(normals) != len(obj.data.vertices):
+        return
+    mesh = obj.data
+    # custom normals are relative to the smooth normals, so set shading first
+    mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+    if bpy.app.version < (4, 1, 0): # custom normals are always used since 4.1
+        mesh.use_auto_smooth = True
+    mesh.normals_split_custom_set_from_vertices(np.asarray(normals, dtype=np.float32))
+
 def set_partent(parent, child):
     bpy.context.view_layer.objects.active = parent
     child.select_set(True)
@@ -234,7 +266,48 @@ def addWtaExportMaterial(texture_dir, material):
     ]
     makeWtaMaterial(material_name, wtaTextures)
 
-def construct_materials(texture_dir, material, material_index=-1):
+SHADER_PARAMS_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "shader_params.json")
+# materials_miner.py output, merged into the catalog when present
+SHADER_DUMP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), "dump.json")
+
+shaderParamsCache = {"mtimes": None, "shaders": {}}
+
+def loadShaderParamsFile(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as shaderFile:
+            return json.load(shaderFile)
+    except Exception as ex:
+        print("Could not load shader parameters from %s:" % path, ex)
+        return {}
+
+def mergeShaderParams(shaders, minedShaders):
+    # mined names only fill in what shader_params.json doesn't know yet
+    for shaderName, minedShader in minedShaders.items():
+        minedParams = minedShader.get("Parameters", [])
+        if shaderName not in shaders:
+            shaders[shaderName] = {"Parameters": list(minedParams)}
+            continue
+        params = shaders[shaderName].setdefault("Parameters", [])
+        for i, param in enumerate(minedParams):
+            if i >= len(params):
+                params.append(param)
+            elif params[i] == "Unknown":
+                params[i] = param
+    return shaders
+
+def getShaderParams():
+    """Shader name -> {"Parameters": [...]}, parsed once and reloaded when either json file changes"""
+    mtimes = tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in (SHADER_PARAMS_PATH, SHADER_DUMP_PATH))
+    if shaderParamsCache["mtimes"] != mtimes:
+        shaders = loadShaderParamsFile(SHADER_PARAMS_PATH)
+        mergeShaderParams(shaders, loadShaderParamsFile(SHADER_DUMP_PATH))
+        shaderParamsCache["shaders"] = shaders
+        shaderParamsCache["mtimes"] = mtimes
+    return shaderParamsCache["shaders"]
+
+def construct_materials(texture_dir, material, material_index=-1, texture_cache=None):
     material_name = material[0]
     textures = material[1]
     uniforms = material[2]
@@ -242,6 +315,8 @@ def construct_materials(texture_dir, material, material_index=-1):
     technique_name = material[4]
     parameterGroups = material[5]
     textureFlags = material[6] # wmb4
+    if texture_cache is None:
+        texture_cache = TextureCache()
     print('[+] importing material %s' % material_name)
     # oh, real smooth, reusing a variable name
     material = bpy.data.materials.new( '%s' % (material_name))
@@ -280,8 +355,7 @@ def construct_materials(texture_dir, material, material_index=-1):
             principled.inputs['Roughness'].default_value = 1 - uniforms[key]
 
     # Custom Shader Parameters
-    shaderFile = open(os.path.dirname(os.path.realpath(__file__)) + "/shader_params.json", "r")
-    shaders = json.load(shaderFile)
+    shaders = getShaderParams()
 
     for gindx, parameterGroup in enumerate(parameterGroups):
         # let's group these into lists
@@ -308,8 +382,7 @@ def construct_materials(texture_dir, material, material_index=-1):
     for texturesType in textures.keys():
         textures_type = texturesType.lower()
         material[texturesType] = textures.get(texturesType)
-        texture_file = "%s/%s.dds" % (texture_dir, textures[texturesType])
-        if os.path.exists(texture_file):
+        if texture_cache.findFile(texture_dir, textures[texturesType]) is not None:
             if textures_type.find('albedo') > -1:
                 albedo_maps[textures_type] = textures.get(texturesType)
             elif textures_type.find('normal') > -1:
@@ -319,7 +392,7 @@ def construct_materials(texture_dir, material, material_index=-1):
             elif textures_type.find('curvature') > -1:
                 curvature_maps[textures_type] = textures.get(texturesType)
         else:
-            pass#print("Couldn't find", texture_file, "for", textures_type)
+            pass#print("Couldn't find", textures[texturesType], "for", textures_type)
 
     # Albedo Nodes
     albedo_nodes = []
@@ -327,12 +400,12 @@ def construct_materials(texture_dir, material, material_index=-1):
     albedo_invert_nodes = []
     colornode = None
     for i, textureID in enumerate(albedo_maps.values()):
-        texture_file = "%s/%s.dds" % (texture_dir, textureID)
-        if os.path.exists(texture_file):
+        image = texture_cache.get(texture_dir, textureID)
+        if image is not None:
             albedo_image = nodes.new(type='ShaderNodeTexImage')
             albedo_nodes.append(albedo_image)
             albedo_image.location = 0,i*-60
-            albedo_image.image = bpy.data.images.load(texture_file)
+            albedo_image.image = image
             albedo_image.hide = True
                 
             invert_shader = nodes.new(type="ShaderNodeInvert")
@@ -389,13 +462,12 @@ def construct_materials(texture_dir, material, material_index=-1):
     mask_sepRGB_nodes = []
     mask_invert_nodes = []
     for i, textureID in enumerate(mask_maps.values()):
-        texture_file = "%s/%s.dds" % (texture_dir, textureID)
-        if os.path.exists(texture_file):
+        image = texture_cache.get(texture_dir, textureID, nonColor=True)
+        if image is not None:
             mask_image = nodes.new(type='ShaderNodeTexImage')
             mask_nodes.append(mask_image)
             mask_image.location = 0, ((len(albedo_maps)+1)*-60)-i*60
-            mask_image.image = bpy.data.images.load(texture_file)
-            mask_image.image.colorspace_settings.name = 'Non-Color'
+            mask_image.image = image
             mask_image.hide = True
             if i > 0:
                 mask_image.label = "g_MaskMap" + str(i-1)
@@ -426,13 +498,12 @@ def construct_materials(texture_dir, material, material_index=-1):
     normal_nodes = []
     normal_mixRGB_nodes = []
     for i, textureID in enumerate(normal_maps.values()):
-        texture_file = "%s/%s.dds" % (texture_dir, textureID)
-        if os.path.exists(texture_file):
+        image = texture_cache.get(texture_dir, textureID, nonColor=True)
+        if image is not None:
             normal_image = nodes.new(type='ShaderNodeTexImage')
             normal_nodes.append(normal_image)
             normal_image.location = 0, (len(albedo_maps)+1 + len(mask_maps)+1 + i) * -60
-            normal_image.image = bpy.data.images.load(texture_file)
-            normal_image.image.colorspace_settings.name = 'Non-Color'
+            normal_image.image = image
             normal_image.hide = True
             if i > 0:
                 normal_image.label = "g_NormalMap" + str(i-1)
@@ -467,12 +538,12 @@ def construct_materials(texture_dir, material, material_index=-1):
     curvature_sepRGB_nodes = []
     curvature_mul_nodes = []
     for i, textureID in enumerate(curvature_maps.values()):
-        texture_file = "%s/%s.dds" % (texture_dir, textureID)
-        if os.path.exists(texture_file):
+        image = texture_cache.get(texture_dir, textureID)
+        if image is not None:
             curvature_image = nodes.new(type='ShaderNodeTexImage')
             curvature_nodes.append(curvature_image)
             curvature_image.location = -600, ((len(albedo_maps)+1)*-60)-i*60+50
-            curvature_image.image = bpy.data.images.load(texture_file)
+            curvature_image.image = image
             curvature_image.hide = True
             if i > 0:
                 curvature_image.label = "g_CurvatureMap" + str(i-1)
@@ -505,38 +576,26 @@ def add_material_to_mesh(mesh, materials , uvs):
     for material in materials:
         #print('linking material %s to mesh object %s' % (material.name, mesh.name))
         mesh.data.materials.append(material)
-    bpy.context.view_layer.objects.active = mesh
-    bpy.ops.object.mode_set(mode="EDIT")
-    bm = bmesh.from_edit_mesh(mesh.data)
-    uv_layer = bm.loops.layers.uv.verify()
-    #bm.faces.layers.tex.verify()
-    for face in bm.faces:
-        face.material_index = 0
-        for l in face.loops:
-            #luv = l[uv_layer]
-            ind = l.vert.index
-            #print(l.vert)
-            l[uv_layer].uv = Vector(uvs[0][ind])
-    
-    for i in range(1, 5): # 0 handled above
+    polygonCount = len(mesh.data.polygons)
+    mesh.data.polygons.foreach_set("material_index", np.zeros(polygonCount, dtype=np.int32))
+    # uvs are per vertex, layers are per loop
+    loopVertexIndices = np.zeros(len(mesh.data.loops), dtype=np.int32)
+    mesh.data.loops.foreach_get("vertex_index", loopVertexIndices)
+    for i in range(5):
         if len(uvs[i]) > 0:
-            #print("Creating UV layer for", material.name)
-            new_uv_layer = bm.loops.layers.uv.new("UVMap" + str(i + 1))
-            for face in bm.faces:
-                face.material_index = 0
-                for l in face.loops:
-                    #luv = l[new_uv_layer]
-                    ind = l.vert.index
-                    #print(ind)
-                    l[new_uv_layer].uv = Vector(uvs[i][ind])
+            layerName = "UVMap" + str(i + 1) if i > 0 else "UVMap"
+            uv_layer = mesh.data.uv_layers.get(layerName)
+            if i == 0 and uv_layer is None:
+                uv_layer = mesh.data.uv_layers.active
+            if uv_layer is None:
+                uv_layer = mesh.data.uv_layers.new(name=layerName)
+            loopUVs = np.asarray(uvs[i], dtype=np.float32)[loopVertexIndices]
+            uv_layer.data.foreach_set("uv", loopUVs.ravel())
         else:
             pass#print("Weird, no UV[%d] for %s" % (i, material.name))
 
-    bpy.ops.object.mode_set(mode='OBJECT')
-    mesh.select_set(True)
-    bpy.ops.object.shade_smooth()
-    #mesh.hide = True
-    mesh.select_set(False)
+    mesh.data.polygons.foreach_set("use_smooth", np.ones(polygonCount, dtype=bool))
+    mesh.data.update()
     
 def format_wmb_mesh(wmb, collection_name, scr_header=None):
     meshes = []
@@ -545,86 +604,14 @@ def format_wmb_mesh(wmb, collection_name, scr_header=None):
     mesh_array = wmb.meshArray
     #each vertexgroup -> each lod -> each group -> mesh
     for vertexGroupIndex in range(wmb.wmb_header.vertexGroupCount):
-        if wmb.vertexGroupArray[vertexGroupIndex].vertexFlags is not None:
-            vertex_flags = wmb.vertexGroupArray[vertexGroupIndex].vertexFlags
-        else: # wmb4
-            if (wmb.wmb_header.vertexFormat & 0x337) == 0x337: # in exData
-                vertex_flags = -1
-            elif wmb.wmb_header.vertexFormat == 0x10307:       # in vertex
-                vertex_flags = -2
-            else:                                              # only one texture
-                vertex_flags = -3
+        # flip V, UV slots the format doesn't have stay None
+        for k, uv in enumerate(wmb.vertexGroupArray[vertexGroupIndex].uvMaps):
+            if uv is not None:
+                uv = uv.astype(np.float64)
+                uv = np.column_stack((uv[:, 0], 1 - uv[:, 1])).astype(np.float32)
+            uvMaps[k].append(uv)
         
-        if vertex_flags == -3:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uvMaps[1].append(None)
-            uvMaps[2].append(None)
-            uvMaps[3].append(None)
-            uvMaps[4].append(None)
-
-        elif vertex_flags in {-2, 0, 1, 4}:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertex.textureU2, 1 - vertex.textureV2) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[1].append(uv)
-            uvMaps[2].append(None)
-            uvMaps[3].append(None)
-            uvMaps[4].append(None)
-
-        elif vertex_flags == 5:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertex.textureU2, 1 - vertex.textureV2) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[1].append(uv)
-            uv = [(vertexExData.textureU3, 1 - vertexExData.textureV3) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[2].append(uv)
-            uvMaps[3].append(None)
-            uvMaps[4].append(None)
-
-        elif vertex_flags in {-1, 7, 10}:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertexExData.textureU2, 1 - vertexExData.textureV2) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[1].append(uv)
-            uvMaps[2].append(None)
-            uvMaps[3].append(None)
-            uvMaps[4].append(None)
-
-        elif vertex_flags == 11:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertexExData.textureU2, 1 - vertexExData.textureV2) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[1].append(uv)
-            uv = [(vertexExData.textureU3, 1 - vertexExData.textureV3) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[2].append(uv)
-            uvMaps[3].append(None)
-            uvMaps[4].append(None)
-
-        elif vertex_flags == 12:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertex.textureU2, 1 - vertex.textureV2) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[1].append(uv)
-            uv = [(vertexExData.textureU3, 1 - vertexExData.textureV3) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[2].append(uv)
-            uv = [(vertexExData.textureU4, 1 - vertexExData.textureV4) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[3].append(uv)
-            uv = [(vertexExData.textureU5, 1 - vertexExData.textureV5) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[4].append(uv)
-
-        elif vertex_flags == 14:
-            uv = [(vertex.textureU, 1 - vertex.textureV) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[0].append(uv)
-            uv = [(vertex.textureU2, 1 - vertex.textureV2) for vertex in wmb.vertexGroupArray[vertexGroupIndex].vertexArray]
-            uvMaps[1].append(uv)
-            uv = [(vertexExData.textureU3, 1 - vertexExData.textureV3) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[2].append(uv)
-            uv = [(vertexExData.textureU4, 1 - vertexExData.textureV4) for vertexExData in wmb.vertexGroupArray[vertexGroupIndex].vertexesExDataArray]
-            uvMaps[3].append(uv)
-            uvMaps[4].append(None)
-        
-        if vertex_flags >= 0: # wmb3
+        if wmb.vertexGroupArray[vertexGroupIndex].vertexFlags is not None: # wmb3
             for meshGroupInfo in wmb.meshGroupInfoArray:
                 groupedMeshArray = meshGroupInfo.groupedMeshArray
                 mesh_start = meshGroupInfo.meshStart
@@ -657,6 +644,7 @@ def format_wmb_mesh(wmb, collection_name, scr_header=None):
                                 boneSetIndex = -1
                             boundingBox = meshGroup.boundingBox
                             obj = construct_mesh([meshName, vertices, faces, has_bone, boneWeightInfoArray, boneSetIndex, meshGroupIndex, vertex_colors, LOD_name, LOD_level, colTreeNodeIndex, unknownWorldDataIndex, boundingBox, vertexGroupIndex], collection_name)
+                            set_custom_normals(obj, meshInfo[6])
                             meshes.append(obj)
         
     if wmb.wmb_header.magicNumber == b'WMB4':
@@ -702,14 +690,32 @@ def format_wmb_mesh(wmb, collection_name, scr_header=None):
                 batch.batchGroup,       # batch group, which of the four supplements
                 scr_header   # header data for SCR transformations
             ], collection_name)
+            set_custom_normals(obj, meshInfo[6])
             meshes.append(obj)
     
     return meshes, uvMaps, usedVerticeIndexArrays
 
+def extract_wta_textures(wmb, texture_dir):
+    """Writes the WTA's textures that aren't in texture_dir yet, only their bytes are read from the WTP"""
+    wtp_fp = getattr(wmb, 'wtp_fp', None)
+    if not wtp_fp:
+        print('[-] Missing .wtp, textures not extracted')
+        return
+    try:
+        with TextureBundle(wmb.wta, wtp_fp) as textures:
+            extractedCount = textures.extract(texture_dir, overwrite=False)
+    except Exception as e:
+        print('[-] Could not extract textures from the WTP:', e)
+        return
+    if extractedCount > 0:
+        print('[+] Extracted %d DDS textures from the WTA/WTP' % extractedCount)
+
 def get_wmb_material(wmb, texture_dir):
     materials = []
     if wmb.wta:
         if hasattr(wmb, 'materialArray'):
+            if len(wmb.materialArray) > 0:
+                extract_wta_textures(wmb, texture_dir)
             for materialIndex, material in enumerate(wmb.materialArray):
                 material_name = material.materialName
                 shader_name = material.effectName
@@ -735,40 +741,10 @@ def get_wmb_material(wmb, texture_dir):
                             del textures[index]
                     print("Textures on %s:"%material_name, textures)
                 parameterGroups = material.parameterGroups
-                for textureIndex in range(wmb.wta.textureCount):        # for key in textures.keys():
-                    #identifier = textures[key]
-                    identifier = wmb.wta.wtaTextureIdentifier[textureIndex]
-                    try:
-                        texture_stream = wmb.wta.getTextureByIdentifier(identifier,wmb.wtp_fp)
-                        if texture_stream:
-                            if not os.path.exists(os.path.join(texture_dir, identifier + '.dds')):
-                                create_dir(texture_dir)
-                                texture_fp = open(os.path.join(texture_dir, identifier + '.dds'), "wb")
-                                print('[+] could not find DDS texture, trying to find it in WTA; %s.dds'% identifier)
-                                texture_fp.write(texture_stream)
-                                texture_fp.close()
-                            else:
-                                pass#print('[+] Found %s.dds'% identifier)
-                        else:
-                            print("Texture identifier %s does not exist in WTA, despite being fetched from a WTA identifier list." % identifier)
-                    except:
-                        continue
-                
                 materials.append([material_name,textures,uniforms,shader_name,technique_name,parameterGroups, textureFlags])
                 #print(materials)
         else:
-            texture_dir = texture_dir.replace('.dat','.dtt')
-            for textureIndex in range(wmb.wta.textureCount):
-                #print(textureIndex)
-                identifier = wmb.wta.wtaTextureIdentifier[textureIndex]
-                texture_stream = wmb.wta.getTextureByIdentifier(identifier,wmb.wtp_fp)
-                if texture_stream:
-                    if not os.path.exists(os.path.join(texture_dir, identifier + '.dds')):
-                        create_dir(texture_dir)
-                        texture_fp = open(os.path.join(texture_dir, identifier + '.dds'), "wb")
-                        print('[+] dumping %s.dds'% identifier)
-                        texture_fp.write(texture_stream)
-                        texture_fp.close()
+            extract_wta_textures(wmb, texture_dir.replace('.dat','.dtt'))
 
     else:
         print('Missing .wta')
@@ -849,9 +825,10 @@ def import_unknowWorldDataArray(wmb):
         unknownWorldDataDict[unknownWorldDataName] = unknownWorldData.unknownWorldData
     bpy.context.scene['unknownWorldData'] = unknownWorldDataDict
 
-def main(only_extract = False, wmb_file = os.path.join(os.path.split(os.path.realpath(__file__))[0], 'test', 'pl0000.dtt', 'pl0000.wmb'), scr_header = None):
+def main(only_extract = False, wmb_file = os.path.join(os.path.split(os.path.realpath(__file__))[0], 'test', 'pl0000.dtt', 'pl0000.wmb'), scr_header = None, write_materials_json = True, wta_file = None, wtp_file = None, texture_cache = None):
     #reset_blend()
-    wmb = WMB(wmb_file, only_extract)
+    wmb = WMB(wmb_file, only_extract, write_materials_json, wta_file, wtp_file)
+    wmb_file = file_path(wmb_file)
     wmbname = os.path.split(wmb_file)[-1] # Split only splits into head and tail, but since we want the last part, we don't need to split the head with wmb_file.split(os.sep)
     wmb4 = wmb.wmb_header.magicNumber == b'WMB4'
     
@@ -884,9 +861,15 @@ def main(only_extract = False, wmb_file = os.path.join(os.path.split(os.path.rea
     wmb_materials = get_wmb_material(wmb, texture_dir)
     materials = []
     bpy.context.scene.WTAMaterials.clear()
+    # callers importing several models (SCR) pass their own cache and load it themselves
+    owns_texture_cache = texture_cache is None
+    if owns_texture_cache:
+        texture_cache = TextureCache()
     for materialIndex, material in enumerate(wmb_materials):
         addWtaExportMaterial(texture_dir, material)
-        materials.append(construct_materials(texture_dir, material, materialIndex))
+        materials.append(construct_materials(texture_dir, material, materialIndex, texture_cache))
+    if owns_texture_cache:
+        texture_cache.loadInBackground()
     print('Linking materials to objects...')
     if not wmb4: # formerly "hasattr(wmb, "meshGroupInfoArray")":
         for meshGroupInfo in wmb.meshGroupInfoArray:
@@ -895,24 +878,17 @@ def main(only_extract = False, wmb_file = os.path.join(os.path.split(os.path.rea
                 meshIndex = int(meshes[Index + mesh_start].name.split('-')[0])
                 materialIndex = meshGroupInfo.groupedMeshArray[meshIndex - mesh_start].materialIndex
                 groupIndex = int(meshes[Index + mesh_start].name.split('-')[2])
-                uvMaps = [[], [], [], [], []]
-                for i, VertexIndex in enumerate(usedVerticeIndexArrays[Index + mesh_start]):
-                    for k in range(5):
-                        if uvs[k][groupIndex] != None:
-                            uvMaps[k].append( uvs[k][groupIndex][VertexIndex])
+                usedVerticeIndexArray = usedVerticeIndexArrays[Index + mesh_start]
+                uvMaps = [uvs[k][groupIndex][usedVerticeIndexArray] if uvs[k][groupIndex] is not None else [] for k in range(5)]
                 if len(materials) > 0:
                     add_material_to_mesh(meshes[Index + mesh_start], [materials[materialIndex]], uvMaps)
     else:
         for mesh in meshes:
             meshIndex = int(mesh['ID'])
             groupIndex = int(mesh.name.split('-')[0])
-            uvMaps = [[], [], [], [], []]
             vertexStart = mesh['VertexIndexStart']
-            for VertexIndex in usedVerticeIndexArrays[meshIndex]:
-                for k in range(5):
-                    if uvs[k][groupIndex] != None:
-                        #print("Found a UV!", k, groupIndex, VertexIndex, uvs[k][groupIndex][VertexIndex])
-                        uvMaps[k].append( uvs[k][groupIndex][vertexStart + VertexIndex])
+            usedVerticeIndexArray = vertexStart + usedVerticeIndexArrays[meshIndex]
+            uvMaps = [uvs[k][groupIndex][usedVerticeIndexArray] if uvs[k][groupIndex] is not None else [] for k in range(5)]
             for materialIndex in mesh['Materials']:
                 #if len(materials) > 0:
                     #print("Some materials made for", mesh.name)
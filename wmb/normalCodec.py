@@ -0,0 +1,35 @@
+# Vectorized encoding and decoding of the packed vertex normals of WMB files
+import numpy as np
+
+# WMB4: x, y and z as 11, 11 and 10 bit two's complement integers in one uint32,
+# i.e. 10/10/9 bits of magnitude plus a sign bit
+WMB4_NORMAL_BITS = np.array([11, 11, 10])
+WMB4_NORMAL_SHIFTS = np.array([0, 11, 22])
+WMB4_NORMAL_SCALES = (1 << (WMB4_NORMAL_BITS - 1)) - 1.0
+
+def encodeWmb4Normals(normals) -> np.ndarray:
+    """(..., 3) normals -> uint32, components are rounded half to even"""
+    quantized = np.round(np.asarray(normals, dtype=np.float64) * WMB4_NORMAL_SCALES).astype(np.int64)
+    quantized &= (1 << WMB4_NORMAL_BITS) - 1
+    return np.bitwise_or.reduce(quantized << WMB4_NORMAL_SHIFTS, axis=-1).astype(np.uint32)
+
+def decodeWmb4Normals(packed) -> np.ndarray:
+    """uint32 -> (..., 3) float32 normals"""
+    packed = np.asarray(packed, dtype=np.int64)[..., None]
+    quantized = (packed >> WMB4_NORMAL_SHIFTS) & ((1 << WMB4_NORMAL_BITS) - 1)
+    signBits = 1 << (WMB4_NORMAL_BITS - 1)
+    quantized = (quantized ^ signBits) - signBits
+    return (quantized / WMB4_NORMAL_SCALES).astype(np.float32)
+
+# WMB3: x, y, z and 0 as float16, read as one little endian uint64
+def encodeWmb3Normals(normals) -> np.ndarray:
+    """(..., 3) normals -> uint64"""
+    normals = np.asarray(normals, dtype=np.float64)
+    halfs = np.zeros(normals.shape[:-1] + (4,), dtype="<f2")
+    halfs[..., :3] = normals
+    return halfs.view("<u8")[..., 0]
+
+def decodeWmb3Normals(packed) -> np.ndarray:
+    """uint64 -> (..., 3) float32 normals"""
+    packed = np.array(packed, dtype="<u8") # contiguous copy, struct fields are strided
+    return packed[..., None].view("<f2")[..., :3].astype(np.float32)
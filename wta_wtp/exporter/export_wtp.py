@@ -1,4 +1,6 @@
 from . import generate_wta_wtp_data
+from .texturePacking import TexturePack
+from ...utils.util import ShowMessageBox
 
 
 def main(context, export_filepath):
@@ -8,17 +10,14 @@ def main(context, export_filepath):
         print("WTP Export Failed! :{")
         return
 
-    # Make sure DDS are padded
-    #pad_dds_files(texture_paths_array)
-
-    wtp_fp = open(export_filepath,'wb')
+    # Reads and checks the headers of all DDS files before anything is written
+    try:
+        texturePack = TexturePack(identifiers_array, texture_paths_array, albedo_indexes, context.scene.padWtpTextures)
+    except ValueError as e:
+        print("[!] WTP Export Error:", e)
+        ShowMessageBox(str(e), 'WTP Export Error', 'ERROR')
+        return
 
-    for i in range(len(texture_paths_array)):
-        dds_fp = open(texture_paths_array[i],'rb')
-        content = dds_fp.read()
-        #print("-Writing dds: " + texture_paths_array[i] + " to file: " + export_filepath + " at position: " + str(i))
-        wtp_fp.write(content)
-        dds_fp.close()
-        
-    wtp_fp.close()
-    print('WTP Export Complete. :}')
\ No newline at end of file
+    # DDS files are copied in chunks, the WTP is never held in memory
+    texturePack.writeWtp(export_filepath)
+    print('WTP Export Complete. :}')
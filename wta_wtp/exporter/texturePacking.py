@@ -0,0 +1,169 @@
+# Packs DDS files into a WTA (texture table) and WTP (concatenated textures)
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from ...dat_dtt.exporter.export_dat import copyFileData
+
+# DDS_HEADER (after the 'DDS ' magic) and the optional DDS_HEADER_DXT10 behind it
+DDS_MAGIC = b'DDS '
+DDS_FOURCC_OFFSET = 84
+DDS_CAPS2_OFFSET = 112
+DDS_DXGI_FORMAT_OFFSET = 128
+DDS_MISC_FLAG_OFFSET = 136
+DDS_HEADER_SIZE = 128
+DDS_DX10_HEADER_SIZE = DDS_HEADER_SIZE + 20
+DDS_CAPS2_CUBEMAP_ALL_FACES = 0xFE00
+DDS_DX10_MISC_TEXTURECUBE = 0x4
+
+# the WTA stores DXGI formats
+FOURCC_FORMATS = {
+    b'DXT1': 71, # BC1_UNORM
+    b'DXT3': 74, # BC2_UNORM
+    b'DXT5': 77, # BC3_UNORM
+}
+DX10_FORMATS = {
+    71: "BC1_UNORM",
+    74: "BC2_UNORM",
+    77: "BC3_UNORM",
+    98: "BC7_UNORM",
+    99: "BC7_UNORM_SRGB",
+}
+
+# unknownArray1 values
+ALBEDO_TEXTURE_FLAGS = 637534240
+TEXTURE_FLAGS = 570425376
+
+# textures are padded up to the first bucket they fit into, larger ones to whole clusters.
+# The cluster size is fixed instead of queried from the disk, so every machine writes the same WTP.
+PADDING_BUCKETS = [12288, 176128, 352256, 528384, 700416, 2797568]
+PADDING_CLUSTER_SIZE = 4096
+
+def paddedTextureSize(size: int) -> int:
+    for bucket in PADDING_BUCKETS:
+        if size <= bucket:
+            return bucket
+    return (size + PADDING_CLUSTER_SIZE - 1) // PADDING_CLUSTER_SIZE * PADDING_CLUSTER_SIZE
+
+def texturePadding(paddingAmount: int) -> bytes:
+    """Zeros ending in the padding amount (as UInt32), if there is room for it"""
+    if paddingAmount < 4:
+        return bytes(paddingAmount)
+    return bytes(paddingAmount - 4) + struct.pack('<I', paddingAmount)
+
+class DdsInfo(object):
+    """What the WTA needs to know about a DDS file, read from its header"""
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.stat(path).st_size
+        with open(path, "rb") as f:
+            header = f.read(DDS_DX10_HEADER_SIZE)
+        if len(header) < DDS_HEADER_SIZE or header[:4] != DDS_MAGIC:
+            raise ValueError(f"{path} is not a DDS file")
+        fourCC = header[DDS_FOURCC_OFFSET : DDS_FOURCC_OFFSET + 4]
+        caps2 = struct.unpack_from('<I', header, DDS_CAPS2_OFFSET)[0]
+        self.isCube = caps2 == DDS_CAPS2_CUBEMAP_ALL_FACES
+        if fourCC == b'DX10':
+            if len(header) < DDS_DX10_HEADER_SIZE:
+                raise ValueError(f"{path} has a truncated DX10 header")
+            self.format = struct.unpack_from('<I', header, DDS_DXGI_FORMAT_OFFSET)[0]
+            if self.format not in DX10_FORMATS:
+                raise ValueError(f"{path} has the unsupported DXGI format {self.format}, use DXT1, DXT3, DXT5 or BC7")
+            miscFlag = struct.unpack_from('<I', header, DDS_MISC_FLAG_OFFSET)[0]
+            self.isCube = self.isCube or bool(miscFlag & DDS_DX10_MISC_TEXTURECUBE)
+        elif fourCC in FOURCC_FORMATS:
+            self.format = FOURCC_FORMATS[fourCC]
+        else:
+            raise ValueError(f"{path} has the unknown format {fourCC}, use DXT1, DXT3, DXT5 or BC7")
+
+    def formatRecord(self) -> List[int]:
+        """unknownArray2 entry of the texture"""
+        return [self.format, 3, 4 if self.isCube else 0, 1, 0]
+
+class TexturePack(object):
+    """
+    WTA tables of a list of DDS files. All headers are read once (in parallel) and
+    validated before anything is written, the WTP is then streamed file by file.
+    With padTextures every texture but the last is padded in the WTP (the DDS files are left as they are).
+    """
+    def __init__(self, identifiers: List[str], texturePaths: List[str], albedoIndexes: List[int], padTextures: bool = False):
+        self.identifiers = identifiers
+        self.texturePaths = texturePaths
+
+        def scan(path):
+            try:
+                return DdsInfo(path)
+            except (OSError, ValueError) as e:
+                return e
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(scan, texturePaths))
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            raise ValueError("\n".join(errors))
+        self.textures: List[DdsInfo] = results
+
+        self.wtaTextureSize = [texture.size for texture in self.textures]
+        if padTextures:
+            for i in range(len(self.textures) - 1):
+                self.wtaTextureSize[i] = paddedTextureSize(self.textures[i].size)
+        self.wtaTextureOffset = []
+        offset = 0
+        for size in self.wtaTextureSize:
+            self.wtaTextureOffset.append(offset)
+            offset += size
+        self.wtpSize = offset
+        albedoIndexes = set(albedoIndexes)
+        self.unknownArray1 = [
+            ALBEDO_TEXTURE_FLAGS if i in albedoIndexes else TEXTURE_FLAGS
+            for i in range(len(self.textures))
+        ]
+        self.unknownArray2 = [texture.formatRecord() for texture in self.textures]
+
+    def wtaBytes(self) -> bytes:
+        textureCount = len(self.textures)
+        paddingAmount = ((textureCount + 7) // 8) * 8	#rounds up to the nearest 8th integer
+        padding = bytes((paddingAmount - textureCount) * 4)
+        textureOffsetArrayOffset = 32
+        textureSizeArrayOffset = textureOffsetArrayOffset + (paddingAmount * 4)
+        unknownArrayOffset1 = textureSizeArrayOffset + (paddingAmount * 4)
+        textureIdentifierArrayOffset = unknownArrayOffset1 + (paddingAmount * 4)
+        unknownArrayOffset2 = textureIdentifierArrayOffset + (paddingAmount * 4)
+
+        wta = bytearray(b'WTB\x00')
+        wta += struct.pack('<7I', 3, textureCount, textureOffsetArrayOffset, textureSizeArrayOffset,
+            unknownArrayOffset1, textureIdentifierArrayOffset, unknownArrayOffset2)
+        for array in [
+            self.wtaTextureOffset,
+            self.wtaTextureSize,
+            self.unknownArray1,
+            [int(identifier, 16) for identifier in self.identifiers],
+            [value for record in self.unknownArray2 for value in record],
+        ]:
+            wta += struct.pack(f'<{len(array)}I', *array)
+            wta += padding
+        return bytes(wta)
+
+    def writeWta(self, filepath: str):
+        writeReplacing(filepath, lambda f: f.write(self.wtaBytes()))
+
+    def writeWtp(self, filepath: str):
+        def writeTextures(wtpFile):
+            for texture, size in zip(self.textures, self.wtaTextureSize):
+                with open(texture.path, 'rb', buffering=0) as ddsFile:
+                    copyFileData(ddsFile, wtpFile, texture.size)
+                if size != texture.size:
+                    wtpFile.write(texturePadding(size - texture.size))
+        writeReplacing(filepath, writeTextures)
+
+def writeReplacing(filepath: str, write):
+    """Writes into a temporary file first, so a failed export doesn't leave a broken file behind"""
+    tmpFilepath = filepath + '.tmp'
+    try:
+        with open(tmpFilepath, 'wb', buffering=0) as f:
+            write(f)
+        os.replace(tmpFilepath, filepath)
+    except:
+        if os.path.exists(tmpFilepath):
+            os.remove(tmpFilepath)
+        raise
@@ -8,6 +8,7 @@ from bpy.props import StringProperty
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 from ...utils.util import getUsedMaterials
+from ..importer.textureStore import TextureLookup
 
 
 def generateID(context):
@@ -73,12 +74,9 @@ def autoSetWtaTexPathsForMat(blendMat: bpy.types.Material, allWtaItems: List[WTA
         texDir = os.path.dirname(tex["path"])
         if texDir not in textureDirs:
             textureDirs.append(texDir)
+    textureLookup = TextureLookup(textureDirs)
     def searchForTexture(texId: str) -> str:
-        for texDir in textureDirs:
-            texPath = os.path.join(texDir, f"{texId}.dds")
-            if os.path.exists(texPath):
-                return texPath
-        return None
+        return textureLookup.find(texId)
     
     # set wta texture paths
     for item in wtaItems:
@@ -467,6 +465,8 @@ class WTA_WTP_PT_Export(bpy.types.Panel):
         row.operator("na.sync_material_identifiers")
         row.operator("na.sync_blender_materials")
 
+        layout.prop(context.scene, "padWtpTextures")
+
 def textureMatchesSearch(
     mat : WTAItems, searchStr : str,
     checkIdName = True, checkTexName = False, checkMatName = False, checkTexPath = False,
@@ -680,6 +680,11 @@ def register():
         default = False,
         description = "Use regular expressions",
     )
+    bpy.types.Scene.padWtpTextures = bpy.props.BoolProperty (
+        name = "Pad Textures",
+        default = False,
+        description = "Pad every texture but the last in the WTP to a fixed size bucket (12288, 176128, ... bytes). Used by both the WTA and the WTP export, the DDS files aren't modified",
+    )
 
 def unregister():
     bpy.utils.unregister_class(WTAItems)
@@ -712,4 +717,5 @@ def unregister():
     del bpy.types.Scene.bSearchTexName
     del bpy.types.Scene.bSearchIdentifiers
     del bpy.types.Scene.bSearchTexPaths
-    del bpy.types.Scene.bSearchRegex
\ No newline at end of file
+    del bpy.types.Scene.bSearchRegex
+    del bpy.types.Scene.padWtpTextures
\ No newline at end of file
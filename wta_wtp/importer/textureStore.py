@@ -0,0 +1,153 @@
+# Content-addressed store of extracted DDS textures, shared by all archives extracted into the same directory
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+from typing import Dict, List, Optional
+
+# next to the <name>.dat/<name>.dtt directories in nier2blender_extracted
+STORE_DIRNAME = "texture_store"
+# per textures directory: identifier -> file name and content hash
+INDEX_FILENAME = "texture_index.json"
+
+def hashTexture(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def removeFile(filepath: str):
+    """Removes a file even if it's read-only"""
+    if os.name == "nt":
+        # Windows refuses to delete read-only files. Elsewhere the mode is left alone,
+        # it's shared with every other hardlink of the file.
+        os.chmod(filepath, stat.S_IREAD | stat.S_IWRITE)
+    os.remove(filepath)
+
+class TextureStore(object):
+    """
+    One blob per distinct DDS payload, named by its hash. The textures directories of
+    the archives hardlink to the blobs (or get a copy where hardlinks aren't supported),
+    so textures shared between archives are only written once. Opt-in, see the "Share Extracted
+    Textures" import option.
+    Blobs are read-only, so a DDS can't be edited in place (which would change it for every archive
+    using it). A blob is trusted by its name and size, one edited anyway only gets written again
+    if its size changed.
+    """
+    def __init__(self, storeDir: str):
+        self.storeDir = storeDir
+
+    @staticmethod
+    def forExtractDir(extractDir: str) -> "TextureStore":
+        """Store of a nier2blender_extracted directory"""
+        return TextureStore(os.path.join(extractDir, STORE_DIRNAME))
+
+    def blobPath(self, digest: str) -> str:
+        return os.path.join(self.storeDir, digest + ".dds")
+
+    def add(self, data) -> str:
+        """Writes the blob unless the store already has it, returns its hash"""
+        digest = hashTexture(data)
+        blobPath = self.blobPath(digest)
+        if self.hasBlob(digest, len(data)):
+            return digest
+        os.makedirs(self.storeDir, exist_ok=True)
+        # several threads can add the same texture, each writes its own temporary file
+        tmpFd, tmpPath = tempfile.mkstemp(prefix=digest, suffix=".tmp", dir=self.storeDir)
+        try:
+            with os.fdopen(tmpFd, "wb") as f:
+                f.write(data)
+            os.chmod(tmpPath, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+            # a broken blob stays with the files linked to it, new links get the original payload
+            try:
+                os.replace(tmpPath, blobPath)
+            except PermissionError:
+                # Windows doesn't replace read-only files
+                removeFile(blobPath)
+                os.replace(tmpPath, blobPath)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                removeFile(tmpPath)
+            raise
+        return digest
+
+    def hasBlob(self, digest: str, size: int) -> bool:
+        """Whether the blob exists with the expected size, it isn't read and hashed again"""
+        try:
+            return os.stat(self.blobPath(digest)).st_size == size
+        except OSError:
+            return False
+
+    def link(self, digest: str, filepath: str):
+        """Makes filepath the blob, nothing is written if it already is"""
+        blobPath = self.blobPath(digest)
+        if os.path.exists(filepath):
+            if os.path.samefile(blobPath, filepath):
+                return
+            removeFile(filepath)
+        try:
+            os.link(blobPath, filepath)
+        except OSError:
+            shutil.copyfile(blobPath, filepath)
+
+    def prune(self) -> int:
+        """
+        Deletes blobs no extracted file links to anymore (and leftover temporary files),
+        returns how many files were deleted. Where hardlinks aren't supported every blob is unlinked,
+        so the store is emptied and only serves to skip writing identical payloads within one extraction.
+        """
+        if not os.path.isdir(self.storeDir):
+            return 0
+        prunedCount = 0
+        for file in os.listdir(self.storeDir):
+            filepath = os.path.join(self.storeDir, file)
+            try:
+                if file.endswith(".tmp") or file.endswith(".dds") and os.stat(filepath).st_nlink <= 1:
+                    removeFile(filepath)
+                    prunedCount += 1
+            except OSError as e:
+                print("[-] Could not prune", filepath, e)
+        return prunedCount
+
+def saveTextureIndex(textureDir: str, textures: Dict[str, List[str]]):
+    """textures: identifier -> [file name, hash]"""
+    with open(os.path.join(textureDir, INDEX_FILENAME), "w") as f:
+        json.dump({
+            "version": 1,
+            "textures": {
+                identifier.lower(): { "file": fileName, "hash": digest }
+                for identifier, (fileName, digest) in textures.items()
+            }
+        }, f, indent=4)
+
+def loadTextureIndex(textureDir: str) -> Optional[Dict[str, str]]:
+    """identifier -> file name, None if the directory has no (readable) index"""
+    try:
+        with open(os.path.join(textureDir, INDEX_FILENAME), "r") as f:
+            index = json.load(f)
+        return { identifier: texture["file"] for identifier, texture in index["textures"].items() }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+class TextureLookup(object):
+    """Finds DDS files by identifier in several texture directories, earlier directories win"""
+    def __init__(self, textureDirs: List[str]):
+        self.paths: Dict[str, str] = {}
+        for textureDir in textureDirs:
+            # listed once instead of probing every identifier, so DDS files added after the extraction are found too
+            try:
+                ddsFiles = [file for file in os.listdir(textureDir) if file.lower().endswith(".dds")]
+            except OSError:
+                continue
+            files = { os.path.splitext(file)[0].lower(): file for file in ddsFiles }
+            # the index only maps identifiers to file names that don't follow <identifier>.dds
+            index = loadTextureIndex(textureDir) or {}
+            ddsFiles = set(ddsFiles)
+            files.update({ identifier: file for identifier, file in index.items() if file in ddsFiles })
+            for identifier, file in files.items():
+                self.paths.setdefault(identifier, os.path.join(textureDir, file))
+
+    def find(self, identifier: str) -> Optional[str]:
+        path = self.paths.get(identifier.lower())
+        if path is None or not os.path.exists(path):
+            return None
+        return path
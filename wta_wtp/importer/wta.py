@@ -1,4 +1,9 @@
-from ...utils.ioUtils import read_uint32, to_uint
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from ...utils.ioUtils import read_uint32, to_uint, open_binary, BinaryReader
+from .textureStore import TextureStore, removeFile, saveTextureIndex
 
 DEBUG_WTA_PRINT = False
 
@@ -44,13 +49,108 @@ class WTA(object):
                 self.unknownArray2.append(to_uint(unknownval))
                 unknownval =  (wta_fp.read(4))
             self.pointer2 = hex(wta_fp.tell())    
+            # first texture with an identifier, like the linear search used to find
+            self.identifierIndex = {}
+            for i, identifier in enumerate(self.wtaTextureIdentifier):
+                self.identifierIndex.setdefault(identifier, i)
     def getTextureByIndex(self, texture_index, texture_fp):
         texture_fp.seek(self.wtaTextureOffset[texture_index])
         texture = texture_fp.read(self.wtaTextureSize[texture_index])
         return texture
 
     def getTextureByIdentifier(self, textureIdentifier, texture_fp):
-        for index in range(self.textureCount):
-            if self.wtaTextureIdentifier[index] == textureIdentifier:
-                return self.getTextureByIndex(index,texture_fp)
-        return False
\ No newline at end of file
+        index = self.identifierIndex.get(textureIdentifier)
+        if index is None:
+            return False
+        return self.getTextureByIndex(index,texture_fp)
+class TextureBundle(object):
+    """
+    Textures of a WTA/WTP pair by identifier. The WTP is memory mapped (or used in place
+    when it comes from a DatArchive), textures are served as zero-copy memoryviews.
+    """
+    def __init__(self, wta, wtp):
+        if not isinstance(wta, WTA):
+            with open_binary(wta) as wtaFile:
+                wta = WTA(wtaFile)
+        self.wta = wta
+        # identifier -> (offset, size, flags)
+        self.textures: Dict[str, Tuple[int, int, int]] = {}
+        for index in range(wta.textureCount):
+            self.textures.setdefault(wta.wtaTextureIdentifier[index], (
+                wta.wtaTextureOffset[index],
+                wta.wtaTextureSize[index],
+                int(wta.unknownArray1[index], 16)
+            ))
+
+        self.ownsReader = not isinstance(wtp, BinaryReader)
+        if isinstance(wtp, (str, os.PathLike)):
+            wtp = BinaryReader.open(wtp)
+        elif self.ownsReader:
+            wtp = BinaryReader.fromFile(wtp)
+        self.wtp = wtp
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.ownsReader:
+            self.wtp.close()
+
+    def __len__(self) -> int:
+        return len(self.textures)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self.textures
+
+    def getTexture(self, identifier: str) -> Optional[memoryview]:
+        """DDS data of a texture, None if the WTA doesn't have it"""
+        texture = self.textures.get(identifier)
+        if texture is None:
+            return None
+        offset, size, _ = texture
+        if offset + size > len(self.wtp):
+            raise ValueError(f"Texture {identifier} ({size} bytes at {offset}) is outside of {self.wtp.name}")
+        return self.wtp.getbuffer()[offset : offset + size]
+
+    def getFlags(self, identifier: str) -> int:
+        return self.textures[identifier][2]
+
+    def extract(self, extractDir: str, fileName: Callable[[str], str] = None, overwrite: bool = True, maxWorkers: int = None, store: TextureStore = None) -> int:
+        """
+        Writes every texture as a DDS file (named identifier + '.dds' by default) in parallel.
+        With a store, the files are links to its blobs and only payloads it doesn't have yet are written,
+        the directory also gets an index of identifier -> file and hash.
+        Returns how many files were written or linked.
+        """
+        if fileName is None:
+            fileName = lambda identifier: identifier + ".dds"
+        os.makedirs(extractDir, exist_ok=True)
+        index = {}
+
+        def extractTexture(identifier: str) -> bool:
+            filepath = os.path.join(extractDir, fileName(identifier))
+            if not overwrite and os.path.exists(filepath) and store is None:
+                return False
+            texture = self.getTexture(identifier)
+            if store is not None:
+                digest = store.add(texture)
+                index[identifier] = [fileName(identifier), digest]
+                if not overwrite and os.path.exists(filepath):
+                    return False
+                store.link(digest, filepath)
+                return True
+            if os.path.exists(filepath):
+                # might be a read-only link into a texture store, writing into it would change the blob
+                removeFile(filepath)
+            with open(filepath, "wb") as f:
+                f.write(texture)
+            return True
+
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            extractedCount = sum(executor.map(extractTexture, self.textures))
+        if store is not None:
+            saveTextureIndex(extractDir, index)
+        return extractedCount